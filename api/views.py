@@ -4,7 +4,6 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
-from django.db.models import Q
 
 from customer.models import Company, Address
 from warranty_and_services.models import (
@@ -12,6 +11,7 @@ from warranty_and_services.models import (
 )
 from item_master.models import ItemMaster, InventoryItem
 from custom_user.permissions import get_company_queryset_for_user
+from core.search import search_ranked
 
 from .serializers import (
     UserSerializer, CustomerSerializer, CustomerAddressSerializer,
@@ -182,28 +182,22 @@ def search(request):
     
     companies = get_company_queryset_for_user(request.user, Company.objects.all())
     
-    # Search installations
-    installations = Installation.objects.filter(
-        customer__in=companies
-    ).filter(
-        Q(customer__name__icontains=query) |
-        Q(installation_notes__icontains=query) |
-        Q(location_address__icontains=query)
-    ).select_related('customer')[:5]
-    
-    # Search customers
-    customers = companies.filter(
-        Q(name__icontains=query) |
-        Q(contact_person__icontains=query) |
-        Q(email__icontains=query)
+    # Tek indeks üzerinden sıralı arama (core.search)
+    installations = search_ranked(
+        Installation.objects.filter(customer__in=companies).select_related('customer'),
+        query,
+        secondary=True  # notlar ve adres
     )[:5]
     
-    # Search items
-    items = ItemMaster.objects.filter(company__in=companies).filter(
-        Q(item_name__icontains=query) |
-        Q(item_number__icontains=query) |
-        Q(brand__icontains=query) |
-        Q(model__icontains=query)
+    # Search customers (name, contact person, email)
+    customers = search_ranked(companies, query, secondary=True)[:5]
+    
+    # Search items installed at the user's companies (name, shortcode)
+    items = search_ranked(
+        ItemMaster.objects.filter(
+            pk__in=Installation.objects.filter(customer__in=companies).values('inventory_item__name_id')
+        ),
+        query
     )[:5]
     
     results = {
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'object_id', 'primary_text', 'updated_at']
+    list_filter = ['kind']
+    search_fields = ['primary_text']
+    readonly_fields = ['kind', 'object_id', 'primary_text', 'secondary_text', 'updated_at']
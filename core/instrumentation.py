@@ -0,0 +1,190 @@
+"""
+İstek bazlı performans ölçümü.
+
+``PerformanceInstrumentationMiddleware`` her istekte tüm veritabanı
+bağlantılarına bir ``execute_wrapper`` ekler ve şunları toplar:
+
+- toplam süre (wall time) ve veritabanında geçen süre,
+- sorgu sayısı,
+- tekrarlanan sorgular: parametreleri ve IN listeleri çıkarılmış SQL
+  "parmak izi" aynı istekte birden çok çalıştıysa (tipik N+1).
+
+Değerler view adına (``resolver_match.view_name``) göre histogramlarda
+toplanır ve ``/metrics/`` adresinden Prometheus text formatında okunur.
+``REQUEST_TIME_BUDGET_MS`` veya ``REQUEST_QUERY_BUDGET`` aşılırsa istek,
+en çok tekrarlanan sorgularla birlikte loglanır.
+
+Histogramlar process içinde tutulur; birden çok worker varsa her biri kendi
+değerlerini verir.
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'gvs_request'
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_RE = re.compile(r'%s|\?')
+IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Parametreler ve IN listeleri çıkarılmış SQL: aynı sorgunun farklı değerlerle çalışması aynı iz"""
+    sql = STRING_LITERAL_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = PLACEHOLDER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('(...)', sql)
+    return WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """Bir istekteki sorgular (``connection.execute_wrapper`` olarak kullanılır)"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        """{parmak izi: çalışma sayısı}, en çok tekrarlanan önce"""
+        return {sql: count for sql, count in self.fingerprints.most_common() if count > 1}
+
+    @property
+    def duplicate_count(self):
+        """İlk çalışma dışındaki tekrarlar"""
+        return sum(count - 1 for count in self.fingerprints.values())
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # son eleman: +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.db_duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.duplicate_queries = Histogram(QUERY_BUCKETS)
+        self.over_budget = 0
+
+
+class RequestMetrics:
+    """View bazlı histogramlar (process içinde, thread-safe)"""
+
+    HISTOGRAMS = (
+        ('duration', 'duration_seconds', 'Request wall time in seconds'),
+        ('db_duration', 'db_duration_seconds', 'Time spent in database queries per request in seconds'),
+        ('queries', 'queries', 'SQL queries per request'),
+        ('duplicate_queries', 'duplicate_queries', 'Repeated executions of the same SQL fingerprint per request'),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def observe(self, view, duration, recorder, over_budget=False):
+        with self.lock:
+            metrics = self.views.get(view)
+            if metrics is None:
+                metrics = self.views[view] = ViewMetrics()
+            metrics.duration.observe(duration)
+            metrics.db_duration.observe(recorder.duration)
+            metrics.queries.observe(recorder.count)
+            metrics.duplicate_queries.observe(recorder.duplicate_count)
+            if over_budget:
+                metrics.over_budget += 1
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+    def render(self):
+        """Prometheus text formatı (version 0.0.4)"""
+        with self.lock:
+            views = sorted(self.views.items())
+            lines = []
+            for attribute, suffix, description in self.HISTOGRAMS:
+                name = f'{METRIC_PREFIX}_{suffix}'
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+                for view, metrics in views:
+                    lines += getattr(metrics, attribute).render(name, f'view="{escape_label(view)}"')
+
+            name = f'{METRIC_PREFIX}_over_budget_total'
+            lines += [f'# HELP {name} Requests over the time or query budget', f'# TYPE {name} counter']
+            lines += [f'{name}{{view="{escape_label(view)}"}} {metrics.over_budget}' for view, metrics in views]
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_metrics = RequestMetrics()
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or match.func.__name__
+
+
+def record_request(request, duration, recorder):
+    """İsteği histogramlara ekle; bütçe aşıldıysa logla"""
+    view = view_label(request)
+    time_budget = getattr(settings, 'REQUEST_TIME_BUDGET_MS', 1000)
+    query_budget = getattr(settings, 'REQUEST_QUERY_BUDGET', 50)
+    over_budget = (
+        (time_budget is not None and duration * 1000 > time_budget)
+        or (query_budget is not None and recorder.count > query_budget)
+    )
+    request_metrics.observe(view, duration, recorder, over_budget)
+
+    if over_budget:
+        duplicates = ''.join(
+            f'\n  {count}x {sql[:300]}' for sql, count in list(recorder.duplicates().items())[:5]
+        )
+        logger.warning(
+            f'{request.method} {request.path} ({view}) over budget: {duration * 1000:.0f} ms, '
+            f'{recorder.count} queries, {recorder.duration * 1000:.0f} ms in database, '
+            f'{recorder.duplicate_count} duplicate executions{duplicates}'
+        )
@@ -0,0 +1,149 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.apps import apps
+from django.conf import settings
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Yeni bir process'te Django'yu başlatır (web worker açılışındaki gibi URLconf dahil)
+STARTUP_SCRIPT = """
+import time
+started = time.perf_counter()
+import django
+django.setup()
+if {load_urls}:
+    from django.conf import settings
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+print(time.perf_counter() - started)
+"""
+
+
+class Command(BaseCommand):
+    help = 'Measure process startup import cost per app (python -X importtime) to track regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Number of fresh processes to measure; the median is reported (default: 5)'
+        )
+        parser.add_argument(
+            '--no-urls',
+            action='store_true',
+            help='Only run django.setup(), do not load the URLconf (views)'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Also list the N most expensive non-project packages (default: 10)'
+        )
+        parser.add_argument(
+            '--save',
+            type=str,
+            help='Write the results as JSON to this file'
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            help='Compare against a JSON file written earlier with --save'
+        )
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        runs = [self.measure(not options['no_urls']) for _ in range(repeat)]
+
+        total = statistics.median(run['total'] for run in runs)
+        packages = {}
+        for run in runs:
+            for package, cost in run['packages'].items():
+                packages.setdefault(package, []).append(cost)
+        # Bir çalıştırmada görülmeyen paket 0 sayılır
+        packages = {
+            package: statistics.median(costs + [0.0] * (repeat - len(costs)))
+            for package, costs in packages.items()
+        }
+
+        project_apps = [
+            app_config.name.split('.')[0] for app_config in apps.get_app_configs()
+            if not app_config.name.startswith('django.')
+        ]
+        results = {
+            'total_ms': round(total, 1),
+            'apps': {app: round(packages.get(app, 0.0), 1) for app in project_apps},
+            'packages': {
+                package: round(cost, 1)
+                for package, cost in sorted(packages.items(), key=lambda item: -item[1])
+                if package not in project_apps
+            },
+        }
+
+        baseline = self.load_baseline(options['baseline']) if options['baseline'] else None
+
+        self.stdout.write(f"Startup ({repeat} runs, median): {results['total_ms']:.1f} ms"
+                          + self.delta(results['total_ms'], baseline and baseline.get('total_ms')))
+        self.stdout.write('\nImport cost per app (own modules, self time):')
+        for app, cost in sorted(results['apps'].items(), key=lambda item: -item[1]):
+            previous = baseline['apps'].get(app) if baseline else None
+            self.stdout.write(f'  {app:<28} {cost:8.1f} ms' + self.delta(cost, previous))
+
+        self.stdout.write(f"\nTop {options['top']} other packages:")
+        for package, cost in list(results['packages'].items())[:options['top']]:
+            previous = baseline['packages'].get(package) if baseline else None
+            self.stdout.write(f'  {package:<28} {cost:8.1f} ms' + self.delta(cost, previous))
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\nResults saved to {options['save']}"))
+
+    def measure(self, load_urls):
+        """Yeni bir process'te -X importtime ile açılışı ölç"""
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE
+        ))
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT.format(load_urls=load_urls)],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=str(settings.BASE_DIR),
+        )
+        if process.returncode != 0:
+            raise CommandError(f'Startup failed:\n{process.stderr[-2000:]}')
+
+        packages = {}
+        for line in process.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            if not line.startswith('import time:'):
+                continue
+            parts = line[len('import time:'):].split('|')
+            if len(parts) != 3 or not parts[0].strip().isdigit():
+                continue
+            package = parts[2].strip().split('.')[0]
+            packages[package] = packages.get(package, 0.0) + int(parts[0]) / 1000
+
+        return {
+            'total': float(process.stdout.strip().splitlines()[-1]) * 1000,
+            'packages': packages,
+        }
+
+    def load_baseline(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read baseline {path}: {e}')
+
+    def delta(self, current, previous):
+        if previous is None:
+            return ''
+        diff = current - previous
+        text = f'  ({diff:+.1f} ms)'
+        if previous and diff > max(5.0, previous * 0.2):
+            return self.style.WARNING(text)
+        return text
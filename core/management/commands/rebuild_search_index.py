@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from core.search import DOCUMENT_TYPES, get_backend, index_objects
+import time
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index (companies, item masters, inventory items, installations)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            action='append',
+            dest='kinds',
+            choices=list(DOCUMENT_TYPES),
+            help='Only rebuild the given document kind (repeatable)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of index rows written per bulk upsert (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        backend = get_backend(connection)
+        self.stdout.write(f'Search backend: {type(backend).__name__}')
+
+        for kind in options['kinds'] or DOCUMENT_TYPES:
+            started = time.monotonic()
+            with transaction.atomic():
+                count = index_objects(kind, batch_size=options['batch_size'])
+            self.stdout.write(
+                self.style.SUCCESS(f'Indexed {count} {kind} documents in {time.monotonic() - started:.2f}s')
+            )
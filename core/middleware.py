@@ -1,8 +1,17 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.shortcuts import redirect
-from django.urls import reverse
 from django.contrib import messages
+from django.utils.functional import SimpleLazyObject
 from django.utils.translation import gettext as _
 
+from .instrumentation import QueryRecorder, record_request
+from .scope import AccessScope
+
 
 class RoleBasedAccessMiddleware:
     """
@@ -45,3 +54,39 @@ class RoleBasedAccessMiddleware:
         
         # All other roles (admin, manager, etc.) have unrestricted access
         return self.get_response(request)
+
+
+class AccessScopeMiddleware:
+    """
+    request.access_scope: kullanıcının erişim kapsamı, ilk kullanımda
+    derlenir ve istek boyunca saklanır (bkz. core.scope)
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.access_scope = SimpleLazyObject(lambda: AccessScope.for_user(request.user))
+        return self.get_response(request)
+
+
+class PerformanceInstrumentationMiddleware:
+    """
+    View bazlı süre, DB süresi, sorgu sayısı ve tekrarlanan sorgular
+    (bkz. core.instrumentation). Tüm isteği ölçmesi için MIDDLEWARE
+    listesinin başında olmalı. ``PERFORMANCE_INSTRUMENTATION = False``
+    ile kapatılır.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFORMANCE_INSTRUMENTATION', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        record_request(request, time.perf_counter() - started, recorder)
+        return response
@@ -0,0 +1,140 @@
+# Generated by Django 5.2.1 on 2026-10-16 21:05
+
+from django.db import migrations, models, transaction
+
+# İndeks şeması ve doldurma bu migration'a sabitlenmiştir; core.search
+# sonradan değişse de migration aynı şeyi yapar.
+
+FTS_TABLE = 'core_searchdocument_fts'
+
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"primary_text, secondary_text, content='core_searchdocument', content_rowid='id', "
+    f"tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON core_searchdocument BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, primary_text, secondary_text) "
+    f"VALUES (new.id, new.primary_text, new.secondary_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON core_searchdocument BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, primary_text, secondary_text) "
+    f"VALUES ('delete', old.id, old.primary_text, old.secondary_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON core_searchdocument BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, primary_text, secondary_text) "
+    f"VALUES ('delete', old.id, old.primary_text, old.secondary_text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, primary_text, secondary_text) "
+    f"VALUES (new.id, new.primary_text, new.secondary_text); END",
+    # Doldurulmuş tablonun satırlarını FTS indeksine al
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+POSTGRES_INSTALL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS core_searchdocument_primary_text_trgm '
+    'ON core_searchdocument USING gin (primary_text gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS core_searchdocument_secondary_text_trgm '
+    'ON core_searchdocument USING gin (secondary_text gin_trgm_ops)',
+]
+
+POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS core_searchdocument_primary_text_trgm',
+    'DROP INDEX IF EXISTS core_searchdocument_secondary_text_trgm',
+]
+
+# tür: (model, primary alanlar, secondary alanlar)
+DOCUMENT_TYPES = {
+    'company': (('customer', 'Company'), ('name',), ('email', 'tax_number', 'telephone')),
+    'itemmaster': (('item_master', 'ItemMaster'), ('name', 'shortcode'), ('description',)),
+    'inventoryitem': (('item_master', 'InventoryItem'), ('serial_no', 'name__name', 'name__shortcode'), ()),
+    'installation': (
+        ('warranty_and_services', 'Installation'),
+        ('customer__name', 'inventory_item__name__name', 'inventory_item__serial_no'),
+        ('installation_notes', 'location_address'),
+    ),
+}
+
+
+def join_text(values):
+    return '\n'.join(str(value) for value in values if value)
+
+
+def populate_search_documents(apps, schema_editor):
+    SearchDocument = apps.get_model('core', 'SearchDocument')
+    db_alias = schema_editor.connection.alias
+
+    for kind, (model_label, primary, secondary) in DOCUMENT_TYPES.items():
+        model = apps.get_model(*model_label)
+        rows = model._default_manager.using(db_alias).order_by('pk').values_list(
+            'pk', *primary, *secondary
+        ).iterator(chunk_size=500)
+        batch = []
+        for row in rows:
+            batch.append(SearchDocument(
+                kind=kind,
+                object_id=row[0],
+                primary_text=join_text(row[1:len(primary) + 1]),
+                secondary_text=join_text(row[len(primary) + 1:]),
+            ))
+            if len(batch) >= 500:
+                SearchDocument.objects.using(db_alias).bulk_create(batch)
+                batch = []
+        SearchDocument.objects.using(db_alias).bulk_create(batch)
+
+
+def install_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRES_INSTALL}.get(vendor)
+    if not statements:
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            for statement in statements:
+                schema_editor.execute(statement, params=None)
+    except Exception as e:
+        # FTS5 / pg_trgm yok: arama indeks tablosunda icontains ile çalışır
+        print(f'\n  Search index not created, falling back to LIKE: {e}')
+
+
+def uninstall_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for statement in {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}.get(vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('customer', '0007_alter_workinghours_daily_working_hours'),
+        ('item_master', '0013_alter_serviceperiodvalue_value_and_more'),
+        ('warranty_and_services', '0019_installationstatus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20, verbose_name='Kind')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Object ID')),
+                ('primary_text', models.TextField(help_text='Names, codes and serial numbers', verbose_name='Primary Text')),
+                ('secondary_text', models.TextField(blank=True, default='', help_text='Descriptions, notes, addresses and contact details', verbose_name='Secondary Text')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        # Mevcut kayıtlar indekse alınır
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+        # SQLite: FTS5 sanal tablo + trigger'lar, PostgreSQL: pg_trgm GIN indeksleri
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
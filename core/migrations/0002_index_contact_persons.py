@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:40
+
+from django.db import migrations
+
+# Firma belgelerinin secondary metnine iletişim kişisi adları eklenir. Alanlar
+# bu migration'a sabitlenmiştir; core.search sonradan değişse de aynı şeyi yapar.
+
+COMPANY_SECONDARY = ('email', 'tax_number', 'telephone')
+
+
+def join_text(values):
+    return '\n'.join(str(value) for value in values if value)
+
+
+def index_contact_persons(apps, schema_editor):
+    Company = apps.get_model('customer', 'Company')
+    ContactPerson = apps.get_model('customer', 'ContactPerson')
+    SearchDocument = apps.get_model('core', 'SearchDocument')
+    db_alias = schema_editor.connection.alias
+
+    contacts = {}
+    rows = ContactPerson.objects.using(db_alias).order_by('company_id', 'full_name').values_list(
+        'company_id', 'full_name'
+    )
+    for company_id, full_name in rows:
+        contacts.setdefault(company_id, []).append(full_name)
+    if not contacts:
+        return
+
+    secondary = dict(
+        (row[0], row[1:])
+        for row in Company.objects.using(db_alias).filter(pk__in=list(contacts)).values_list(
+            'pk', *COMPANY_SECONDARY
+        )
+    )
+    documents = list(
+        SearchDocument.objects.using(db_alias).filter(kind='company', object_id__in=list(secondary))
+    )
+    for document in documents:
+        document.secondary_text = join_text(
+            tuple(secondary[document.object_id]) + tuple(contacts[document.object_id])
+        )
+    SearchDocument.objects.using(db_alias).bulk_update(documents, ['secondary_text'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('customer', '0008_companyancestry'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_contact_persons, migrations.RunPython.noop),
+    ]
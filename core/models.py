@@ -1,3 +1,41 @@
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+
+class SearchDocument(models.Model):
+    """
+    Arama indeksi satırı: bir firma, ürün kartı, envanter kalemi veya kurulum
+    için aranan metinlerin önceden birleştirilmiş hali.
+
+    SQLite'ta bu tabloya bağlı bir FTS5 (trigram) sanal tablosu, PostgreSQL'de
+    pg_trgm GIN indeksleri vardır; bkz. ``core.search``. Satırlar signals ile
+    güncel tutulur.
+    """
+    kind = models.CharField(
+        max_length=20,
+        verbose_name=_("Kind")
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name=_("Object ID")
+    )
+    primary_text = models.TextField(
+        verbose_name=_("Primary Text"),
+        help_text=_("Names, codes and serial numbers")
+    )
+    secondary_text = models.TextField(
+        blank=True,
+        default='',
+        verbose_name=_("Secondary Text"),
+        help_text=_("Descriptions, notes, addresses and contact details")
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Search Document")
+        verbose_name_plural = _("Search Documents")
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}"
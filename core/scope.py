@@ -0,0 +1,186 @@
+"""
+Kullanıcı erişim kapsamı (scope).
+
+Firma erişimi için iki kural vardı: ``custom_user.permissions`` rol bazlıdır
+(firma listeleri, API), ``warranty_and_services.utils`` ise hiyerarşi bazlıdır
+(kurulum, takip ve bakım kayıtları). ``AccessScope`` ikisini kullanıcının
+rolü ve firmasından bir kez derler ve tüm uygulamaların paylaştığı
+querysetleri verir::
+
+    scope = AccessScope.for_user(request.user)
+    scope.companies()       # rol kuralı
+    scope.installations()   # firması ve tüm alt firmaları (closure tablosu)
+    scope.followups('warranty') / scope.followups('service')
+    scope.maintenance()
+
+Querysetler alt sorgu ile filtrelenir, oluşturulurken sorgu çalışmaz.
+Scope kullanıcı nesnesinde saklandığı için istek başına bir kez derlenir;
+``AccessScopeMiddleware`` aynı nesneyi ``request.access_scope`` olarak
+tembel (lazy) şekilde ekler.
+
+``COMPANY_SCOPE_CACHE_TIMEOUT`` (saniye) verilirse id listeleri istekler
+arası da cache'lenir. Anahtar hiyerarşi ve erişim sürümlerini içerir;
+hiyerarşi ya da firma yöneticisi (related_manager) değişince
+(customer.signals) sürüm artar ve eski kayıtlar kullanılmaz. Birden çok
+process varsa paylaşılan bir cache (Redis, Memcached) gerekir.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+ACCESS_VERSION_KEY = 'access_scope:version'
+
+# Tüm firmaları gören roller
+ALL_COMPANIES_ROLES = ('manager_main', 'service_main')
+DISTRIBUTOR_ROLES = ('manager_distributor', 'salesmanager_distributor', 'service_distributor')
+
+
+def access_version():
+    """Firma yöneticisi atamaları her değiştiğinde artan sayı"""
+    return cache.get_or_set(ACCESS_VERSION_KEY, 1, None)
+
+
+def invalidate_access_scope():
+    try:
+        cache.incr(ACCESS_VERSION_KEY)
+    except ValueError:
+        cache.set(ACCESS_VERSION_KEY, 1, None)
+
+
+class AccessScope:
+    """Kullanıcının rolü ve firmasından derlenen erişim kapsamı"""
+
+    def __init__(self, user):
+        self.user = user
+
+    @classmethod
+    def for_user(cls, user):
+        """Kullanıcı nesnesine bağlı (memoize edilmiş) scope"""
+        scope = getattr(user, '_access_scope', None)
+        if scope is None:
+            scope = cls(user)
+            user._access_scope = scope
+        return scope
+
+    @property
+    def role(self):
+        return getattr(self.user, 'role', None)
+
+    @property
+    def company_id(self):
+        return getattr(self.user, 'company_id', None)
+
+    # Rol kuralı (firma listeleri)
+
+    @cached_property
+    def company_filter(self):
+        """
+        Görülebilen firmalar için Q; ``Q()`` tümü, ``None`` hiçbiri.
+
+        * manager_main, service_main: tümü
+        * salesmanager_main: yöneticisi olduğu firmalar ve onların alt firmaları
+        * distribütör rolleri: kendi firması ve doğrudan alt firmaları
+        """
+        if not self.user.is_authenticated:
+            return None
+        if self.role in ALL_COMPANIES_ROLES:
+            return Q()
+        if self.role == 'salesmanager_main':
+            return Q(related_manager=self.user) | Q(related_company__related_manager=self.user)
+        if self.role in DISTRIBUTOR_ROLES and self.company_id:
+            return Q(id=self.company_id) | Q(related_company_id=self.company_id)
+        return None
+
+    def companies(self, base_queryset=None):
+        if base_queryset is None:
+            from customer.models import Company
+            base_queryset = Company.objects.all()
+
+        if self.company_filter is None:
+            return base_queryset.none()
+        return base_queryset.filter(self.company_filter)
+
+    @cached_property
+    def visible_company_ids(self):
+        """companies() id listesi; ``None`` tüm firmalar demektir"""
+        if self.company_filter is None:
+            return []
+        if not self.company_filter:
+            return None
+        key = f'{self.role}:{self.company_id}'
+        if self.role == 'salesmanager_main':
+            key = f'{key}:{self.user.pk}'
+        return self.cached(f'companies:{key}', lambda: list(self.companies().values_list('id', flat=True)))
+
+    # Hiyerarşi (kurulum, takip ve bakım kayıtları)
+
+    @cached_property
+    def company_ids(self):
+        """Kullanıcının kendi firması ve tüm alt firmaları"""
+        if not self.company_id:
+            return []
+
+        from customer.hierarchy import descendant_ids
+        return self.cached(
+            f'hierarchy:{self.company_id}',
+            lambda: list(descendant_ids(self.company_id).values_list('descendant_id', flat=True))
+        )
+
+    def company_subquery(self):
+        """
+        Aynı küme, ``customer_id__in=`` ile kullanılacak alt sorgu olarak.
+        IN listesi yerine closure tablosuna join edildiği için SQL metni firma
+        sayısından bağımsızdır.
+        """
+        from customer.hierarchy import descendant_ids
+        from customer.models import CompanyAncestry
+
+        if not self.company_id:
+            return CompanyAncestry.objects.none().values('descendant_id')
+        return descendant_ids(self.company_id)
+
+    def filter_for(self, model_type='installation'):
+        """Q objesi; model_type: 'installation', 'warranty', 'service', 'maintenance'"""
+        prefix = {
+            'installation': '',
+            'warranty': 'installation__',
+            'service': 'installation__',
+            'maintenance': 'service_followup__installation__',
+        }[model_type]
+        return Q(**{f'{prefix}customer_id__in': self.company_subquery()})
+
+    def installations(self, base_queryset=None):
+        if base_queryset is None:
+            from warranty_and_services.models import Installation
+            base_queryset = Installation.objects.all()
+        return base_queryset.filter(self.filter_for('installation'))
+
+    def followups(self, model_type='service', base_queryset=None):
+        if base_queryset is None:
+            from warranty_and_services.models import ServiceFollowUp, WarrantyFollowUp
+            model = WarrantyFollowUp if model_type == 'warranty' else ServiceFollowUp
+            base_queryset = model.objects.all()
+        return base_queryset.filter(self.filter_for(model_type))
+
+    def maintenance(self, base_queryset=None):
+        if base_queryset is None:
+            from warranty_and_services.models import MaintenanceRecord
+            base_queryset = MaintenanceRecord.objects.all()
+        return base_queryset.filter(self.filter_for('maintenance'))
+
+    # Cache
+
+    def cached(self, name, load):
+        timeout = getattr(settings, 'COMPANY_SCOPE_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return load()
+
+        from customer.hierarchy import hierarchy_version
+
+        key = f'access_scope:{hierarchy_version()}.{access_version()}:{name}'
+        value = cache.get(key)
+        if value is None:
+            value = load()
+            cache.set(key, value, timeout)
+        return value
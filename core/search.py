@@ -0,0 +1,340 @@
+"""
+Arama indeksi.
+
+Firma, ürün kartı (ItemMaster), envanter kalemi ve kurulum kayıtlarının
+aranan alanları ``SearchDocument`` tablosunda tek satırda tutulur. Liste
+görünümleri üç tabloyu join edip ``icontains`` OR'lamak yerine bu indeksi
+kullanır:
+
+- SQLite: FTS5 sanal tablosu (trigram tokenizer; alt dize araması ve bm25
+  sıralaması), tablo trigger'ları ile ``SearchDocument``'e bağlı
+- PostgreSQL: pg_trgm GIN indeksleri ile ``ILIKE``, ts_rank + similarity
+  sıralaması
+- Diğer / kısa (3 karakterden az) aramalar: indeks tablosunda ``icontains``
+
+FTS tablosu / trigram indeksleri ve mevcut kayıtların ilk indekslenmesi
+``core`` 0001 migration'ındadır; ``rebuild_search_index`` indeksi baştan
+oluşturur.
+
+Ortak API: ``search_filter()`` (sıralamaya dokunmadan daraltır) ve
+``search_ranked()`` (en ilgili sonuçlar önce).
+"""
+from functools import partial
+
+from django.apps import apps
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+class SearchDocumentType:
+    """
+    İndekslenen bir model: ``primary`` alanları (ad, kod, seri no) ve
+    ``secondary`` alanları (açıklama, not, adres). ``dependents`` başka
+    indeks türlerinin bu modelden okuduğu alanlar: {tür: lookup}.
+
+    ``collected`` çok değerli ilişkilerden okunan alanlar (ör. firmanın
+    iletişim kişileri); ayrı bir sorguyla toplanıp secondary metne eklenir.
+    ``sources`` bu alanların geldiği modeller: {model: indekslenen kayda
+    giden alan}; bu kayıtlar değişince ilgili belge yeniden oluşturulur.
+    """
+
+    def __init__(self, kind, model_label, primary, secondary=(), dependents=None, collected=(), sources=None):
+        self.kind = kind
+        self.model_label = model_label
+        self.primary = tuple(primary)
+        self.secondary = tuple(secondary)
+        self.dependents = dependents or {}
+        self.collected = tuple(collected)
+        self.sources = sources or {}
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def indexed_fields(self):
+        """Bu modelin kendi alanlarından indekse girenler (ör. 'name__name' -> 'name')"""
+        return {path.split('__')[0] for path in self.primary + self.secondary}
+
+    def collect(self, ids):
+        """``collected`` alanlarının değerleri: {pk: [değer, ...]}"""
+        values = {}
+        for path in self.collected:
+            rows = self.model._default_manager.filter(
+                pk__in=ids, **{f'{path}__isnull': False}
+            ).order_by('pk', path).values_list('pk', path)
+            for pk, value in rows:
+                values.setdefault(pk, []).append(value)
+        return values
+
+    def build(self, row, collected=()):
+        values = row[1:]
+        primary = values[:len(self.primary)]
+        secondary = tuple(values[len(self.primary):]) + tuple(collected)
+        return (
+            '\n'.join(str(value) for value in primary if value),
+            '\n'.join(str(value) for value in secondary if value),
+        )
+
+
+DOCUMENT_TYPES = {
+    'company': SearchDocumentType(
+        'company', 'customer.Company',
+        primary=('name',),
+        secondary=('email', 'tax_number', 'telephone'),
+        dependents={'installation': 'customer_id'},
+        collected=('contact_persons__full_name',),
+        sources={'customer.ContactPerson': 'company_id'},
+    ),
+    'itemmaster': SearchDocumentType(
+        'itemmaster', 'item_master.ItemMaster',
+        primary=('name', 'shortcode'),
+        secondary=('description',),
+        dependents={'inventoryitem': 'name_id', 'installation': 'inventory_item__name_id'},
+    ),
+    'inventoryitem': SearchDocumentType(
+        'inventoryitem', 'item_master.InventoryItem',
+        primary=('serial_no', 'name__name', 'name__shortcode'),
+        dependents={'installation': 'inventory_item_id'},
+    ),
+    'installation': SearchDocumentType(
+        'installation', 'warranty_and_services.Installation',
+        primary=('customer__name', 'inventory_item__name__name', 'inventory_item__serial_no'),
+        secondary=('installation_notes', 'location_address'),
+    ),
+}
+
+
+def kind_for_model(model):
+    for kind, doc_type in DOCUMENT_TYPES.items():
+        if doc_type.model is model or issubclass(model, doc_type.model):
+            return kind
+    raise ValueError(f'{model.__name__} is not indexed for search')
+
+
+# Backend'ler
+
+class LikeSearchBackend:
+    """Genel yedek: indeks tablosunda icontains (tek tablo, join yok)"""
+    vendor = None
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def matches(self, kind, query, secondary=False):
+        from .models import SearchDocument
+        condition = Q(primary_text__icontains=query)
+        if secondary:
+            condition |= Q(secondary_text__icontains=query)
+        return SearchDocument.objects.filter(condition, kind=kind).values('object_id')
+
+    def rank(self, kind, query, secondary, outer_pk):
+        """Küçük değer = daha ilgili"""
+        return '0', ()
+
+
+class SQLiteFTSSearchBackend(LikeSearchBackend):
+    vendor = 'sqlite'
+    table = 'core_searchdocument_fts'
+    # Trigram tokenizer 3 karakterden kısa aramaları eşleştiremez
+    min_length = 3
+
+    def available(self):
+        if not hasattr(self.connection, '_search_fts_available'):
+            self.connection._search_fts_available = (
+                self.table in self.connection.introspection.table_names()
+            )
+        return self.connection._search_fts_available
+
+    def match_expression(self, query, secondary):
+        phrase = '"' + query.replace('"', '""') + '"'
+        return phrase if secondary else '{primary_text}: ' + phrase
+
+    def use_fts(self, query):
+        return len(query) >= self.min_length and self.available()
+
+    def matches(self, kind, query, secondary=False):
+        if not self.use_fts(query):
+            return super().matches(kind, query, secondary)
+        return RawSQL(
+            f'SELECT d.object_id FROM {self.table} '
+            f'JOIN core_searchdocument d ON d.id = {self.table}.rowid '
+            f'WHERE {self.table} MATCH %s AND d.kind = %s',
+            (self.match_expression(query, secondary), kind)
+        )
+
+    def rank(self, kind, query, secondary, outer_pk):
+        if not self.use_fts(query):
+            return super().rank(kind, query, secondary, outer_pk)
+        # bm25: negatif, küçük olan daha ilgili
+        return (
+            f'SELECT {self.table}.rank FROM {self.table} '
+            f'JOIN core_searchdocument d ON d.id = {self.table}.rowid '
+            f'WHERE {self.table} MATCH %s AND d.kind = %s AND d.object_id = {outer_pk}',
+            (self.match_expression(query, secondary), kind)
+        )
+
+
+class PostgresTrigramSearchBackend(LikeSearchBackend):
+    vendor = 'postgresql'
+
+    def pattern(self, query):
+        escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f'%{escaped}%'
+
+    def condition(self, secondary):
+        # UPPER(...) LIKE yerine ILIKE: GIN trigram indeksi kullanılabilsin
+        if secondary:
+            return '(d.primary_text ILIKE %s OR d.secondary_text ILIKE %s)', 2
+        return 'd.primary_text ILIKE %s', 1
+
+    def matches(self, kind, query, secondary=False):
+        condition, count = self.condition(secondary)
+        return RawSQL(
+            f'SELECT d.object_id FROM core_searchdocument d WHERE d.kind = %s AND {condition}',
+            (kind,) + (self.pattern(query),) * count
+        )
+
+    def rank(self, kind, query, secondary, outer_pk):
+        return (
+            "SELECT -(ts_rank(to_tsvector('simple', d.primary_text), plainto_tsquery('simple', %s)) "
+            "+ similarity(d.primary_text, %s)) "
+            f'FROM core_searchdocument d WHERE d.kind = %s AND d.object_id = {outer_pk}',
+            (query, query, kind)
+        )
+
+
+BACKENDS = {
+    backend.vendor: backend
+    for backend in (SQLiteFTSSearchBackend, PostgresTrigramSearchBackend)
+}
+
+
+def get_backend(connection):
+    return BACKENDS.get(connection.vendor, LikeSearchBackend)(connection)
+
+
+# Arama API'si
+
+def search_filter(queryset, query, kind=None, secondary=False):
+    """
+    Queryset'i arama sonucuna göre daralt; sıralamaya dokunmaz.
+    ``secondary=True`` açıklama/not/adres alanlarını da arar.
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+    kind = kind or kind_for_model(queryset.model)
+    backend = get_backend(connections[queryset.db])
+    return queryset.filter(pk__in=backend.matches(kind, query, secondary))
+
+
+def search_ranked(queryset, query, kind=None, secondary=False):
+    """
+    ``search_filter()`` + ilgi sırası: sonuçlar ``search_rank`` annotation'ı
+    ile en ilgili önce sıralanır.
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+    kind = kind or kind_for_model(queryset.model)
+    connection = connections[queryset.db]
+    backend = get_backend(connection)
+    meta = queryset.model._meta
+    outer_pk = f'{connection.ops.quote_name(meta.db_table)}.{connection.ops.quote_name(meta.pk.column)}'
+    rank_sql, rank_params = backend.rank(kind, query, secondary, outer_pk)
+    return search_filter(queryset, query, kind, secondary).annotate(
+        search_rank=RawSQL(rank_sql, rank_params)
+    ).order_by('search_rank', 'pk')
+
+
+# İndeks bakımı
+
+def index_objects(kind, ids=None, batch_size=500):
+    """
+    Verilen kayıtların (``ids=None``: tümünün) indeks satırlarını yeniden
+    oluştur. Artık var olmayan kayıtların satırları silinir.
+    """
+    from .models import SearchDocument
+
+    doc_type = DOCUMENT_TYPES[kind]
+    queryset = doc_type.model._default_manager.all()
+    if ids is not None:
+        ids = set(ids)
+        if not ids:
+            return 0
+        queryset = queryset.filter(pk__in=ids)
+    else:
+        SearchDocument.objects.filter(kind=kind).delete()
+
+    indexed = 0
+    seen = set()
+    batch = []
+    rows = queryset.order_by('pk').values_list(
+        'pk', *doc_type.primary, *doc_type.secondary
+    ).iterator(chunk_size=batch_size)
+    for row in rows:
+        seen.add(row[0])
+        batch.append(row)
+        if len(batch) >= batch_size:
+            indexed += _upsert(_build_documents(doc_type, batch))
+            batch = []
+    indexed += _upsert(_build_documents(doc_type, batch))
+
+    if ids is not None and ids - seen:
+        remove_objects(kind, ids - seen)
+    return indexed
+
+
+def _build_documents(doc_type, rows):
+    from .models import SearchDocument
+    collected = doc_type.collect([row[0] for row in rows]) if doc_type.collected and rows else {}
+    documents = []
+    for row in rows:
+        primary_text, secondary_text = doc_type.build(row, collected.get(row[0], ()))
+        documents.append(SearchDocument(
+            kind=doc_type.kind, object_id=row[0], primary_text=primary_text, secondary_text=secondary_text
+        ))
+    return documents
+
+
+def _upsert(documents):
+    from .models import SearchDocument
+    if not documents:
+        return 0
+    SearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['primary_text', 'secondary_text', 'updated_at'],
+    )
+    return len(documents)
+
+
+def remove_objects(kind, ids):
+    from .models import SearchDocument
+    SearchDocument.objects.filter(kind=kind, object_id__in=list(ids)).delete()
+
+
+def index_dependents(kind, ids):
+    """Bu kayıtların metnini kullanan diğer indeks satırlarını güncelle"""
+    for dependent_kind, lookup in DOCUMENT_TYPES[kind].dependents.items():
+        dependent_ids = list(
+            DOCUMENT_TYPES[dependent_kind].model._default_manager.filter(
+                **{f'{lookup}__in': list(ids)}
+            ).values_list('pk', flat=True)
+        )
+        index_objects(dependent_kind, dependent_ids)
+
+
+def schedule_index(kind, ids, dependents=False):
+    """Transaction commit edildikten sonra indeksle"""
+    def run():
+        index_objects(kind, ids)
+        if dependents:
+            index_dependents(kind, ids)
+    transaction.on_commit(run)
+
+
+def schedule_remove(kind, ids):
+    transaction.on_commit(partial(remove_objects, kind, list(ids)))
@@ -0,0 +1,38 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .search import DOCUMENT_TYPES, kind_for_model, schedule_index, schedule_remove
+
+
+# Arama indeksi senkronizasyonu
+
+def update_search_document(sender, instance, created=False, update_fields=None, **kwargs):
+    kind = kind_for_model(sender)
+    if update_fields is not None and not set(update_fields) & DOCUMENT_TYPES[kind].indexed_fields():
+        # Sadece indekste olmayan alanlar yazıldı
+        return
+    # Yeni kaydın metnini henüz başka indeks satırı kullanmıyor
+    schedule_index(kind, [instance.pk], dependents=not created)
+
+
+def remove_search_document(sender, instance, **kwargs):
+    schedule_remove(kind_for_model(sender), [instance.pk])
+
+
+def update_source_document(sender, instance, **kwargs):
+    """İletişim kişisi gibi toplanan kayıtlar değişince bağlı belgeyi yeniden oluştur"""
+    for kind, doc_type in DOCUMENT_TYPES.items():
+        for model_label, field in doc_type.sources.items():
+            if apps.get_model(model_label) is sender and getattr(instance, field):
+                schedule_index(kind, [getattr(instance, field)])
+
+
+def connect_search_signals():
+    """İndekslenen modeller core.search.DOCUMENT_TYPES'tan okunur"""
+    for kind, doc_type in DOCUMENT_TYPES.items():
+        post_save.connect(update_search_document, sender=doc_type.model, dispatch_uid=f'search_index_save_{kind}')
+        post_delete.connect(remove_search_document, sender=doc_type.model, dispatch_uid=f'search_index_delete_{kind}')
+        for model_label in doc_type.sources:
+            source = apps.get_model(model_label)
+            post_save.connect(update_source_document, sender=source, dispatch_uid=f'search_source_save_{model_label}')
+            post_delete.connect(update_source_document, sender=source, dispatch_uid=f'search_source_delete_{model_label}')
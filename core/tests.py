@@ -1,3 +1,241 @@
-from django.test import TestCase
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import RequestFactory, TestCase
+
+from customer.models import Company, ContactPerson
+from item_master.models import InventoryItem, ItemMaster
+from warranty_and_services.models import Installation
+
+from .instrumentation import fingerprint, request_metrics
+from .middleware import AccessScopeMiddleware
+from .models import SearchDocument
+from .scope import AccessScope
+from .search import get_backend, index_dependents, index_objects, search_filter, search_ranked
+
+
+class InstrumentationTests(TestCase):
+    """
+    PerformanceInstrumentationMiddleware: view bazlı histogramlar, bütçe
+    aşımı logu ve /metrics/ çıktısı.
+    """
+
+    def setUp(self):
+        request_metrics.reset()
+        self.user = get_user_model().objects.create_user(
+            username='staff', password='x', role='manager_main', is_staff=True
+        )
+        self.client.force_login(self.user)
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" = 5 AND "name" = \'a\''),
+            fingerprint('SELECT *  FROM "t" WHERE "id" = 17 AND "name" = \'b\'')
+        )
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s)')
+        )
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get('/customer/')
+        self.client.get('/customer/')
+        output = self.client.get('/metrics/').content.decode()
+
+        self.assertIn('gvs_request_duration_seconds_count{view="customer:customer_list"} 2', output)
+        self.assertIn('gvs_request_queries_bucket{view="customer:customer_list",le="+Inf"} 2', output)
+        self.assertIn('# TYPE gvs_request_db_duration_seconds histogram', output)
+
+    def test_over_budget_requests_are_logged(self):
+        Company.objects.create(name='Customer', company_type='enduser')
+        with self.settings(REQUEST_QUERY_BUDGET=0), self.assertLogs('core.instrumentation', level='WARNING') as logs:
+            self.client.get('/customer/')
+        self.assertIn('/customer/ (customer:customer_list) over budget', logs.output[0])
+        self.assertIn(
+            'gvs_request_over_budget_total{view="customer:customer_list"} 1',
+            self.client.get('/metrics/').content.decode()
+        )
+
+    def test_metrics_require_staff_or_token(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        with self.settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+
+class AccessScopeMiddlewareTests(TestCase):
+    """
+    request.access_scope istek başına en fazla bir kez derlenir ve bir
+    sonraki isteğe taşınmaz.
+    """
+
+    def setUp(self):
+        self.main = Company.objects.create(name='Main', company_type='main')
+        self.distributor = Company.objects.create(name='Distributor', company_type='distributor')
+        User = get_user_model()
+        User.objects.create_user(username='manager', password='x', role='manager_main', company=self.main)
+        User.objects.create_user(
+            username='distributor', password='x', role='manager_distributor', company=self.distributor
+        )
+
+    def request(self, username, view):
+        request = RequestFactory().get('/')
+        # Her istek kullanıcıyı oturumdan yeni bir nesne olarak yükler
+        request.user = get_user_model().objects.get(username=username)
+        return AccessScopeMiddleware(view)(request)
+
+    def test_scope_is_resolved_once_per_request(self):
+        def view(request):
+            first = request.access_scope.company_filter
+            self.assertIs(request.access_scope.company_filter, first)
+            return request.access_scope._wrapped
+
+        with mock.patch.object(AccessScope, 'for_user', wraps=AccessScope.for_user) as for_user:
+            scope = self.request('manager', view)
+            self.assertEqual(for_user.call_count, 1)
+            self.request('manager', lambda request: None)
+            # Kullanılmayan scope derlenmez
+            self.assertEqual(for_user.call_count, 1)
+        self.assertEqual(scope.company_id, self.main.pk)
+
+    def test_scope_does_not_leak_across_requests(self):
+        def view(request):
+            request.access_scope.role
+            return request.access_scope._wrapped
+
+        manager_scope = self.request('manager', view)
+        distributor_scope = self.request('distributor', view)
+        manager_again = self.request('manager', view)
+
+        self.assertEqual(distributor_scope.company_id, self.distributor.pk)
+        self.assertEqual(distributor_scope.role, 'manager_distributor')
+        self.assertIsNot(manager_again, manager_scope)
+        self.assertEqual(manager_again.company_id, self.main.pk)
+
+
+class SearchIndexMigrationTests(TestCase):
+    """İlk migration mevcut kayıtları indekse alır (arama boş dönmez)"""
+
+    def test_existing_rows_are_indexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            company = Company.objects.create(name='Anadolu Makine', company_type='enduser', email='info@anadolu.test')
+        SearchDocument.objects.all().delete()
+        self.assertFalse(search_filter(Company.objects.all(), 'anadolu').exists())
+
+        migration = import_module('core.migrations.0001_initial')
+        apps = MigrationLoader(connection).project_state(('core', '0001_initial')).apps
+        # Doldurma yalnızca schema_editor.connection'ı kullanır
+        migration.populate_search_documents(apps, SimpleNamespace(connection=connection))
+
+        self.assertEqual(list(search_filter(Company.objects.all(), 'makine')), [company])
+        self.assertEqual(
+            SearchDocument.objects.get(kind='company', object_id=company.pk).secondary_text,
+            'info@anadolu.test'
+        )
+
+    def test_contact_persons_are_added_to_company_documents(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            company = Company.objects.create(name='Anadolu Makine', company_type='enduser', email='info@anadolu.test')
+            ContactPerson.objects.create(company=company, full_name='Ayşe Yılmaz')
+        index_objects('company', [company.pk])
+        SearchDocument.objects.filter(kind='company').update(secondary_text='info@anadolu.test')
+
+        migration = import_module('core.migrations.0002_index_contact_persons')
+        apps = MigrationLoader(connection).project_state(('core', '0002_index_contact_persons')).apps
+        migration.index_contact_persons(apps, SimpleNamespace(connection=connection))
+
+        self.assertEqual(
+            SearchDocument.objects.get(kind='company', object_id=company.pk).secondary_text,
+            'info@anadolu.test\nAyşe Yılmaz'
+        )
+
+
+class SearchIndexTests(TestCase):
+    """
+    core.search: indeks satırları kayıtlarla (ve commit sonrası sinyallerle)
+    senkron tutulur; sıralı arama en ilgili sonucu önce döndürür.
+    """
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company = Company.objects.create(name='Kaya Makine', company_type='enduser', email='info@kaya.test')
+            item = ItemMaster.objects.create(shortcode='KM', name='Kompresör', slug='kompresor')
+            self.installation = Installation.objects.create(
+                user=get_user_model().objects.create_user(username='search', password='x'),
+                customer=self.company,
+                inventory_item=InventoryItem.objects.create(name=item, serial_no='KM-1'),
+            )
+
+    def document(self, kind, obj):
+        return SearchDocument.objects.get(kind=kind, object_id=obj.pk)
+
+    def test_index_objects_rebuilds_and_removes_rows(self):
+        SearchDocument.objects.filter(kind='company').delete()
+        SearchDocument.objects.create(kind='company', object_id=999999, primary_text='Silinmiş')
+
+        self.assertEqual(index_objects('company', [self.company.pk, 999999]), 1)
+        document = self.document('company', self.company)
+        self.assertEqual(document.primary_text, 'Kaya Makine')
+        self.assertEqual(document.secondary_text, 'info@kaya.test')
+        self.assertFalse(SearchDocument.objects.filter(kind='company', object_id=999999).exists())
+
+    def test_index_dependents_refreshes_related_documents(self):
+        # update() sinyal göndermez; bağlı belge eski adı taşır
+        Company.objects.filter(pk=self.company.pk).update(name='Demir Makine')
+        index_objects('company', [self.company.pk])
+        self.assertIn('Kaya Makine', self.document('installation', self.installation).primary_text)
+
+        index_dependents('company', [self.company.pk])
+        self.assertIn('Demir Makine', self.document('installation', self.installation).primary_text)
+
+    def test_signals_index_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            company = Company.objects.create(name='Yeni Firma', company_type='enduser')
+        self.assertFalse(SearchDocument.objects.filter(kind='company', object_id=company.pk).exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.document('company', company).primary_text, 'Yeni Firma')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.name = 'Demir Makine'
+            self.company.save()
+        self.assertIn('Demir Makine', self.document('installation', self.installation).primary_text)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            company.delete()
+        self.assertFalse(SearchDocument.objects.filter(kind='company', object_id=company.pk).exists())
+
+    def test_contact_person_names_are_indexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            contact = ContactPerson.objects.create(company=self.company, full_name='Ayşe Yılmaz')
+        companies = Company.objects.all()
+        self.assertEqual(list(search_ranked(companies, 'yılmaz', secondary=True)), [self.company])
+        self.assertFalse(search_filter(companies, 'yılmaz').exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            contact.delete()
+        self.assertFalse(search_filter(companies, 'yılmaz', secondary=True).exists())
+
+    def test_ranked_puts_closer_match_first(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            longer = Company.objects.create(
+                name='Anadolu Tekstil Makine Yedek Parça Sanayi ve Ticaret', company_type='enduser'
+            )
+        self.assertTrue(get_backend(connection).use_fts('makine'))
+        self.assertEqual(list(search_ranked(Company.objects.all(), 'makine')), [self.company, longer])
+        self.assertEqual(list(search_ranked(Company.objects.order_by('-pk'), 'makine')), [self.company, longer])
+
+    def test_short_query_falls_back_to_like(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Company.objects.create(name='Kaan Ltd', company_type='enduser')
+        queryset = search_ranked(Company.objects.all(), 'ka')
+
+        self.assertNotIn('MATCH', str(queryset.query))
+        # LIKE yedeğinde ilgi sırası yok: birincil anahtar sırası
+        self.assertEqual(list(queryset), [self.company, other])
+        self.assertEqual(list(search_filter(Company.objects.all(), 'an')), [other])
@@ -1,10 +1,15 @@
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
 from django.contrib.auth import login
 from django.contrib import messages
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from .instrumentation import request_metrics
 
 
 class CustomLoginView(LoginView):
@@ -26,3 +31,16 @@ class CustomLoginView(LoginView):
 @login_required(login_url='login')
 def profile(request):
 	return render(request, 'pages/profile.html')
+
+
+def metrics(request):
+	"""
+	İstek histogramları, Prometheus text formatında.
+	METRICS_TOKEN verilirse ``Authorization: Bearer <token>`` ile, yoksa
+	yalnızca staff kullanıcılar okuyabilir.
+	"""
+	token = getattr(settings, 'METRICS_TOKEN', None)
+	authorized = token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+	if not authorized and not request.user.is_staff:
+		return HttpResponseForbidden()
+	return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
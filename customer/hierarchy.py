@@ -0,0 +1,116 @@
+"""
+Firma hiyerarşisi (``related_company`` zinciri) için closure tablosu.
+
+``CompanyAncestry`` her firma için kendisini (depth 0) ve tüm üst firmalarını
+tutar. Böylece "bu firmanın altındaki tüm firmalar" her derinlikte tek bir
+indeksli sorgudur::
+
+    CompanyAncestry.objects.filter(ancestor_id=firma_id).values('descendant_id')
+
+Satırlar Company kaydedildiğinde customer.signals üzerinden güncellenir;
+``rebuild_company_ancestry`` komutu tabloyu baştan hesaplar.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'company_hierarchy:version'
+
+
+def hierarchy_version():
+    """Hiyerarşi her değiştiğinde artan sayı (scope cache anahtarlarında kullanılır)"""
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+def invalidate_hierarchy():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def ancestry_rows(parents):
+    """
+    {firma_id: üst_firma_id} eşlemesinden (ancestor, descendant, depth)
+    satırları. Döngüler kırılır: zincirde tekrar görülen firmada durulur.
+    """
+    rows = []
+    for company_id in parents:
+        seen = set()
+        ancestor_id, depth = company_id, 0
+        while ancestor_id is not None and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            rows.append((ancestor_id, company_id, depth))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    return rows
+
+
+def descendant_ids(company_id):
+    """Firmanın kendisi ve tüm alt firmaları (subquery olarak kullanılabilir)"""
+    from .models import CompanyAncestry
+    return CompanyAncestry.objects.filter(ancestor_id=company_id).values('descendant_id')
+
+
+@transaction.atomic
+def set_parent(company_id, parent_id):
+    """
+    Firmayı (alt ağacıyla birlikte) yeni üst firmanın altına taşı.
+    Yeni oluşturulan firma için de kullanılır; alt ağacı yalnızca kendisidir.
+    """
+    from .models import CompanyAncestry
+
+    CompanyAncestry.objects.bulk_create(
+        [CompanyAncestry(ancestor_id=company_id, descendant_id=company_id, depth=0)],
+        ignore_conflicts=True
+    )
+    subtree_rows = descendant_ids(company_id)
+    subtree = dict(subtree_rows.values_list('descendant_id', 'depth'))
+
+    # Alt ağacın dışındaki eski üst firmalarla bağlantıları kaldır
+    CompanyAncestry.objects.filter(
+        descendant_id__in=subtree_rows
+    ).exclude(ancestor_id__in=subtree_rows).delete()
+
+    if parent_id is None:
+        return
+    # Yeni üst firma alt ağaçtaysa döngü oluşur; o bağlantılar eklenmez
+    # (Company.clean bunu formlarda engeller)
+    ancestors = [
+        (ancestor_id, depth)
+        for ancestor_id, depth in CompanyAncestry.objects.filter(
+            descendant_id=parent_id
+        ).values_list('ancestor_id', 'depth')
+        if ancestor_id not in subtree
+    ]
+    CompanyAncestry.objects.bulk_create(
+        [
+            CompanyAncestry(
+                ancestor_id=ancestor_id,
+                descendant_id=descendant_id,
+                depth=ancestor_depth + 1 + descendant_depth
+            )
+            for ancestor_id, ancestor_depth in ancestors
+            for descendant_id, descendant_depth in subtree.items()
+        ],
+        ignore_conflicts=True
+    )
+
+
+def rebuild_company_ancestry(company_model=None, ancestry_model=None, batch_size=1000):
+    """
+    Tabloyu related_company alanlarından baştan hesapla. Migration'da
+    tarihsel modeller parametre olarak verilir.
+    """
+    if company_model is None or ancestry_model is None:
+        from .models import Company, CompanyAncestry
+        company_model, ancestry_model = Company, CompanyAncestry
+
+    parents = dict(company_model.objects.values_list('id', 'related_company_id'))
+    ancestry_model.objects.all().delete()
+    ancestry_model.objects.bulk_create(
+        [
+            ancestry_model(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth)
+            for ancestor_id, descendant_id, depth in ancestry_rows(parents)
+        ],
+        batch_size=batch_size
+    )
+    return len(parents)
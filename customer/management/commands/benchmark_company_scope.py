@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from customer.hierarchy import descendant_ids
+from customer.models import Company
+import statistics
+import time
+import uuid
+
+
+def legacy_accessible_companies(company):
+    """Closure tablosundan önceki get_user_accessible_companies (2 seviye, N+1)"""
+    accessible_companies = [company.id]
+    for child in Company.objects.filter(related_company=company):
+        accessible_companies.append(child.id)
+        for grandchild in Company.objects.filter(related_company=child):
+            accessible_companies.append(grandchild.id)
+    return list(set(accessible_companies))
+
+
+def closure_accessible_companies(company):
+    return list(descendant_ids(company.id).values_list('descendant_id', flat=True))
+
+
+class Command(BaseCommand):
+    help = 'Compare the legacy nested-loop company scope with the closure table on a synthetic distributor tree'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--depth',
+            type=int,
+            default=4,
+            help='Levels of distributors below the main company (default: 4)'
+        )
+        parser.add_argument(
+            '--fanout',
+            type=int,
+            default=4,
+            help='Sub-companies per company (default: 4)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Scope computations per method (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        # Ağaç geçici olarak oluşturulur ve sonunda geri alınır
+        with transaction.atomic():
+            started = time.monotonic()
+            root, size = self.build_tree(options['depth'], options['fanout'])
+            self.stdout.write(
+                f'Built a tree of {size} companies (depth {options["depth"]}, fanout {options["fanout"]}) '
+                f'in {time.monotonic() - started:.2f}s\n'
+            )
+
+            results = [
+                ('legacy', self.measure(legacy_accessible_companies, root, options['repeat'])),
+                ('closure', self.measure(closure_accessible_companies, root, options['repeat'])),
+            ]
+            transaction.set_rollback(True)
+
+        legacy_mean = statistics.mean(results[0][1][0])
+        for name, (timings, queries, found) in results:
+            mean = statistics.mean(timings)
+            self.stdout.write(
+                f'{name:<8} mean {mean:8.2f} ms  median {statistics.median(timings):8.2f} ms  '
+                f'queries {queries:5d}  companies {found:5d}  speedup x{legacy_mean / mean:.2f}'
+            )
+
+    def build_tree(self, depth, fanout):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        root = Company.objects.create(name=f'{prefix}-main', company_type='main')
+        level, size = [root], 1
+        for level_number in range(1, depth + 1):
+            company_type = 'enduser' if level_number == depth else 'distributor'
+            next_level = []
+            for parent in level:
+                for index in range(fanout):
+                    next_level.append(Company.objects.create(
+                        name=f'{parent.name}-{index}',
+                        company_type=company_type,
+                        related_company=parent
+                    ))
+            level = next_level
+            size += len(level)
+        return root, size
+
+    def measure(self, function, company, repeat):
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                found = function(company)
+                timings.append((time.perf_counter() - started) * 1000)
+        return timings, len(context.captured_queries), len(found)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from customer.hierarchy import invalidate_hierarchy, rebuild_company_ancestry
+import time
+
+
+class Command(BaseCommand):
+    help = 'Recompute the company hierarchy closure table from Company.related_company'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            count = rebuild_company_ancestry()
+        invalidate_hierarchy()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt ancestry for {count} companies in {time.monotonic() - started:.2f}s')
+        )
@@ -0,0 +1,33 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_company_ancestry(apps, schema_editor):
+    from customer.hierarchy import rebuild_company_ancestry
+    rebuild_company_ancestry(apps.get_model('customer', 'Company'), apps.get_model('customer', 'CompanyAncestry'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0007_alter_workinghours_daily_working_hours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyAncestry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField(verbose_name='Depth')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='customer.company', verbose_name='Ancestor')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='customer.company', verbose_name='Descendant')),
+            ],
+            options={
+                'verbose_name': 'Firma Hiyerarşisi',
+                'verbose_name_plural': 'Firma Hiyerarşisi',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='company_ancestry_desc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_company_ancestry')],
+            },
+        ),
+        migrations.RunPython(populate_company_ancestry, migrations.RunPython.noop),
+    ]
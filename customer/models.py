@@ -93,6 +93,15 @@ class Company(models.Model):
 	def __str__(self):
 		return self.name
 
+	def clean(self):
+		from django.core.exceptions import ValidationError
+		from .hierarchy import descendant_ids
+		# Üst firma, firmanın kendisi ya da alt firmalarından biri olamaz
+		if self.pk and self.related_company_id and descendant_ids(self.pk).filter(descendant_id=self.related_company_id).exists():
+			raise ValidationError({
+				'related_company': _('A company cannot be related to itself or one of its sub-companies.')
+			})
+
 	def save(self, *args, **kwargs):
 		"""
 		Auto-assign related_manager when company is end user and has related_company
@@ -115,6 +124,31 @@ class Company(models.Model):
 		verbose_name = _("Firma")
 		verbose_name_plural = _("Firmalar")
 
+class CompanyAncestry(models.Model):
+	"""
+	Firma hiyerarşisinin closure tablosu: her firma için kendisi (depth 0) ve
+	related_company zinciri boyunca tüm üst firmaları birer satırdır.
+	Bir firmanın tüm alt firmaları tek indeksli sorgudur
+	(``ancestor=firma``); satırlar customer.hierarchy ile güncel tutulur.
+	"""
+	ancestor = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="descendant_links", verbose_name=_("Ancestor"))
+	descendant = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="ancestor_links", verbose_name=_("Descendant"))
+	depth = models.PositiveSmallIntegerField(verbose_name=_("Depth"))
+
+	def __str__(self):
+		return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["ancestor", "descendant"], name="unique_company_ancestry"),
+		]
+		indexes = [
+			models.Index(fields=["descendant", "depth"], name="company_ancestry_desc_idx"),
+		]
+		verbose_name = _("Firma Hiyerarşisi")
+		verbose_name_plural = _("Firma Hiyerarşisi")
+
+
 class ContactPerson(models.Model):
 	company = models.ForeignKey(Company, on_delete=models.CASCADE, verbose_name=_("Company"), related_name="contact_persons")
 	full_name = models.CharField(max_length=100, verbose_name=_("Full Name"))
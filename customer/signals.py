@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.scope import invalidate_access_scope
+
+from .hierarchy import invalidate_hierarchy, set_parent
+from .models import Company
+
+
+# Firma hiyerarşisi closure tablosu ve erişim scope sürümleri
+
+@receiver(pre_save, sender=Company)
+def remember_related_company(sender, instance, **kwargs):
+    previous = Company.objects.filter(
+        pk=instance.pk
+    ).values_list('related_company_id', 'related_manager_id').first() if instance.pk else None
+    instance._previous_related_company_id, instance._previous_related_manager_id = previous or (None, None)
+
+
+@receiver(post_save, sender=Company)
+def update_company_ancestry(sender, instance, created, **kwargs):
+    if created or instance.related_company_id != getattr(instance, '_previous_related_company_id', None):
+        set_parent(instance.pk, instance.related_company_id)
+        transaction.on_commit(invalidate_hierarchy)
+
+
+@receiver(post_save, sender=Company)
+def update_access_scope_version(sender, instance, created, **kwargs):
+    # salesmanager_main kapsamı related_manager atamalarına bağlıdır
+    if instance.related_manager_id != getattr(instance, '_previous_related_manager_id', None):
+        transaction.on_commit(invalidate_access_scope)
+
+
+@receiver(post_delete, sender=Company)
+def invalidate_hierarchy_for_deleted_company(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_hierarchy)
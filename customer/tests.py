@@ -1,3 +1,64 @@
 from django.test import TestCase
 
-# Create your tests here.
+from .hierarchy import ancestry_rows, set_parent
+from .models import Company, CompanyAncestry
+
+
+class CompanyAncestryTests(TestCase):
+    """
+    Closure tablosu firma kaydedildiğinde güncellenir; bir firma taşındığında
+    alt ağacıyla birlikte yeni yerine geçer ve tablo baştan hesaplanmış
+    haliyle aynı kalır.
+    """
+
+    def setUp(self):
+        # main -> distributor -> customer -> site, other
+        self.main = Company.objects.create(name='Main', company_type='main')
+        self.distributor = Company.objects.create(
+            name='Distributor', company_type='distributor', related_company=self.main
+        )
+        self.customer = Company.objects.create(
+            name='Customer', company_type='enduser', related_company=self.distributor
+        )
+        self.site = Company.objects.create(name='Site', company_type='enduser', related_company=self.customer)
+        self.other = Company.objects.create(name='Other', company_type='distributor')
+
+    def rows(self):
+        return set(CompanyAncestry.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+    def expected_rows(self):
+        return set(ancestry_rows(dict(Company.objects.values_list('id', 'related_company_id'))))
+
+    def ancestors(self, company):
+        return list(
+            CompanyAncestry.objects.filter(descendant=company).order_by('depth').values_list('ancestor_id', flat=True)
+        )
+
+    def test_rows_follow_related_company(self):
+        self.assertEqual(self.rows(), self.expected_rows())
+        self.assertEqual(self.ancestors(self.site), [self.site.pk, self.customer.pk, self.distributor.pk, self.main.pk])
+
+    def test_moving_company_moves_its_subtree(self):
+        self.customer.related_company = self.other
+        self.customer.save()
+
+        self.assertEqual(self.rows(), self.expected_rows())
+        self.assertEqual(self.ancestors(self.site), [self.site.pk, self.customer.pk, self.other.pk])
+        self.assertEqual(
+            set(CompanyAncestry.objects.filter(ancestor=self.distributor).values_list('descendant_id', flat=True)),
+            {self.distributor.pk}
+        )
+
+    def test_moving_company_to_top_level(self):
+        self.customer.related_company = None
+        self.customer.save()
+
+        self.assertEqual(self.rows(), self.expected_rows())
+        self.assertEqual(self.ancestors(self.site), [self.site.pk, self.customer.pk])
+
+    def test_moving_under_own_subtree_creates_no_cycle(self):
+        set_parent(self.distributor.pk, self.site.pk)
+
+        # Alt ağaç dışındaki üst firmalardan kopar; kendi alt firmasına bağlanmaz
+        self.assertEqual(self.ancestors(self.distributor), [self.distributor.pk])
+        self.assertEqual(self.ancestors(self.site), [self.site.pk, self.customer.pk, self.distributor.pk])
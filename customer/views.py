@@ -41,7 +41,6 @@ def api_company_manager(request, company_id):
 
 @login_required(login_url='login')
 def customer_detail(request, pk):
-	from django.db.models import Min
 	from django.core.paginator import Paginator
 	company = get_object_or_404(Company, pk=pk)
 	
@@ -55,6 +54,7 @@ def customer_detail(request, pk):
 	
 	# Get installations for this customer
 	from warranty_and_services.models import Installation
+	from warranty_and_services.pagination import paginate
 	
 	# Base installations for this company
 	installations = Installation.objects.filter(customer=company)
@@ -66,16 +66,14 @@ def customer_detail(request, pk):
 			models.Q(customer=company) | models.Q(customer__in=related_endusers)
 		)
 	
+	# Garanti / servis tarihleri InstallationStatus tablosundan okunur
 	installations = installations.select_related(
 		'inventory_item__name',
 		'customer'
-	).prefetch_related(
-		'warranty_followups',
-		'service_followups'
 	).annotate(
-		next_warranty_end=Min('warranty_followups__end_of_warranty_date'),
-		next_service_date=Min('service_followups__next_service_date')
-	).order_by('-setup_date')
+		next_warranty_end=models.F('status__earliest_warranty_end'),
+		next_service_date=models.F('status__next_service_date')
+	)
 	
 	# Get service tracking records for this customer
 	from warranty_and_services.models import ServiceFollowUp
@@ -127,10 +125,8 @@ def customer_detail(request, pk):
 		'installation__inventory_item__name'
 	).order_by('-end_of_warranty_date')[:20]  # Latest 20 warranty records
 	
-	# Pagination for installations
-	paginator = Paginator(installations, 10)  # 10 installations per page
-	page_number = request.GET.get('page')
-	page_obj = paginator.get_page(page_number)
+	# Pagination for installations (?cursor= ile keyset modu)
+	page_obj = paginate(request, installations, 10, ('-setup_date', '-id'))
 	
 	# Pagination for related companies
 	related_companies = company.company_set.all().select_related('core_business').prefetch_related('address__city')
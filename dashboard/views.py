@@ -2,7 +2,7 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Sum
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from datetime import timedelta
 import json
@@ -32,6 +32,7 @@ def home(request):
         installation_filter = get_user_accessible_companies_filter(request.user, 'installation')
         warranty_filter = get_user_accessible_companies_filter(request.user, 'warranty')
         service_filter = get_user_accessible_companies_filter(request.user, 'service')
+        maintenance_filter = get_user_accessible_companies_filter(request.user, 'maintenance')
 
         # Basic stats
         total_installations = Installation.objects.filter(installation_filter).count()
@@ -39,10 +40,11 @@ def home(request):
 
         # Count distinct items with active warranty coverage (not total warranty count)
         # One item can have multiple warranties, but we count each item only once
-        active_warranties = WarrantyFollowUp.objects.filter(
-            warranty_filter,
-            end_of_warranty_date__gt=now
-        ).values('installation__inventory_item').distinct().count()
+        # (InstallationStatus: kurulumun en geç biten garantisi hâlâ aktif mi)
+        active_warranties = Installation.objects.filter(
+            installation_filter,
+            status__latest_warranty_end__gt=now
+        ).values('inventory_item').distinct().count()
         context['active_warranties'] = active_warranties
 
         expiring_warranties = WarrantyFollowUp.objects.filter(
@@ -60,15 +62,14 @@ def home(request):
         context['overdue_services'] = overdue_services
 
         # Breakdown maintenance statistics
-        breakdown_maintenance_count = MaintenanceRecord.objects.filter(
-            service_followup__installation__in=Installation.objects.filter(installation_filter),
-            maintenance_type='breakdown'
-        ).count()
+        breakdown_maintenance_count = Installation.objects.filter(
+            installation_filter
+        ).aggregate(total=Sum('status__maintenance_breakdown'))['total'] or 0
         context['breakdown_maintenance_count'] = breakdown_maintenance_count
         
         # Recent breakdown maintenance (last 30 days)
         recent_breakdowns = MaintenanceRecord.objects.filter(
-            service_followup__installation__in=Installation.objects.filter(installation_filter),
+            maintenance_filter,
             maintenance_type='breakdown',
             maintenance_date__gte=now - timedelta(days=30)
         ).count()
@@ -76,7 +77,6 @@ def home(request):
 
         # Spare Parts Usage Statistics
         from warranty_and_services.models import MaintenanceSparePart
-        from django.db.models import Sum
         
         # Spare parts statistics
         spare_parts_count = MaintenanceSparePart.objects.filter(
@@ -782,8 +782,8 @@ def breakdown_maintenance_report(request):
 
     # Only generate report if models are available
     if Installation and MaintenanceRecord and get_user_accessible_companies_filter:
-        # Get user's accessible companies filter
-        installation_filter = get_user_accessible_companies_filter(request.user, 'installation')
+        # Get user's accessible maintenance records filter
+        maintenance_filter = get_user_accessible_companies_filter(request.user, 'maintenance')
         
         # Get filter parameters
         breakdown_category_filter = request.GET.get('breakdown_category', '')
@@ -806,7 +806,7 @@ def breakdown_maintenance_report(request):
         
         # Build base queryset for breakdown maintenance only
         base_queryset = MaintenanceRecord.objects.filter(
-            service_followup__installation__in=Installation.objects.filter(installation_filter),
+            maintenance_filter,
             maintenance_type='breakdown'
         ).select_related(
             'service_followup__installation',
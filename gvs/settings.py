@@ -61,6 +61,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.PerformanceInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
@@ -69,6 +70,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.AccessScopeMiddleware",
     "core.middleware.RoleBasedAccessMiddleware",
 ]
 
@@ -180,6 +182,16 @@ EMAIL_HOST_USER = 'shipstore.app@gmail.com'  # Your Gmail address
 EMAIL_HOST_PASSWORD = 'jstz iios mkao qxes'  # Use App Password if 2FA is enabled
 DEFAULT_FROM_EMAIL = 'shipstore.app@gmail.com'  # Your Gmail address
 
+# PDF rendering settings
+# E-posta ve rapor şablonları stillerini satır içi <style> bloklarıyla taşır;
+# burada listelenen CSS dosyaları her belgeye ek olarak uygulanır ve render
+# worker'ı başına bir kez yüklenir.
+PDF_RENDER_STYLESHEETS = []
+# Sıcak render servisi (python manage.py run_pdf_renderer). Unix socket yolu
+# veya 'host:port'; TCP adresleri için PDF_RENDER_SERVICE_AUTHKEY zorunludur.
+# PDF_RENDER_SERVICE_ADDRESS = '/run/gvs/pdf.sock'
+# PDF_RENDER_SERVICE_AUTHKEY = 'change-me'
+
 # Django REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -21,7 +21,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 from django.conf.urls.i18n import set_language
-from core.views import CustomLoginView
+from core.views import CustomLoginView, metrics
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -35,6 +35,7 @@ urlpatterns = [
     path("accounts/reset/done/", auth_views.PasswordResetCompleteView.as_view(), name="password_reset_complete"),
    
     path("core/", include("core.urls")),
+    path("metrics/", metrics, name="metrics"),
     path("", include("dashboard.urls")),
     path('set_language/', set_language, name='set_language'),
     path('item-master/', include('item_master.urls')),
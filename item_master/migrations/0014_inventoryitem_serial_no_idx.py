@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-16 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('item_master', '0013_alter_serviceperiodvalue_value_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['serial_no'], name='inventory_serial_no_idx'),
+        ),
+    ]
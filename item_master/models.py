@@ -386,6 +386,10 @@ class InventoryItem(models.Model):
         verbose_name = 'Stok Ürünü'
         verbose_name_plural = 'Stok Ürünleri'
         ordering = ['name__shortcode', 'serial_no']
+        indexes = [
+            # QR kod / seri no ile kalem bulma
+            models.Index(fields=['serial_no'], name='inventory_serial_no_idx'),
+        ]
 
     def generate_qr_code(self):
         """Generate a QR code and save it to the qr_code_image field"""
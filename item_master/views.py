@@ -6,6 +6,7 @@ from django.core.paginator import Paginator
 from django.db.models import Q, F
 from django.http import JsonResponse
 from django.views.decorators.http import require_GET
+from core.search import search_filter
 from .models import ItemMaster, Category, Brand, StockType, InventoryItem, InventoryItemAttribute, AttributeType, AttributeUnit, AttributeTypeUnit, Status
 
 @require_GET
@@ -55,8 +56,8 @@ def inventory_item_list(request):
         # Distributor users can only see in-use items installed at their sub-companies
         if hasattr(user, 'company') and user.company:
             # Get all companies under this distributor (including the distributor itself)
-            from warranty_and_services.utils import get_user_accessible_companies
-            accessible_company_ids = get_user_accessible_companies(user)
+            from warranty_and_services.utils import get_user_accessible_companies_subquery
+            accessible_company_ids = get_user_accessible_companies_subquery(user)
             
             # Filter items that are in use and installed at accessible companies
             from warranty_and_services.models import Installation
@@ -74,8 +75,8 @@ def inventory_item_list(request):
         # 1. All available items (in_used=False)
         # 2. In-use items installed at their accessible companies
         if hasattr(user, 'company') and user.company:
-            from warranty_and_services.utils import get_user_accessible_companies
-            accessible_company_ids = get_user_accessible_companies(user)
+            from warranty_and_services.utils import get_user_accessible_companies_subquery
+            accessible_company_ids = get_user_accessible_companies_subquery(user)
             
             from warranty_and_services.models import Installation
             # Get in-use items installed at accessible companies
@@ -94,11 +95,7 @@ def inventory_item_list(request):
     
     # Apply search filter
     if search_query:
-        items = items.filter(
-            Q(name__name__icontains=search_query) |
-            Q(name__shortcode__icontains=search_query) |
-            Q(serial_no__icontains=search_query)
-        )
+        items = search_filter(items, search_query)
     
     # Apply category filter
     if category_filter:
@@ -208,8 +205,8 @@ def inventory_item_detail(request, pk):
     user = request.user
     if hasattr(user, 'role') and user.role in ['manager_distributor', 'service_distributor']:
         if hasattr(user, 'company') and user.company:
-            from warranty_and_services.utils import get_user_accessible_companies
-            accessible_company_ids = get_user_accessible_companies(user)
+            from warranty_and_services.utils import get_user_accessible_companies_subquery
+            accessible_company_ids = get_user_accessible_companies_subquery(user)
             
             # Check if this item is installed at any accessible company
             from warranty_and_services.models import Installation
@@ -231,8 +228,8 @@ def inventory_item_detail(request, pk):
         # 2. In-use items installed at accessible companies
         if item.in_used:  # If item is in use, check if it's at accessible company
             if hasattr(user, 'company') and user.company:
-                from warranty_and_services.utils import get_user_accessible_companies
-                accessible_company_ids = get_user_accessible_companies(user)
+                from warranty_and_services.utils import get_user_accessible_companies_subquery
+                accessible_company_ids = get_user_accessible_companies_subquery(user)
                 
                 from warranty_and_services.models import Installation
                 item_installations = Installation.objects.filter(
@@ -267,8 +264,8 @@ def inventory_item_detail(request, pk):
             related_items = InventoryItem.objects.none()  # No items if no company
     elif hasattr(user, 'role') and user.role == 'sales_manager':
         if hasattr(user, 'company') and user.company:
-            from warranty_and_services.utils import get_user_accessible_companies
-            accessible_company_ids = get_user_accessible_companies(user)
+            from warranty_and_services.utils import get_user_accessible_companies_subquery
+            accessible_company_ids = get_user_accessible_companies_subquery(user)
             
             # Filter related items: available items OR in-use items at accessible companies
             from warranty_and_services.models import Installation
@@ -326,11 +323,8 @@ def item_master_list(request):
     
     # Apply search filter
     if search_query:
-        items = items.filter(
-            Q(name__icontains=search_query) |
-            Q(shortcode__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+        # Ad, kısa kod ve açıklama (core.search indeksi)
+        items = search_filter(items, search_query, secondary=True)
     
     # Apply category filter
     if category_filter:
@@ -919,8 +913,8 @@ def inventory_item_update(request, pk):
     user = request.user
     if hasattr(user, 'role') and user.role in ['manager_distributor', 'service_distributor']:
         if hasattr(user, 'company') and user.company:
-            from warranty_and_services.utils import get_user_accessible_companies
-            accessible_company_ids = get_user_accessible_companies(user)
+            from warranty_and_services.utils import get_user_accessible_companies_subquery
+            accessible_company_ids = get_user_accessible_companies_subquery(user)
             
             # Check if this item is installed at any accessible company
             from warranty_and_services.models import Installation
@@ -941,8 +935,8 @@ def inventory_item_update(request, pk):
         # 2. In-use items installed at accessible companies
         if inventory_item.in_used:  # If item is in use, check accessibility
             if hasattr(user, 'company') and user.company:
-                from warranty_and_services.utils import get_user_accessible_companies
-                accessible_company_ids = get_user_accessible_companies(user)
+                from warranty_and_services.utils import get_user_accessible_companies_subquery
+                accessible_company_ids = get_user_accessible_companies_subquery(user)
                 
                 from warranty_and_services.models import Installation
                 item_installations = Installation.objects.filter(
@@ -1089,8 +1083,8 @@ def inventory_item_delete(request, pk):
     user = request.user
     if hasattr(user, 'role') and user.role in ['manager_distributor', 'service_distributor']:
         if hasattr(user, 'company') and user.company:
-            from warranty_and_services.utils import get_user_accessible_companies
-            accessible_company_ids = get_user_accessible_companies(user)
+            from warranty_and_services.utils import get_user_accessible_companies_subquery
+            accessible_company_ids = get_user_accessible_companies_subquery(user)
             
             # Check if this item is installed at any accessible company
             from warranty_and_services.models import Installation
@@ -1111,8 +1105,8 @@ def inventory_item_delete(request, pk):
         # 2. In-use items installed at accessible companies
         if inventory_item.in_used:  # If item is in use, check accessibility
             if hasattr(user, 'company') and user.company:
-                from warranty_and_services.utils import get_user_accessible_companies
-                accessible_company_ids = get_user_accessible_companies(user)
+                from warranty_and_services.utils import get_user_accessible_companies_subquery
+                accessible_company_ids = get_user_accessible_companies_subquery(user)
                 
                 from warranty_and_services.models import Installation
                 item_installations = Installation.objects.filter(
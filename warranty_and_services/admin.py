@@ -6,7 +6,7 @@ from import_export import resources, fields
 from import_export.admin import ImportExportModelAdmin
 from import_export.widgets import ForeignKeyWidget, DateTimeWidget
 from django.utils import timezone
-from .models import Installation, WarrantyFollowUp, ServiceFollowUp, InstallationImage, InstallationDocument, BreakdownReason, BreakdownCategory, MaintenanceRecord
+from .models import Installation, WarrantyFollowUp, ServiceFollowUp, InstallationImage, InstallationDocument, BreakdownReason, BreakdownCategory, MaintenanceRecord, NotificationOutbox, PdfArtifact
 
 class NaiveDateTimeWidget(DateTimeWidget):
     """Custom widget to remove timezone info from datetime objects for Excel export"""
@@ -371,3 +371,24 @@ class MaintenanceRecordAdmin(ImportExportModelAdmin):
         if not obj.technician:
             obj.technician = request.user
         super().save_model(request, obj, form, change)
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at']
+    list_filter = ['kind', 'status']
+    readonly_fields = ['kind', 'installation', 'maintenance_record', 'attempts', 'last_error', 'sent_at', 'created_at', 'updated_at']
+    ordering = ['-created_at']
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', next_attempt_at=timezone.now())
+        self.message_user(request, _('%d notifications re-queued.') % updated)
+    retry_now.short_description = _('Retry selected notifications now')
+
+
+@admin.register(PdfArtifact)
+class PdfArtifactAdmin(admin.ModelAdmin):
+    list_display = ['content_hash', 'size', 'created_at']
+    search_fields = ['content_hash']
+    readonly_fields = ['content_hash', 'file', 'size', 'created_at']
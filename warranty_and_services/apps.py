@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class WarrantyAndServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'warranty_and_services'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,171 @@
+"""
+Takip listelerinin CSV / XLSX dışa aktarımı.
+
+Satırlar ``.iterator(chunk_size=...)`` ile parça parça okunur ve
+``StreamingHttpResponse`` ile gönderilir; tüm liste belleğe alınmaz. XLSX
+için openpyxl'in write-only çalışma kitabı kullanılır (satırlar geçici
+dosyaya yazılır, bellek kullanımı sabittir). XLSX bir zip arşivi olduğundan
+dosya ancak tüm satırlar yazıldıktan sonra kapanır: istemci ilk baytı
+çalışma kitabı tamamlanınca alır, ardından dosya parça parça gönderilir.
+"""
+import csv
+import tempfile
+from datetime import date
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.translation import gettext as _, gettext_lazy
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class Echo:
+    """csv.writer için yazılanı geri döndüren sahte dosya"""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(header, rows):
+    writer = csv.writer(Echo())
+    # Excel'in UTF-8'i tanıması için BOM
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def xlsx_stream(header, rows, title):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=title[:31])
+    worksheet.append(header)
+    for row in rows:
+        cells = []
+        for value in row:
+            if isinstance(value, date):
+                value = WriteOnlyCell(worksheet, value=value)
+                value.number_format = 'DD.MM.YYYY'
+            cells.append(value)
+        worksheet.append(cells)
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(64 * 1024)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_response(file_format, name, header, rows):
+    """Verilen satır üretecini CSV veya XLSX olarak akış halinde döndür"""
+    if file_format not in EXPORT_CONTENT_TYPES:
+        raise Http404(f'Unsupported export format: {file_format}')
+    header = [str(column) for column in header]
+
+    if file_format == 'xlsx':
+        content = xlsx_stream(header, rows, name)
+    else:
+        content = csv_stream(header, rows)
+
+    filename = f'{name}_{timezone.localdate():%Y%m%d}.{file_format}'
+    response = StreamingHttpResponse(content, content_type=EXPORT_CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def chunk_size():
+    return getattr(settings, 'TRACKING_EXPORT_CHUNK_SIZE', 500)
+
+
+# Garanti takip
+
+WARRANTY_EXPORT_HEADER = [
+    gettext_lazy('Customer'), gettext_lazy('Distributor'), gettext_lazy('Product'), gettext_lazy('Serial No'),
+    gettext_lazy('Warranty'), gettext_lazy('Warranty Value'), gettext_lazy('Installation Date'),
+    gettext_lazy('Warranty Expiration'), gettext_lazy('Remaining Days'), gettext_lazy('Status'),
+]
+
+
+def warranty_status(warranty):
+    if warranty is None:
+        return ''
+    if not warranty.is_active:
+        return _('Expired')
+    if warranty.days_remaining <= 30:
+        return _('Expiring Soon')
+    return _('Active')
+
+
+def warranty_export_rows(queryset):
+    for installation in queryset.iterator(chunk_size=chunk_size()):
+        warranty = installation.status.critical_warranty
+        customer = installation.customer
+        yield [
+            customer.name,
+            customer.related_company.name if customer.related_company else '',
+            installation.inventory_item.name.name,
+            installation.inventory_item.serial_no,
+            warranty.get_warranty_type_display() if warranty else '',
+            warranty.warranty_value if warranty else '',
+            installation.setup_date,
+            installation.earliest_warranty_date,
+            warranty.days_remaining if warranty else '',
+            warranty_status(warranty),
+        ]
+
+
+# Servis takip
+
+SERVICE_EXPORT_HEADER = [
+    gettext_lazy('Customer'), gettext_lazy('Distributor'), gettext_lazy('Product'), gettext_lazy('Serial No'),
+    gettext_lazy('Service Type'), gettext_lazy('Service Value'), gettext_lazy('Services'), gettext_lazy('Periodic'), gettext_lazy('Breakdown'),
+    gettext_lazy('Installation Date'), gettext_lazy('Next Service'), gettext_lazy('Status'),
+]
+
+
+def service_status(service, today):
+    if service is None:
+        return ''
+    if service.is_completed:
+        return _('Done')
+    if service.next_service_date is None:
+        return _('Pending')
+    if service.next_service_date <= today:
+        return _('Expired')
+    if (service.next_service_date - today).days <= 7:
+        return _('This Week')
+    return _('Pending')
+
+
+def service_export_rows(queryset, completed=False):
+    today = date.today()
+    for installation in queryset.iterator(chunk_size=chunk_size()):
+        status = installation.status
+        service = status.last_completed_service if completed else status.critical_service
+        customer = installation.customer
+        if service is None:
+            service_date = None
+        else:
+            service_date = service.completed_date if service.is_completed else service.next_service_date
+        yield [
+            customer.name,
+            customer.related_company.name if customer.related_company else '',
+            installation.inventory_item.name.name,
+            installation.inventory_item.serial_no,
+            service.get_service_type_display() if service else '',
+            service.service_value if service else '',
+            status.maintenance_total,
+            status.maintenance_periodic,
+            status.maintenance_breakdown,
+            installation.setup_date,
+            service_date,
+            service_status(service, today),
+        ]
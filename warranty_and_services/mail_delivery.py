@@ -0,0 +1,186 @@
+"""
+Toplu e-posta gönderimi.
+
+Her worker thread tek bir SMTP bağlantısı açar ve kendisine düşen grupların
+mesajlarını bu bağlantı üzerinden gönderir; böylece her mesaj için yeni
+bağlantı açılmaz. Mesajlar tek tek gönderildiği için bir hata yalnızca ilgili
+mesajı başarısız sayar ve gönderilmiş mesajlar tekrar denenmez (neden grup
+başına tek ``send_messages`` çağrısı yapılmadığı için bkz.
+``BatchMailer._send_batch``).
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchResult:
+    """Tek bir grubun gönderim sonucu"""
+    index: int
+    size: int
+    sent: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    error: str = ''
+    failed_messages: list = field(default_factory=list)
+
+    @property
+    def throughput(self):
+        """Saniyede gönderilen mesaj sayısı"""
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class DeliveryReport:
+    """Tüm gönderimin özeti"""
+    batches: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def sent(self):
+        return sum(batch.sent for batch in self.batches)
+
+    @property
+    def failed(self):
+        return sum(batch.failed for batch in self.batches)
+
+    @property
+    def failed_messages(self):
+        return [message for batch in self.batches for message in batch.failed_messages]
+
+    @property
+    def throughput(self):
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class BatchMailer:
+    """
+    Mesajları gruplara bölüp küçük bir thread havuzunda gönderir.
+
+    Args:
+        batch_size: Bir worker'a tek seferde verilen mesaj sayısı
+        concurrency: Aynı anda açık tutulacak SMTP bağlantısı (worker) sayısı
+        backend: Opsiyonel e-posta backend'i (varsayılan: settings.EMAIL_BACKEND)
+    """
+
+    def __init__(self, batch_size=None, concurrency=None, backend=None):
+        self.batch_size = max(1, batch_size or getattr(settings, 'NOTIFICATION_BATCH_SIZE', 50))
+        self.concurrency = max(1, concurrency or getattr(settings, 'NOTIFICATION_CONCURRENCY', 2))
+        self.backend = backend
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _get_connection(self):
+        """Bu thread'e ait bağlantıyı döndür; yoksa aç"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = get_connection(backend=self.backend, fail_silently=False)
+            connection.open()
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _drop_connection(self):
+        """Hatalı bağlantıyı kapat; sonraki grup yeni bağlantı açar"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+            self._local.connection = None
+
+    def _send_batch(self, index, messages):
+        """
+        Grubu aynı bağlantı üzerinden mesaj mesaj gönder. Bir hata yalnızca o
+        mesajı başarısız sayar; daha önce gönderilenler ``failed_messages``
+        listesine girmez (tekrar gönderilmez). Bağlantı açılamazsa kalan
+        mesajların tümü başarısızdır.
+        """
+        result = BatchResult(index=index, size=len(messages))
+        started = time.monotonic()
+        # Grup bilerek tek send_messages([...]) çağrısıyla gönderilmez: Django
+        # backend'leri yalnızca gönderilen mesaj *sayısını* döndürür ve
+        # fail_silently=False iken ilk hatada exception fırlatır; hangi
+        # mesajların SMTP sunucusuna ulaştığı bilinemez. Çağıranlar (outbox,
+        # servis hatırlatma defteri) tam olarak başarısız mesajları yeniden
+        # kuyruğa aldığından bu bilgi gereklidir; aksi halde ya gönderilmiş
+        # mesajlar tekrar gider ya da gönderilmeyenler kaybolur. Asıl maliyet
+        # olan bağlantı kurulumu zaten worker başına bir kezdir; açık
+        # bağlantıda send_messages yeniden bağlanmaz, mesaj başına ek maliyet
+        # yalnızca bir Python çağrısıdır.
+        for position, message in enumerate(messages):
+            try:
+                connection = self._get_connection()
+            except Exception as e:
+                result.error = str(e)
+                result.failed_messages.extend(messages[position:])
+                logger.error(f'Mail batch {index} could not connect: {e}')
+                break
+            try:
+                sent = connection.send_messages([message]) or 0
+            except Exception as e:
+                self._drop_connection()
+                sent = 0
+                result.error = str(e)
+                logger.error(f'Mail batch {index} message {position + 1} failed: {e}')
+            if sent:
+                result.sent += 1
+            else:
+                result.failed_messages.append(message)
+        result.failed = len(result.failed_messages)
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def send(self, messages, on_batch=None):
+        """
+        Mesajları gönder ve DeliveryReport döndür.
+
+        Args:
+            messages: EmailMessage listesi
+            on_batch: Her grup bittiğinde BatchResult ile çağrılır (opsiyonel)
+        """
+        messages = list(messages)
+        batches = [
+            messages[i:i + self.batch_size]
+            for i in range(0, len(messages), self.batch_size)
+        ]
+        report = DeliveryReport()
+        if not batches:
+            return report
+
+        started = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                futures = [
+                    executor.submit(self._send_batch, index, batch)
+                    for index, batch in enumerate(batches, start=1)
+                ]
+                for future in futures:
+                    result = future.result()
+                    report.batches.append(result)
+                    if on_batch:
+                        on_batch(result)
+        finally:
+            self.close()
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def close(self):
+        """Açık tüm bağlantıları kapat"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from warranty_and_services.models import Installation
+from warranty_and_services.pdf import PdfEngine, pdf_engines, render_remote, service_address
+import statistics
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compare cold (fresh engine per document) and warm (preloaded engine) PDF render times'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--documents',
+            type=int,
+            default=20,
+            help='Number of documents to render per mode (default: 20)'
+        )
+        parser.add_argument(
+            '--service',
+            action='store_true',
+            help='Also measure renders through the run_pdf_renderer service'
+        )
+
+    def handle(self, *args, **options):
+        if not pdf_engines.available:
+            raise CommandError('No PDF engine installed (weasyprint or xhtml2pdf required)')
+
+        documents = self.build_documents(options['documents'])
+        if not documents:
+            raise CommandError('No installations found to build sample documents from')
+        self.stdout.write(f'Rendering {len(documents)} documents with {pdf_engines.name}\n')
+
+        # Cold: eski davranış - her belgede fontlar ve stiller baştan yüklenir
+        results = [('cold', self.measure(documents, lambda html: PdfEngine().render(html)))]
+
+        # Warm: tek motor, önceden yüklenmiş
+        engine = PdfEngine().warm_up()
+        results.append(('warm', self.measure(documents, engine.render)))
+
+        if options['service']:
+            if service_address() is None:
+                raise CommandError('PDF_RENDER_SERVICE_ADDRESS is not set')
+            results.append(('service', self.measure(documents, render_remote)))
+
+        cold_mean = statistics.mean(results[0][1])
+        for name, timings in results:
+            mean = statistics.mean(timings)
+            p95 = sorted(timings)[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+            self.stdout.write(
+                f'{name:<8} mean {mean:8.1f} ms  median {statistics.median(timings):8.1f} ms  '
+                f'p95 {p95:8.1f} ms  speedup x{cold_mean / mean:.2f}'
+            )
+
+    def build_documents(self, count):
+        """Örnek belgeler: mevcut kurulumların bildirim içerikleri"""
+        installations = list(Installation.objects.select_related(
+            'customer', 'inventory_item__name', 'user'
+        ).order_by('-id')[:count])
+        if not installations:
+            return []
+        documents = []
+        while len(documents) < count:
+            installation = installations[len(documents) % len(installations)]
+            documents.append(render_to_string(
+                'warranty_and_services/emails/installation_notification.html',
+                {'installation': installation, 'language': 'tr'}
+            ))
+        return documents
+
+    def measure(self, documents, render):
+        """Her belge için render süresi (ms)"""
+        timings = []
+        for html in documents:
+            started = time.perf_counter()
+            render(html)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
@@ -0,0 +1,173 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from datetime import timedelta
+from warranty_and_services.models import NotificationOutbox
+from warranty_and_services.pdf import pdf_renderer
+from warranty_and_services.recipients import recipient_resolver
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued installation/maintenance notifications with retries and backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Number of outbox entries to claim per batch (default: 50)'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=getattr(settings, 'NOTIFICATION_OUTBOX_MAX_ATTEMPTS', 5),
+            help='Give up on an entry after this many failed attempts (default: 5)'
+        )
+        parser.add_argument(
+            '--retry-delay',
+            type=int,
+            default=getattr(settings, 'NOTIFICATION_OUTBOX_RETRY_DELAY', 60),
+            help='Base retry delay in seconds, doubled after each failure (default: 60)'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=900,
+            help='Re-queue entries stuck in processing longer than this many seconds (default: 900)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the outbox instead of exiting when it is empty'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=int,
+            default=10,
+            help='Seconds to wait between polls in --loop mode (default: 10)'
+        )
+        parser.add_argument(
+            '--pdf-workers',
+            type=int,
+            default=None,
+            help='Number of PDF render processes (default: settings.PDF_RENDER_WORKERS or 2)'
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.max_attempts = options['max_attempts']
+        self.retry_delay = options['retry_delay']
+        self.stale_after = options['stale_after']
+        if options['pdf_workers']:
+            pdf_renderer.workers = options['pdf_workers']
+
+        total_sent = 0
+        total_failed = 0
+
+        try:
+            while True:
+                self.requeue_stale_entries()
+                sent, failed = self.process_batch()
+                total_sent += sent
+                total_failed += failed
+
+                if sent or failed:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['sleep'])
+        finally:
+            pdf_renderer.shutdown()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Outbox drained: {total_sent} sent, {total_failed} failed attempts')
+        )
+        stats = recipient_resolver.stats()
+        self.stdout.write(
+            f"Recipient cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)"
+        )
+
+    def requeue_stale_entries(self):
+        """
+        Çöken bir worker'ın bıraktığı 'processing' kayıtlarını tekrar kuyruğa al.
+        Her seferinde bir deneme sayılır; worker'ı her seferinde çökerten bir
+        kayıt deneme hakkı bitince 'failed' olur ve sonsuza dek denenmez.
+        """
+        now = timezone.now()
+        stale = NotificationOutbox.objects.filter(
+            status='processing',
+            updated_at__lt=now - timedelta(seconds=self.stale_after)
+        )
+        error = f'Worker stopped while processing (stale for more than {self.stale_after}s)'
+        given_up = stale.filter(attempts__gte=self.max_attempts - 1).update(
+            status='failed', attempts=F('attempts') + 1, last_error=error, updated_at=now
+        )
+        requeued = stale.update(
+            status='pending', attempts=F('attempts') + 1, last_error=error, updated_at=now
+        )
+        if requeued:
+            logger.warning(f'Re-queued {requeued} stale outbox entries')
+        if given_up:
+            logger.error(f'Gave up on {given_up} outbox entries that were stale {self.max_attempts} times')
+
+    def process_batch(self):
+        """Bir grup bekleyen kaydı sahiplen ve gönder"""
+        due_ids = list(
+            NotificationOutbox.objects.filter(
+                status='pending',
+                next_attempt_at__lte=timezone.now()
+            ).order_by('next_attempt_at').values_list('id', flat=True)[:self.batch_size]
+        )
+
+        sent = 0
+        failed = 0
+        prepared = []
+
+        for entry_id in due_ids:
+            # Claim the entry; another worker may have taken it in the meantime
+            claimed = NotificationOutbox.objects.filter(
+                pk=entry_id, status='pending'
+            ).update(status='processing', updated_at=timezone.now())
+            if not claimed:
+                continue
+
+            entry = NotificationOutbox.objects.select_related(
+                'installation', 'maintenance_record'
+            ).get(pk=entry_id)
+
+            try:
+                prepared.append((entry, entry.prepare()))
+            except Exception as e:
+                self.fail(entry, e)
+                failed += 1
+
+        # Gruptaki tüm PDF'leri aynı anda render etmeye başla; gönderim
+        # sırasında sadece sonuçlar beklenir
+        pdf_renderer.prefetch(
+            notification['pdf_html'] for entry, notification in prepared if notification['recipients']
+        )
+
+        for entry, notification in prepared:
+            try:
+                entry.deliver(notification)
+            except Exception as e:
+                self.fail(entry, e)
+                failed += 1
+            else:
+                entry.mark_sent()
+                sent += 1
+                self.stdout.write(f'Sent {entry}')
+
+        return sent, failed
+
+    def fail(self, entry, error):
+        entry.mark_failed(error, self.max_attempts, self.retry_delay)
+        logger.error(f'Outbox entry {entry.id} failed (attempt {entry.attempts}): {error}')
+        self.stdout.write(
+            self.style.ERROR(f'Entry {entry.id} failed (attempt {entry.attempts}/{self.max_attempts}): {error}')
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from warranty_and_services.models import Installation, InstallationStatus
+from warranty_and_services.stats import invalidate_tracking_stats
+import time
+
+
+class Command(BaseCommand):
+    help = 'Recompute the InstallationStatus snapshot table from follow-ups and maintenance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of status rows written per bulk upsert (default: 500)'
+        )
+        parser.add_argument(
+            '--installation',
+            type=int,
+            action='append',
+            dest='installation_ids',
+            help='Only rebuild the given installation id (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        queryset = Installation.objects.all()
+        if options['installation_ids']:
+            queryset = queryset.filter(pk__in=options['installation_ids'])
+
+        started = time.monotonic()
+        with transaction.atomic():
+            count = InstallationStatus.rebuild(queryset, batch_size=options['batch_size'])
+        invalidate_tracking_stats()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {count} installation status rows in {time.monotonic() - started:.2f}s')
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from warranty_and_services.recalculation import recalculate_followup_dates
+import time
+
+
+class Command(BaseCommand):
+    help = 'Recompute working-hours based warranty end dates and open service dates from current customer working hours'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of installations processed per batch (default: 500)'
+        )
+        parser.add_argument(
+            '--customer',
+            type=int,
+            action='append',
+            dest='customer_ids',
+            help='Only recalculate the given customer id (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        warranty_count, service_count = recalculate_followup_dates(
+            options['customer_ids'], batch_size=options['batch_size']
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Updated {warranty_count} warranty and {service_count} service follow-ups '
+                f'in {time.monotonic() - started:.2f}s'
+            )
+        )
@@ -0,0 +1,113 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from multiprocessing.connection import Listener
+from warranty_and_services.pdf import PdfEngine, pdf_engines, service_address, service_authkey
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run a long-lived PDF render service with fonts and stylesheets preloaded'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address',
+            type=str,
+            default=None,
+            help="Listen address, 'host:port' or a Unix socket path (default: settings.PDF_RENDER_SERVICE_ADDRESS)"
+        )
+        parser.add_argument(
+            '--stylesheet',
+            action='append',
+            dest='stylesheets',
+            default=None,
+            help='CSS file to preload and apply to every document (repeatable, default: settings.PDF_RENDER_STYLESHEETS)'
+        )
+
+    def handle(self, *args, **options):
+        if not pdf_engines.available:
+            raise CommandError('No PDF engine installed (weasyprint or xhtml2pdf required)')
+
+        address = service_address(options['address'])
+        if address is None:
+            raise CommandError('No address given; use --address or set PDF_RENDER_SERVICE_ADDRESS')
+        try:
+            authkey = service_authkey(address)
+        except ImproperlyConfigured as e:
+            # İstekler unpickle edilir: anahtarsız TCP (özellikle loopback dışı) dinlenmez
+            raise CommandError(str(e))
+
+        started = time.monotonic()
+        self.engine = PdfEngine(stylesheets=options['stylesheets']).warm_up()
+        self.lock = threading.Lock()
+        self.stdout.write(
+            f'{pdf_engines.name} engine loaded with {len(self.engine.stylesheets)} stylesheet(s) '
+            f'in {(time.monotonic() - started) * 1000:.0f} ms'
+        )
+
+        if isinstance(address, str) and os.path.exists(address):
+            os.unlink(address)
+
+        with self.listen(address, authkey) as listener:
+            self.stdout.write(self.style.SUCCESS(f'PDF render service listening on {listener.address}'))
+            try:
+                while True:
+                    try:
+                        connection = listener.accept()
+                    except Exception as e:
+                        # Yanlış authkey vb. - servisi durdurma
+                        logger.warning(f'Rejected PDF render connection: {e}')
+                        continue
+                    threading.Thread(target=self.serve, args=(connection,), daemon=True).start()
+            except KeyboardInterrupt:
+                self.stdout.write(f'Stopping, {self.engine.rendered} documents rendered')
+
+    def listen(self, address, authkey):
+        """
+        Unix socket, umask ile baştan 0600 izinle oluşturulur: bind edildiği an
+        yalnızca servisi çalıştıran kullanıcı bağlanabilir (sonradan chmod
+        edilene kadar herkese açık kalmaz).
+        """
+        if not isinstance(address, str):
+            return Listener(address, authkey=authkey)
+        previous_umask = os.umask(0o177)
+        try:
+            return Listener(address, authkey=authkey)
+        finally:
+            os.umask(previous_umask)
+
+    def serve(self, connection):
+        """Bir istemci bağlantısındaki istekleri cevapla"""
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    return
+
+                command = request[0] if isinstance(request, tuple) and request else None
+                if command == 'render':
+                    started = time.monotonic()
+                    try:
+                        # Motor tek; render işleri sırayla yapılır
+                        with self.lock:
+                            pdf_content = self.engine.render(request[1])
+                    except Exception as e:
+                        logger.error(f'PDF render failed: {e}')
+                        response = ('error', str(e))
+                    else:
+                        response = ('ok', pdf_content)
+                        logger.info(f'Rendered PDF ({len(pdf_content or b"")} bytes) in {(time.monotonic() - started) * 1000:.0f} ms')
+                elif command == 'ping':
+                    response = ('ok', {'engine': pdf_engines.name, 'rendered': self.engine.rendered})
+                else:
+                    response = ('error', f'Unknown command: {command}')
+
+                try:
+                    connection.send(response)
+                except (EOFError, OSError):
+                    return
@@ -1,11 +1,14 @@
 from django.core.management.base import BaseCommand
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
+from django.db.models import Case, IntegerField, Value, When
 from django.utils import timezone
-from datetime import datetime, timedelta
-from warranty_and_services.models import Installation
+from datetime import timedelta
+from warranty_and_services.models import ServiceFollowUp, SentServiceNotification
+from warranty_and_services.mail_delivery import BatchMailer
 from django.conf import settings
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -25,75 +28,386 @@ class Command(BaseCommand):
             action='store_true',
             help='Only show which notifications would be sent, without actually sending them'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'NOTIFICATION_BATCH_SIZE', 50),
+            help='Number of emails handed to an SMTP worker at a time (default: 50)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=getattr(settings, 'NOTIFICATION_CONCURRENCY', 2),
+            help='Number of parallel SMTP connections (default: 2)'
+        )
+        parser.add_argument(
+            '--digest',
+            action='store_true',
+            help='Send one summary email per recipient listing all of their due services'
+        )
 
     def handle(self, *args, **options):
         days_list = options['days']
         dry_run = options['dry_run']
+        digest = options['digest']
         
         self.stdout.write(
             self.style.SUCCESS(f'Starting service due notifications for {days_list} days...')
         )
         
-        total_sent = 0
+        candidates = self.get_due_candidates(days_list)
+        if not candidates:
+            self.stdout.write(self.style.SUCCESS('No unsent service reminders for the selected windows'))
+            return
+        
+        if dry_run:
+            self.report_dry_run(candidates, days_list, digest)
+            return
+        
+        run_id = uuid.uuid4().hex
+        deliveries = self.claim_notifications(candidates, run_id)
+        
+        if digest:
+            messages = self.build_digest_notifications(deliveries)
+        else:
+            messages = self.build_notifications(deliveries, days_list)
+        self.release_unbuilt_notifications(deliveries, messages, run_id)
+        
+        mailer = BatchMailer(
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency']
+        )
+        report = mailer.send(messages, on_batch=self.report_batch)
+        
+        if report.failed_messages:
+            self.release_notifications(report.failed_messages, run_id)
         
-        for days in days_list:
-            sent_count = self.send_notifications_for_days(days, dry_run)
-            total_sent += sent_count
-            
         self.stdout.write(
-            self.style.SUCCESS(f'Total notifications sent: {total_sent}')
+            self.style.SUCCESS(
+                f'Total notifications sent: {report.sent} '
+                f'({report.failed} failed, {report.throughput:.1f} msg/s over {report.elapsed:.2f}s)'
+            )
         )
 
-    def send_notifications_for_days(self, days_before, dry_run=False):
-        """Send notifications for installations due in specified days"""
+    def report_batch(self, result):
+        """Print per-batch throughput and failures"""
+        line = (
+            f'Batch {result.index}: {result.sent}/{result.size} sent in {result.elapsed:.2f}s '
+            f'({result.throughput:.1f} msg/s)'
+        )
+        if result.failed:
+            self.stdout.write(self.style.ERROR(f'{line} - {result.failed} failed: {result.error}'))
+        else:
+            self.stdout.write(line)
+
+    def get_due_candidates(self, days_list):
+        """
+        Return (installation, service_followup, days_before) tuples for every window at once.
         
+        A single query selects the open follow-ups due on any of the target dates,
+        with the installation, customer, related manager and item joined in and
+        contact persons prefetched, so the query count does not depend on how
+        many installations are due. A second query loads their ledger rows:
+        recipients that already got the reminder for a window are kept on the
+        follow-up (``sent_recipients``) and follow-ups with nobody left to
+        notify are dropped, so a rerun on the same day sends nothing while a
+        recipient whose email failed is picked up again.
+        """
         today = timezone.now().date()
-        target_date = today + timedelta(days=days_before)
-        
-        # Get installations with service due on target date
-        installations = Installation.objects.filter(
-            service_followups__next_service_date=target_date,
-            service_followups__is_completed=False
-        ).distinct().select_related(
-            'customer',
-            'inventory_item__name',
-            'customer__related_manager'
+        target_dates = {today + timedelta(days=days): days for days in days_list}
+        
+        notification_window = Case(
+            *[When(next_service_date=target_date, then=Value(days)) for target_date, days in target_dates.items()],
+            output_field=IntegerField()
         )
         
-        sent_count = 0
+        followups = list(ServiceFollowUp.objects.filter(
+            next_service_date__in=list(target_dates),
+            is_completed=False
+        ).annotate(
+            notification_window=notification_window
+        ).select_related(
+            'installation__customer__related_manager',
+            'installation__inventory_item__name__category'
+        ).prefetch_related(
+            'installation__customer__contact_persons'
+        ).order_by('next_service_date', 'installation_id', 'id'))
         
-        for installation in installations:
+        sent = {}
+        ledger = SentServiceNotification.objects.filter(
+            service_followup_id__in=[followup.id for followup in followups],
+            window__in=list(target_dates.values())
+        ).values_list('service_followup_id', 'window', 'recipient')
+        for followup_id, window, recipient in ledger:
+            sent.setdefault((followup_id, window), set()).add(recipient)
+        
+        candidates = []
+        primary = {}
+        for followup in followups:
+            days_before = followup.notification_window
+            # One notification per installation and window; it covers every
+            # follow-up of that installation due on the same day
+            key = (followup.installation_id, days_before)
+            if key in primary:
+                primary[key].covered_followup_ids.append(followup.id)
+                continue
+            followup.covered_followup_ids = [followup.id]
+            followup.sent_recipients = sent.get((followup.id, days_before), set())
+            primary[key] = followup
+            candidates.append((followup.installation, followup, days_before))
+        
+        return [
+            (installation, followup, days_before)
+            for installation, followup, days_before in candidates
+            if not followup.sent_recipients or self.get_pending_recipients(installation, followup)
+        ]
+
+    def get_recipients(self, installation):
+        """Customer email, customer's related manager and contact persons"""
+        recipients = set()
+        
+        # Add customer contact email
+        if installation.customer.email:
+            recipients.add(installation.customer.email)
+        
+        # Add related manager email
+        if installation.customer.related_manager and installation.customer.related_manager.email:
+            recipients.add(installation.customer.related_manager.email)
+        
+        # Add customer contacts
+        for contact in installation.customer.contact_persons.all():
+            if contact.email:
+                recipients.add(contact.email)
+        
+        return recipients
+
+    def get_pending_recipients(self, installation, service_followup):
+        """Recipients that have not received this follow-up's reminder for its window yet"""
+        return self.get_recipients(installation) - service_followup.sent_recipients
+
+    def claim_notifications(self, candidates, run_id):
+        """
+        Record ledger rows for every (candidate, recipient) pair before sending.
+        
+        Rows that another (overlapping) run already inserted are ignored by the
+        unique constraint. Returns (installation, service_followup, days_before,
+        recipients) deliveries holding only the recipients claimed by this run.
+        """
+        wanted = []
+        for installation, service_followup, days_before in candidates:
+            recipients = self.get_pending_recipients(installation, service_followup)
+            if not recipients:
+                logger.warning(f'No email recipients found for installation {installation.id}')
+                continue
+            wanted.append((installation, service_followup, days_before, recipients))
+        
+        SentServiceNotification.objects.bulk_create(
+            [
+                SentServiceNotification(
+                    service_followup_id=followup_id,
+                    window=days_before,
+                    recipient=recipient,
+                    run_id=run_id
+                )
+                for installation, service_followup, days_before, recipients in wanted
+                for followup_id in service_followup.covered_followup_ids
+                for recipient in recipients
+            ],
+            ignore_conflicts=True
+        )
+        claimed = set(
+            SentServiceNotification.objects.filter(run_id=run_id).values_list(
+                'service_followup_id', 'window', 'recipient'
+            )
+        )
+        
+        deliveries = []
+        for installation, service_followup, days_before, recipients in wanted:
+            recipients = sorted(
+                recipient for recipient in recipients
+                if (service_followup.id, days_before, recipient) in claimed
+            )
+            if recipients:
+                deliveries.append((installation, service_followup, days_before, recipients))
+        
+        skipped = len(wanted) - len(deliveries)
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'Skipped {skipped} notifications already claimed by another run'))
+        
+        # Ledger rows behind each email, used to release them if sending fails
+        self.ledger_keys = {}
+        return deliveries
+
+    def release_notifications(self, failed_messages, run_id):
+        """Remove this run's ledger rows for emails that could not be sent so a retry picks them up"""
+        for email in failed_messages:
+            for followup_ids, days_before in self.ledger_keys[id(email)]:
+                SentServiceNotification.objects.filter(
+                    run_id=run_id,
+                    service_followup_id__in=followup_ids,
+                    window=days_before,
+                    recipient__in=email.to
+                ).delete()
+        self.stdout.write(self.style.WARNING(f'Released {len(failed_messages)} failed notifications for retry'))
+
+    def release_unbuilt_notifications(self, deliveries, messages, run_id):
+        """
+        Remove this run's ledger rows that no prepared email covers.
+        
+        Claims are written for every delivery before the emails are built; if
+        building one fails it is never sent, and leaving its rows in place would
+        suppress the reminder for good.
+        """
+        covered = {
+            (followup_id, days_before, recipient)
+            for email in messages
+            for followup_ids, days_before in self.ledger_keys[id(email)]
+            for followup_id in followup_ids
+            for recipient in email.to
+        }
+        unbuilt = {}
+        for installation, service_followup, days_before, recipients in deliveries:
+            for followup_id in service_followup.covered_followup_ids:
+                for recipient in recipients:
+                    if (followup_id, days_before, recipient) not in covered:
+                        unbuilt.setdefault((days_before, recipient), []).append(followup_id)
+        
+        for (days_before, recipient), followup_ids in unbuilt.items():
+            SentServiceNotification.objects.filter(
+                run_id=run_id,
+                service_followup_id__in=followup_ids,
+                window=days_before,
+                recipient=recipient
+            ).delete()
+        if unbuilt:
+            self.stdout.write(
+                self.style.WARNING(f'Released {len(unbuilt)} notifications that could not be prepared')
+            )
+
+    def report_dry_run(self, candidates, days_list, digest=False):
+        """Show which notifications would be sent without claiming or sending anything"""
+        per_window = {days: 0 for days in days_list}
+        per_recipient = {}
+        
+        for installation, service_followup, days_before in candidates:
+            recipients = self.get_pending_recipients(installation, service_followup)
+            if not recipients:
+                continue
+            per_window[days_before] += 1
+            for recipient in recipients:
+                per_recipient[recipient] = per_recipient.get(recipient, 0) + 1
+            if not digest:
+                self.stdout.write(
+                    f'Would send notification for: {installation.customer.name} - '
+                    f'{installation.inventory_item.name.name} (Serial: {installation.inventory_item.serial_no}) - '
+                    f'Service due: {service_followup.next_service_date}'
+                )
+        
+        if digest:
+            for recipient, count in sorted(per_recipient.items()):
+                self.stdout.write(f'Would send digest to {recipient} with {count} due services')
+            total = len(per_recipient)
+        else:
+            for days_before, count in per_window.items():
+                self.stdout.write(
+                    self.style.WARNING(f'Would send {count} notifications for services due in {days_before} days (DRY RUN)')
+                )
+            total = sum(per_window.values())
+        
+        self.stdout.write(
+            self.style.WARNING(f'Total notifications that would be sent: {total} (DRY RUN)')
+        )
+
+    def build_notifications(self, deliveries, days_list):
+        """Build one email per installation and window"""
+        messages = []
+        prepared_per_window = {days: 0 for days in days_list}
+        
+        for installation, service_followup, days_before, recipients in deliveries:
             try:
-                if dry_run:
-                    self.stdout.write(
-                        f'Would send notification for: {installation.customer.name} - '
-                        f'{installation.inventory_item.item_master.name} (Serial: {installation.inventory_item.serial_number}) - '
-                        f'Service due: {installation.next_service_date}'
-                    )
-                    sent_count += 1
-                else:
-                    if self.send_service_notification(installation, days_before):
-                        sent_count += 1
+                email = self.build_service_notification(installation, service_followup, days_before, recipients)
+                if email:
+                    self.ledger_keys[id(email)] = [(service_followup.covered_followup_ids, days_before)]
+                    messages.append(email)
+                    prepared_per_window[days_before] += 1
                         
             except Exception as e:
-                logger.error(f'Error sending notification for installation {installation.id}: {str(e)}')
+                logger.error(f'Error preparing notification for installation {installation.id}: {str(e)}')
                 self.stdout.write(
-                    self.style.ERROR(f'Error sending notification for installation {installation.id}: {str(e)}')
+                    self.style.ERROR(f'Error preparing notification for installation {installation.id}: {str(e)}')
                 )
         
-        if not dry_run:
-            self.stdout.write(
-                self.style.SUCCESS(f'Sent {sent_count} notifications for services due in {days_before} days')
-            )
-        else:
+        for days_before, count in prepared_per_window.items():
             self.stdout.write(
-                self.style.WARNING(f'Would send {sent_count} notifications for services due in {days_before} days (DRY RUN)')
+                self.style.SUCCESS(f'Prepared {count} notifications for services due in {days_before} days')
             )
             
-        return sent_count
+        return messages
 
-    def send_service_notification(self, installation, days_before):
-        """Send service due notification email"""
+    def build_digest_notifications(self, deliveries):
+        """
+        Build one summary email per recipient listing all of their due services.
+        Recipients such as related managers receive a single table instead of
+        one email per installation and window.
+        """
+        items_per_recipient = {}
+        for installation, service_followup, days_before, recipients in deliveries:
+            for recipient in recipients:
+                items_per_recipient.setdefault(recipient, []).append((installation, service_followup, days_before))
+        
+        messages = []
+        today = timezone.localtime()
+        
+        for recipient, items in items_per_recipient.items():
+            try:
+                items.sort(key=lambda entry: (entry[2], entry[0].customer.name))
+                context = {
+                    'items': [
+                        {
+                            'installation': installation,
+                            'customer': installation.customer,
+                            'item': installation.inventory_item.name,
+                            'inventory_item': installation.inventory_item,
+                            'days_before': days_before,
+                            'service_date': service_followup.next_service_date,
+                            'priority': self.get_service_priority_text(days_before),
+                        }
+                        for installation, service_followup, days_before in items
+                    ],
+                    'today': today,
+                }
+                subject = f'Servis Zamanı Özeti - {len(items)} ekipman'
+                
+                html_content = render_to_string('warranty_and_services/emails/service_due_digest.html', context)
+                text_content = render_to_string('warranty_and_services/emails/service_due_digest.txt', context)
+                
+                email = EmailMultiAlternatives(
+                    subject=subject,
+                    body=text_content,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[recipient],
+                )
+                email.attach_alternative(html_content, "text/html")
+                
+                self.ledger_keys[id(email)] = [
+                    (service_followup.covered_followup_ids, days_before)
+                    for installation, service_followup, days_before in items
+                ]
+                messages.append(email)
+                
+            except Exception as e:
+                logger.error(f'Error building service digest for {recipient}: {str(e)}')
+                self.stdout.write(
+                    self.style.ERROR(f'Error building service digest for {recipient}: {str(e)}')
+                )
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Prepared {len(messages)} digest emails covering {len(deliveries)} due services')
+        )
+        return messages
+
+    def build_service_notification(self, installation, service_followup, days_before, recipients):
+        """Build service due notification email (sent later in batches)"""
         
         try:
             # Determine notification type
@@ -113,30 +427,6 @@ class Command(BaseCommand):
                 notification_type = 'custom'
                 subject_prefix = f'{days_before} GÜN KALDI'
 
-            # Email recipients
-            recipients = []
-            
-            # Add customer contact email
-            if installation.customer.email:
-                recipients.append(installation.customer.email)
-            
-            # Add related manager email
-            if installation.customer.related_manager and installation.customer.related_manager.email:
-                recipients.append(installation.customer.related_manager.email)
-            
-            # Add customer contacts  
-            if hasattr(installation.customer, 'contact_persons'):
-                for contact in installation.customer.contact_persons.all():
-                    if contact.email:
-                        recipients.append(contact.email)
-            
-            if not recipients:
-                logger.warning(f'No email recipients found for installation {installation.id}')
-                return False
-            
-            # Remove duplicates
-            recipients = list(set(recipients))
-            
             # Email subject
             subject = f'{subject_prefix} - Servis Zamanı: {installation.customer.name} - {installation.inventory_item.name.name}'
             
@@ -148,15 +438,15 @@ class Command(BaseCommand):
                 'inventory_item': installation.inventory_item,
                 'days_before': days_before,
                 'notification_type': notification_type,
-                'service_date': self.get_next_service_date(installation),
-                'today': timezone.now().date(),
+                'service_date': service_followup.next_service_date,
+                'today': timezone.localtime(),
             }
             
             # Render email templates
             html_content = render_to_string('warranty_and_services/emails/service_due_notification.html', context)
             text_content = render_to_string('warranty_and_services/emails/service_due_notification.txt', context)
             
-            # Create and send email
+            # Create email
             email = EmailMultiAlternatives(
                 subject=subject,
                 body=text_content,
@@ -165,20 +455,13 @@ class Command(BaseCommand):
             )
             email.attach_alternative(html_content, "text/html")
             
-            email.send()
+            logger.info(f'Service notification prepared for installation {installation.id} to {recipients}')
             
-            logger.info(f'Service notification sent for installation {installation.id} to {recipients}')
-            
-            return True
+            return email
             
         except Exception as e:
-            logger.error(f'Error sending service notification for installation {installation.id}: {str(e)}')
-            return False
-
-    def get_next_service_date(self, installation):
-        """Get the next service date for an installation"""
-        service_followup = installation.service_followups.filter(is_completed=False).order_by('next_service_date').first()
-        return service_followup.next_service_date if service_followup else None
+            logger.error(f'Error building service notification for installation {installation.id}: {str(e)}')
+            return None
 
     def get_service_priority_text(self, days_before):
         """Get priority text based on days before service due"""
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-16 20:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warranty_and_services', '0016_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentServiceNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.IntegerField(help_text='Days before the service date the reminder was sent for', verbose_name='Notification Window')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='Recipient')),
+                ('run_id', models.CharField(db_index=True, help_text='Command run that claimed this notification', max_length=32, verbose_name='Run ID')),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('service_followup', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sent_notifications', to='warranty_and_services.servicefollowup', verbose_name='Service Follow-Up')),
+            ],
+            options={
+                'verbose_name': 'Sent Service Notification',
+                'verbose_name_plural': 'Sent Service Notifications',
+                'ordering': ['-sent_at'],
+                'unique_together': {('service_followup', 'window', 'recipient')},
+            },
+        ),
+    ]
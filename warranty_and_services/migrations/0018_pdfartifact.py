@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-16 20:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warranty_and_services', '0017_sentservicenotification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PdfArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='Content Hash')),
+                ('file', models.FileField(upload_to='pdf_artifacts/', verbose_name='PDF File')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='File Size (bytes)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'PDF Artifact',
+                'verbose_name_plural': 'PDF Artifacts',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
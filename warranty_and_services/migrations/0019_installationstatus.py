@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-16 20:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_installation_status(apps, schema_editor):
+    from warranty_and_services.models import InstallationStatus
+    InstallationStatus.rebuild(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warranty_and_services', '0018_pdfartifact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstallationStatus',
+            fields=[
+                ('installation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='status', serialize=False, to='warranty_and_services.installation', verbose_name='Installation')),
+                ('earliest_warranty_end', models.DateField(blank=True, db_index=True, null=True, verbose_name='Earliest Warranty End')),
+                ('latest_warranty_end', models.DateField(blank=True, null=True, verbose_name='Latest Warranty End')),
+                ('next_service_date', models.DateField(blank=True, db_index=True, null=True, verbose_name='Next Service Date')),
+                ('last_completed_date', models.DateField(blank=True, db_index=True, null=True, verbose_name='Last Completed Service Date')),
+                ('maintenance_total', models.PositiveIntegerField(default=0, verbose_name='Total Maintenances')),
+                ('maintenance_periodic', models.PositiveIntegerField(default=0, verbose_name='Periodic Maintenances')),
+                ('maintenance_breakdown', models.PositiveIntegerField(default=0, verbose_name='Breakdown Maintenances')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('critical_service', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='warranty_and_services.servicefollowup', verbose_name='Next Open Service')),
+                ('critical_warranty', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='warranty_and_services.warrantyfollowup', verbose_name='Critical Warranty')),
+                ('last_completed_service', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='warranty_and_services.servicefollowup', verbose_name='Last Completed Service')),
+            ],
+            options={
+                'verbose_name': 'Installation Status',
+                'verbose_name_plural': 'Installation Statuses',
+            },
+        ),
+        migrations.RunPython(populate_installation_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-16 21:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warranty_and_services', '0019_installationstatus'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenancerecord',
+            index=models.Index(fields=['maintenance_type', 'service_date'], name='maintenance_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicefollowup',
+            index=models.Index(fields=['installation', 'is_completed', 'next_service_date'], name='service_inst_open_next_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicefollowup',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['next_service_date'], name='service_open_next_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warrantyfollowup',
+            index=models.Index(fields=['end_of_warranty_date'], name='warranty_end_date_idx'),
+        ),
+    ]
@@ -9,25 +9,33 @@ import os
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
-from io import BytesIO
-
-# PDF generation import with fallback
-try:
-    from weasyprint import HTML
-    PDF_AVAILABLE = True
-    PDF_ENGINE = 'weasyprint'
-except ImportError:
-    try:
-        from xhtml2pdf import pisa
-        PDF_AVAILABLE = True
-        PDF_ENGINE = 'xhtml2pdf'
-    except ImportError:
-        PDF_AVAILABLE = False
-        PDF_ENGINE = None
+from .recipients import recipient_resolver
+from .pdf import pdf_renderer
+from .tracking import DirtyFieldsMixin
 
 User = get_user_model()
 
 
+def send_notification_email(notification, pdf_content=None):
+    """
+    Hazırlanmış bildirimi (prepare_*_notification çıktısı) gönder.
+    PDF içeriği verilmişse ek olarak eklenir.
+    """
+    email = EmailMultiAlternatives(
+        notification['subject'],
+        notification['html_content'],
+        settings.DEFAULT_FROM_EMAIL,
+        list(notification['recipients'])
+    )
+    email.attach_alternative(notification['html_content'], "text/html")
+    
+    # PDF attachment - only if PDF was generated successfully
+    if pdf_content:
+        email.attach(notification['pdf_filename'], pdf_content, 'application/pdf')
+    
+    email.send()
+
+
 def installation_image_upload_path(instance, filename):
     """Generate upload path for installation images"""
     customer_name = instance.installation.customer.name.replace(' ', '_').replace('/', '_')
@@ -60,10 +68,14 @@ def installation_document_upload_path(instance, filename):
     return f'installations/{installation_id}/documents/{new_filename}'
 
 
-class Installation(models.Model):
+class Installation(DirtyFieldsMixin, models.Model):
     """
     Model for tracking equipment installations at customer locations.
     """
+    # Bu alanlardan biri değişirse kurulum bildirimi tekrar gönderilir
+    # (ör. sadece installation_notes değiştiğinde gönderilmez)
+    NOTIFY_ON_CHANGE = ['user', 'setup_date', 'inventory_item', 'customer']
+
     user = models.ForeignKey(
         User,
         on_delete=models.PROTECT,
@@ -126,7 +138,8 @@ class Installation(models.Model):
         date_str = self.setup_date.strftime('%d.%m.%Y') if self.setup_date else 'N/A'
         return f"{self.inventory_item} - {self.customer.name} ({date_str})"
 
-    def send_installation_notification(self):
+    def prepare_installation_notification(self):
+        """Kurulum bildiriminin içeriğini hazırla (PDF üretimi ve gönderim yapmaz)"""
         language = 'tr' if self.customer and self.customer.company_type == 'enduser' and self.customer.name.endswith('A.Ş.') else 'en'
         
         # Collect all warranty and service data for PDF
@@ -153,100 +166,77 @@ class Installation(models.Model):
         }
         subject = 'Kurulum Tamamlandı' if language == 'tr' else 'Installation Completed'
         html_content = render_to_string('warranty_and_services/emails/installation_notification.html', context)
-        from_email = settings.DEFAULT_FROM_EMAIL
-        # PDF oluştur
-        pdf_buffer = BytesIO()
         
-        if PDF_ENGINE == 'xhtml2pdf':
-            try:
-                from xhtml2pdf import pisa
-                pisa_status = pisa.CreatePDF(html_content, dest=pdf_buffer)
-                pdf_buffer.seek(0)
-            except ImportError:
-                print("xhtml2pdf not available, skipping PDF generation")
-                pdf_buffer = None
-        elif PDF_ENGINE == 'weasyprint':
-            try:
-                from weasyprint import HTML
-                HTML(string=html_content).write_pdf(pdf_buffer)
-                pdf_buffer.seek(0)
-            except ImportError:
-                print("weasyprint not available, skipping PDF generation")
-                pdf_buffer = None
-        else:
-            print("No PDF engine available, skipping PDF generation")
-            pdf_buffer = None
-        # Alıcıları topla
-        recipients = set()
-        if self.customer and self.customer.email:
-            recipients.add(self.customer.email)
-        # ContactPerson
-        if hasattr(self.customer, 'contact_persons'):
-            for contact in self.customer.contact_persons.all():
-                if contact.email:
-                    recipients.add(contact.email)
-        # Kurulum yapan kullanıcı
-        if self.user and self.user.email:
-            recipients.add(self.user.email)
-        # Kurulum yapan firmanın manager ve servis personeli
-        if self.user.company:
-            for u in self.user.company.customuser_set.filter(role__in=[
-                'manager_main', 'salesmanager_main', 'service_main',
-                'manager_distributor', 'salesmanager_distributor', 'service_distributor']):
-                if u.email:
-                    recipients.add(u.email)
-            # Related manager
-            if self.user.company.related_manager and self.user.company.related_manager.email:
-                recipients.add(self.user.company.related_manager.email)
+        return {
+            'subject': subject,
+            'html_content': html_content,
+            # Alıcılar: müşteri + iletişim kişileri, kurulumcu ve firmasının
+            # yönetici/servis personeli + related manager (firma bazında cache'li)
+            'recipients': recipient_resolver.for_installation(self),
+            # PDF, e-posta içeriğinden üretilir
+            'pdf_html': html_content,
+            'pdf_filename': 'installation_details.pdf',
+        }
+
+    def send_installation_notification(self, fail_silently=True):
+        notification = self.prepare_installation_notification()
+        # PDF oluştur (process havuzunda, içerik özetine göre cache'li)
+        pdf_content = pdf_renderer.render(notification['pdf_html'])
         # Mail gönder
         try:
-            email = EmailMultiAlternatives(
-                subject,
-                html_content,
-                from_email,
-                list(recipients)
-            )
-            email.attach_alternative(html_content, "text/html")
-            
-            # PDF attachment - only if PDF was generated successfully
-            if pdf_buffer:
-                email.attach('installation_details.pdf', pdf_buffer.read(), 'application/pdf')
-            
-            email.send()
+            send_notification_email(notification, pdf_content)
         except Exception as e:
             print(f"Kurulum bildirimi gönderilemedi: {e}")
+            if not fail_silently:
+                raise
 
     def save(self, *args, **kwargs):
         """Mark inventory item as in use when installation is saved"""
-        # Handle inventory item changes for existing installations
-        old_inventory_item = None
-        is_new_installation = not self.pk
+        is_new_installation = self._state.adding
+        dirty_fields = {}
         
-        if self.pk:
-            try:
-                old_installation = Installation.objects.get(pk=self.pk)
-                old_inventory_item = old_installation.inventory_item
-            except Installation.DoesNotExist:
-                is_new_installation = True
+        if not is_new_installation:
+            if self.has_snapshot():
+                # Yüklenen değerler saklı; eski satırı tekrar okumaya gerek yok
+                dirty_fields = self.get_dirty_fields()
+            else:
+                # Nesne veritabanından yüklenmemiş (ör. pk ile elle oluşturulmuş)
+                attnames = {name: self._meta.get_field(name).attname for name in self.NOTIFY_ON_CHANGE}
+                old_values = Installation.objects.filter(pk=self.pk).values(*attnames.values()).first()
+                if old_values is None:
+                    is_new_installation = True
+                else:
+                    dirty_fields = {
+                        name: old_values[attname] for name, attname in attnames.items()
+                        if old_values[attname] != getattr(self, attname)
+                    }
+        
+        old_inventory_item_id = dirty_fields.get('inventory_item')
         
-        # First save the installation
+        # First save the installation (sadece değişen kolonlar yazılır)
         super().save(*args, **kwargs)
         
         # Mark new inventory item as in use
-        if self.inventory_item and not self.inventory_item.in_used:
+        if (is_new_installation or old_inventory_item_id) and self.inventory_item and not self.inventory_item.in_used:
             self.inventory_item.in_used = True
             self.inventory_item.save()
         
         # Free up old inventory item if changed
-        if old_inventory_item and old_inventory_item != self.inventory_item:
-            old_inventory_item.in_used = False
-            old_inventory_item.save()
+        if old_inventory_item_id:
+            InventoryItem = self._meta.get_field('inventory_item').related_model
+            old_inventory_item = InventoryItem.objects.filter(pk=old_inventory_item_id).first()
+            if old_inventory_item:
+                old_inventory_item.in_used = False
+                old_inventory_item.save()
         
         # Create warranty follow-ups for new installations
         if is_new_installation:
             self.create_warranty_and_service_followups()
-        # Kurulum bildirimi gönder
-        self.send_installation_notification()
+        
+        # Kurulum bildirimini kuyruğa ekle (gönderim process_notification_outbox ile yapılır);
+        # mevcut kurulumlarda sadece önemli alanlar değiştiyse
+        if is_new_installation or any(name in dirty_fields for name in self.NOTIFY_ON_CHANGE):
+            NotificationOutbox.enqueue('installation', installation=self)
 
     def clean(self):
         """Validate installation data"""
@@ -256,9 +246,14 @@ class Installation(models.Model):
                 # If this is an existing installation being updated
                 if self.pk:
                     try:
-                        existing_installation = Installation.objects.get(pk=self.pk)
+                        if self.has_snapshot():
+                            existing_inventory_item_id = self.loaded_value('inventory_item')
+                        else:
+                            existing_inventory_item_id = Installation.objects.values_list(
+                                'inventory_item_id', flat=True
+                            ).get(pk=self.pk)
                         # Allow if it's the same inventory item
-                        if existing_installation.inventory_item != self.inventory_item:
+                        if existing_inventory_item_id != self.inventory_item_id:
                             raise ValidationError({
                                 'inventory_item': _('Selected inventory item is already in use.')
                             })
@@ -295,11 +290,21 @@ class Installation(models.Model):
         Create warranty and service follow-ups for this installation.
         Called automatically when installation is created.
         """
+        self.create_followups_for([self])
+
+    @classmethod
+    def create_followups_for(cls, installations, batch_size=500):
+        """
+        Çok sayıda kurulum (ör. içe aktarma) için garanti ve servis takiplerini
+        toplu oluştur: ilişkiler bir kez yüklenir, tarihler bellekte hesaplanır
+        ve her tür için tek bulk_create yapılır.
+        """
+        installations = list(installations)
         # Create warranty follow-ups based on item master warranty values
-        WarrantyFollowUp.create_warranty_followups(self)
+        WarrantyFollowUp.bulk_create_warranty_followups(installations, batch_size)
         
         # Create service follow-ups based on item master maintenance schedules
-        ServiceFollowUp.create_service_followups(self)
+        ServiceFollowUp.bulk_create_service_followups(installations, batch_size)
 
 
 class InstallationImage(models.Model):
@@ -606,7 +611,71 @@ class InstallationDocument(models.Model):
                     })
 
 
-class WarrantyFollowUp(models.Model):
+# Garanti / servis takiplerinin toplu oluşturulması
+
+FOLLOWUP_SOURCE_LOOKUPS = [
+    'inventory_item__name__warranties__warranty_type',
+    'inventory_item__name__maintenance_schedules__service_period_value__service_period_type',
+    'customer__working_hours',
+]
+
+
+def prefetch_followup_sources(installations):
+    """
+    Takip tarihlerinin hesaplandığı ilişkileri tek seferde yükle: ürün kartının
+    garanti değerleri ve bakım planları, müşterinin çalışma saatleri.
+    Zaten yüklenmiş ilişkiler tekrar sorgulanmaz.
+    """
+    installations = list(installations)
+    models.prefetch_related_objects(installations, *FOLLOWUP_SOURCE_LOOKUPS)
+    return installations
+
+
+def bulk_create_followups(model, installations, build, key_fields, batch_size=500):
+    """
+    ``build(installation)`` ile bellekte hesaplanan takipleri parça parça
+    ``bulk_create(ignore_conflicts=True)`` ile ekle.
+
+    Kurulumda aynı (tür, değer) ile kayıt varsa atlanır (get_or_create ile aynı
+    davranış; ServiceFollowUp'ta tamamlanan servisler aynı anahtarla tekrar
+    oluşturulduğu için unique constraint yoktur). bulk_create post_save
+    göndermediğinden InstallationStatus burada yenilenir.
+
+    ignore_conflicts ile eklenen nesnelere pk atanmaz; bu yüzden dönen liste
+    eklemeden sonra veritabanından okunur: kurulumların ekleme öncesinde
+    olmayan, pk'sı dolu takipleri. (Aynı anda başka bir işlemin eklediği
+    satırlar da bu listede görünebilir.)
+    """
+    from .signals import refresh_installation_status
+
+    installations = [installation for installation in installations if installation.pk]
+    created = []
+    for start in range(0, len(installations), batch_size):
+        chunk = prefetch_followup_sources(installations[start:start + batch_size])
+        existing_pks = set()
+        existing = set()
+        for pk, *key in model.objects.filter(installation__in=chunk).values_list(
+            'pk', 'installation_id', *key_fields
+        ):
+            existing_pks.add(pk)
+            existing.add(tuple(key))
+        followups = []
+        for installation in chunk:
+            for followup in build(installation):
+                key = (installation.pk, *(getattr(followup, field) for field in key_fields))
+                if key not in existing:
+                    existing.add(key)
+                    followups.append(followup)
+        if followups:
+            model.objects.bulk_create(followups, ignore_conflicts=True)
+            refresh_installation_status(*{followup.installation_id for followup in followups})
+            created.extend(
+                model.objects.filter(installation__in=chunk).exclude(pk__in=existing_pks).order_by('pk')
+            )
+    return created
+
+
+class WarrantyFollowUp(DirtyFieldsMixin, models.Model):
     """
     Model for tracking warranty end dates based on different warranty types.
     Supports both time-based and working hours-based warranty calculations.
@@ -648,6 +717,10 @@ class WarrantyFollowUp(models.Model):
         verbose_name_plural = _("Warranty Follow-Ups")
         ordering = ['end_of_warranty_date']
         unique_together = ['installation', 'warranty_type', 'warranty_value']
+        indexes = [
+            # Dashboard / bildirim: süresi dolmak üzere olan garantiler
+            models.Index(fields=['end_of_warranty_date'], name='warranty_end_date_idx'),
+        ]
 
     def __str__(self):
         date_str = self.end_of_warranty_date.strftime('%d.%m.%Y') if self.end_of_warranty_date else 'N/A'
@@ -750,79 +823,60 @@ class WarrantyFollowUp(models.Model):
             return 0 < days_left <= 30
         return False
 
+    @staticmethod
+    def followup_type_for(warranty_type_name):
+        """Ürün kartındaki garanti türü adını follow-up türüne eşle"""
+        warranty_type_name = warranty_type_name.lower()
+        if 'ay' in warranty_type_name or 'month' in warranty_type_name:
+            return 'time_term'
+        elif 'hour' in warranty_type_name or 'saat' in warranty_type_name:
+            return 'working_hours'
+        # Default to working_hours if type is unclear
+        return 'working_hours'
+
     @classmethod
-    def create_warranty_followups(cls, installation):
+    def build_warranty_followups(cls, installation):
         """
-        Create warranty follow-ups based on item master warranty values.
-        Bu method bir ürün için birden fazla garanti süresi (hem ay bazlı hem çalışma saati) 
-        kayıt edilmesini destekler.
+        Kurulum için kaydedilmemiş garanti takipleri; bitiş tarihleri bellekte
+        hesaplanır. Bir ürün için birden fazla garanti süresi (hem ay bazlı hem
+        çalışma saati) desteklenir. Ürün için garanti tanımlı değilse varsayılan
+        6 ay garanti kullanılır.
         """
         item_master = installation.inventory_item.name  # name is the ItemMaster FK
-        
-        # Get all warranty values for this item
-        warranty_values = item_master.warranties.all()
-        created_warranties = []
-        
-        if warranty_values.exists():
-            print(f"Ana ürün '{item_master.name}' için {warranty_values.count()} garanti süresi bulundu:")
-            
-            for warranty_value in warranty_values:
-                # Use database warranty type name directly
-                warranty_type_name = warranty_value.warranty_type.type.lower()
-                
-                # Map warranty type names to warranty follow-up types
-                if 'ay' in warranty_type_name or 'month' in warranty_type_name:
-                    warranty_type = 'time_term'
-                    type_description = "Ay bazlı garanti"
-                elif 'hour' in warranty_type_name or 'saat' in warranty_type_name:
-                    warranty_type = 'working_hours'
-                    type_description = "Çalışma saati bazlı garanti"
-                else:
-                    # Default to working_hours if type is unclear
-                    warranty_type = 'working_hours'
-                    type_description = "Çalışma saati bazlı garanti (varsayılan)"
-                
-                print(f"  - {warranty_value.warranty_type.type}: {warranty_value.value} ({type_description})")
-                
-                # Create warranty follow-up for each warranty type/value
-                warranty_followup, created = cls.objects.get_or_create(
-                    installation=installation,
-                    warranty_type=warranty_type,
-                    warranty_value=warranty_value.value,
-                    defaults={
-                        'calculation_notes': f"Otomatik oluşturuldu - {warranty_value.warranty_type.type} ({type_description})"
-                    }
-                )
-                
-                if created:
-                    created_warranties.append(warranty_followup)
-                    print(f"    ✓ Garanti takibi oluşturuldu: {warranty_followup}")
-                else:
-                    print(f"    → Garanti takibi zaten mevcut: {warranty_followup}")
+        warranty_values = list(item_master.warranties.all())
+        if warranty_values:
+            specs = [
+                (cls.followup_type_for(warranty_value.warranty_type.type), warranty_value.value)
+                for warranty_value in warranty_values
+            ]
         else:
-            print(f"ItemMaster '{item_master.name}' için garanti süresi tanımlı değil, varsayılan garanti oluşturuluyor:")
-            
-            # Create default warranty (ay bazlı garanti, 6 ay)
-            warranty_followup, created = cls.objects.get_or_create(
-                installation=installation,
-                warranty_type='time_term',
-                warranty_value=6,
-                defaults={
-                    'calculation_notes': 'Varsayılan 6 ay garanti (ürün için garanti tanımlı değil)'
-                }
-            )
-            
-            if created:
-                created_warranties.append(warranty_followup)
-                print("    ✓ Varsayılan garanti takibi oluşturuldu: 6 ay garanti")
-            else:
-                print(f"    → Varsayılan garanti takibi zaten mevcut: {warranty_followup}")
-        
-        print(f"Toplam {len(created_warranties)} yeni garanti takibi oluşturuldu.")
-        return created_warranties
+            specs = [('time_term', 6)]
+
+        followups = []
+        for warranty_type, warranty_value in specs:
+            followup = cls(installation=installation, warranty_type=warranty_type, warranty_value=warranty_value)
+            followup.end_of_warranty_date = followup.calculate_warranty_end_date()
+            followups.append(followup)
+        return followups
 
+    @classmethod
+    def create_warranty_followups(cls, installation):
+        """
+        Create warranty follow-ups based on item master warranty values.
+        Mevcut (tür, değer) kayıtları atlanır; oluşturulan takipleri döndürür.
+        """
+        return cls.bulk_create_warranty_followups([installation])
 
-class ServiceFollowUp(models.Model):
+    @classmethod
+    def bulk_create_warranty_followups(cls, installations, batch_size=500):
+        """Birden çok kurulumun garanti takiplerini toplu oluştur"""
+        return bulk_create_followups(
+            cls, installations, cls.build_warranty_followups,
+            ('warranty_type', 'warranty_value'), batch_size
+        )
+
+
+class ServiceFollowUp(DirtyFieldsMixin, models.Model):
     """
     Model for tracking service schedules based on different service types.
     Similar to warranty but for maintenance/service intervals.
@@ -878,6 +932,18 @@ class ServiceFollowUp(models.Model):
         verbose_name = _("Service Follow-Up")
         verbose_name_plural = _("Service Follow-Ups")
         ordering = ['next_service_date']
+        indexes = [
+            # Kurulum bazında sıradaki açık / son tamamlanan servis
+            models.Index(fields=['installation', 'is_completed', 'next_service_date'], name='service_inst_open_next_idx'),
+            # Dashboard gecikenler ve servis bildirimleri (tüm kurulumlar).
+            # Kısmi indeks: is_completed=False, SQL'de "NOT is_completed" olur ve
+            # SQLite bunu bileşik indeksin öneki olarak kullanamaz
+            models.Index(
+                fields=['next_service_date'],
+                condition=models.Q(is_completed=False),
+                name='service_open_next_idx'
+            ),
+        ]
 
     def __str__(self):
         status = "✓" if self.is_completed else "⏳"
@@ -1027,56 +1093,61 @@ class ServiceFollowUp(models.Model):
         self.completed_date = datetime.now().date()
         self.save()
 
+    # Veritabanındaki servis periyot türü adlarının model seçeneklerine eşlemesi
+    SERVICE_TYPE_MAP = {
+        'Periyodik Bakım - Ay Bazlı': 'time_term',
+        'Çalışma Bazlı Periyodik Bakım': 'working_hours',
+        'Ay Bazlı': 'time_term',
+        'Saat Bazlı': 'working_hours'
+    }
+
+    # Ürün için bakım planı tanımlı değilse kullanılan servis aralıkları
+    DEFAULT_SERVICES = [
+        ('time_term', 6),  # 6 months
+        ('working_hours', 1000),  # 1000 hours
+    ]
+
     @classmethod
-    def create_service_followups(cls, installation):
+    def build_service_followups(cls, installation):
         """
-        Create service follow-ups based on item master service values.
-        This method should be called after installation is saved.
+        Kurulum için kaydedilmemiş servis takipleri; sıradaki servis tarihleri
+        kurulum tarihinden itibaren bellekte hesaplanır.
         """
         item_master = installation.inventory_item.name  # name is the ItemMaster FK
-        
-        # Get all maintenance schedules for this item from the database
-        maintenance_schedules = item_master.maintenance_schedules.all()
-        
-        if maintenance_schedules.exists():
-            # Create service follow-ups based on database values
-            for schedule in maintenance_schedules:
-                # Map database service types to model choices
-                service_type_map = {
-                    'Periyodik Bakım - Ay Bazlı': 'time_term',
-                    'Çalışma Bazlı Periyodik Bakım': 'working_hours',
-                    'Ay Bazlı': 'time_term',
-                    'Saat Bazlı': 'working_hours'
-                }
-                
-                period_type = schedule.service_period_value.service_period_type.type
-                service_type = service_type_map.get(period_type, 'time_term')
-                service_value = schedule.service_period_value.value
-                
-                cls.objects.get_or_create(
-                    installation=installation,
-                    service_type=service_type,
-                    service_value=service_value,
-                    defaults={
-                        'calculation_notes': f"Database service interval: {service_value} {schedule.service_period_value.service_period_type.unit} ({period_type})"
-                    }
+        schedules = list(item_master.maintenance_schedules.all())
+        if schedules:
+            specs = [
+                (
+                    cls.SERVICE_TYPE_MAP.get(schedule.service_period_value.service_period_type.type, 'time_term'),
+                    schedule.service_period_value.value
                 )
-        else:
-            # Fallback to default service intervals if no database values
-            default_services = [
-                {'type': 'time_term', 'value': 6, 'type_name': 'Ay'},  # 6 months
-                {'type': 'working_hours', 'value': 1000, 'type_name': 'Çalışma Saati'},  # 1000 hours
+                for schedule in schedules
             ]
-            
-            for service_config in default_services:
-                cls.objects.get_or_create(
-                    installation=installation,
-                    service_type=service_config['type'],
-                    service_value=service_config['value'],
-                    defaults={
-                        'calculation_notes': f"Default service interval: {service_config['value']} {service_config['type_name']} (veritabanında service tanımı bulunamadı)"
-                    }
-                )
+        else:
+            specs = cls.DEFAULT_SERVICES
+
+        followups = []
+        for service_type, service_value in specs:
+            followup = cls(installation=installation, service_type=service_type, service_value=service_value)
+            followup.next_service_date = followup.calculate_next_service_date()
+            followups.append(followup)
+        return followups
+
+    @classmethod
+    def create_service_followups(cls, installation):
+        """
+        Create service follow-ups based on item master service values.
+        This method should be called after installation is saved.
+        """
+        return cls.bulk_create_service_followups([installation])
+
+    @classmethod
+    def bulk_create_service_followups(cls, installations, batch_size=500):
+        """Birden çok kurulumun servis takiplerini toplu oluştur"""
+        return bulk_create_followups(
+            cls, installations, cls.build_service_followups,
+            ('service_type', 'service_value'), batch_size
+        )
 
 
 class BreakdownCategory(models.Model):
@@ -1243,6 +1314,10 @@ class MaintenanceRecord(models.Model):
         verbose_name = _("Maintenance Record")
         verbose_name_plural = _("Maintenance Records")
         ordering = ['-maintenance_date']
+        indexes = [
+            # Arıza analizi: bakım tipi + tarih aralığı
+            models.Index(fields=['maintenance_type', 'service_date'], name='maintenance_type_date_idx'),
+        ]
 
     def __str__(self):
         maintenance_type_display = self.get_maintenance_type_display() if self.maintenance_type else "Unknown"
@@ -1364,110 +1439,76 @@ class MaintenanceRecord(models.Model):
             calculation_notes=calculation_notes
         )
 
+    def prepare_maintenance_notification(self):
+        """Bakım bildiriminin içeriğini hazırla (PDF üretimi ve gönderim yapmaz)"""
+        # Get next service date for periodic maintenance
+        next_service_date = None
+        if self.maintenance_type == 'periodic':
+            # Look for the next service follow-up for this installation
+            try:
+                next_service = self.service_followup.installation.service_followups.filter(
+                    is_completed=False
+                ).order_by('next_service_date').first()
+                
+                if next_service and next_service.next_service_date:
+                    next_service_date = next_service.next_service_date.strftime('%d.%m.%Y')
+            except Exception:
+                pass
+        
+        # Mail content
+        context = {
+            'maintenance_record': self,
+            'maintenance': self,  # Template compatibility
+            'installation': self.service_followup.installation,
+            'customer': self.service_followup.installation.customer,
+            'service_forms': self.service_forms.all(),
+            'spare_parts': self.spare_parts.all(),
+            'photos': self.photos.all(),
+            'documents': self.documents.all(),
+            'technician_name': f"{self.technician.first_name} {self.technician.last_name}".strip() if self.technician else "Unknown",
+            'maintenance_type_display': self.get_maintenance_type_display() if self.maintenance_type else "Unknown",
+            'current_date': timezone.now().strftime('%d.%m.%Y %H:%M'),
+            'service_date_formatted': self.service_date if isinstance(self.service_date, str) else self.service_date.strftime('%d.%m.%Y') if self.service_date else 'N/A',
+            'next_service_date': next_service_date,
+            'language': 'tr'
+        }
+        
+        # Select template based on maintenance type
+        if self.maintenance_type == 'breakdown':
+            template_name = 'warranty_and_services/emails/breakdown_maintenance_notification.html'
+            subject_prefix = "Breakdown Maintenance Completed"
+        else:
+            template_name = 'warranty_and_services/emails/maintenance_notification.html'
+            subject_prefix = "Periodic Maintenance Completed"
+        
+        date_str = self.service_date.strftime('%d%m%Y') if self.service_date and not isinstance(self.service_date, str) else 'unknown'
+        
+        return {
+            'subject': f"{subject_prefix} - {self.service_followup.installation.inventory_item.name.name}",
+            # HTML mail template
+            'html_content': render_to_string(template_name, context),
+            # Recipients - Use same logic as installation notification
+            # (servis yapılan firma + iletişim kişileri, teknisyen, firmasının
+            # yönetici/servis personeli ve related manager)
+            'recipients': recipient_resolver.for_maintenance(self),
+            # Bakım raporu PDF'i
+            'pdf_html': render_to_string('warranty_and_services/pdf/maintenance_report.html', context),
+            'pdf_filename': f"bakim_raporu_{self.service_followup.installation.inventory_item.serial_no}_{date_str}.pdf",
+        }
+
     def send_maintenance_notification(self):
         """Bakım tamamlandığında mail gönder"""
         try:
-            from django.core.mail import EmailMultiAlternatives
-            from django.template.loader import render_to_string
-            from django.conf import settings
-            
-            # Get next service date for periodic maintenance
-            next_service_date = None
-            if self.maintenance_type == 'periodic':
-                # Look for the next service follow-up for this installation
-                try:
-                    next_service = self.service_followup.installation.service_followups.filter(
-                        is_completed=False
-                    ).order_by('next_service_date').first()
-                    
-                    if next_service and next_service.next_service_date:
-                        next_service_date = next_service.next_service_date.strftime('%d.%m.%Y')
-                except Exception:
-                    pass
-            
-            # Mail content
-            context = {
-                'maintenance_record': self,
-                'maintenance': self,  # Template compatibility
-                'installation': self.service_followup.installation,
-                'customer': self.service_followup.installation.customer,
-                'service_forms': self.service_forms.all(),
-                'spare_parts': self.spare_parts.all(),
-                'photos': self.photos.all(),
-                'documents': self.documents.all(),
-                'technician_name': f"{self.technician.first_name} {self.technician.last_name}".strip() if self.technician else "Unknown",
-                'maintenance_type_display': self.get_maintenance_type_display() if self.maintenance_type else "Unknown",
-                'current_date': timezone.now().strftime('%d.%m.%Y %H:%M'),
-                'service_date_formatted': self.service_date if isinstance(self.service_date, str) else self.service_date.strftime('%d.%m.%Y') if self.service_date else 'N/A',
-                'next_service_date': next_service_date,
-                'language': 'tr'
-            }
+            notification = self.prepare_maintenance_notification()
             
-            # Select template based on maintenance type
-            if self.maintenance_type == 'breakdown':
-                template_name = 'warranty_and_services/emails/breakdown_maintenance_notification.html'
-                subject_prefix = "Breakdown Maintenance Completed"
-            else:
-                template_name = 'warranty_and_services/emails/maintenance_notification.html'
-                subject_prefix = "Periodic Maintenance Completed"
-            
-            subject = f"{subject_prefix} - {self.service_followup.installation.inventory_item.name.name}"
-            
-            # HTML mail template
-            html_content = render_to_string(template_name, context)
-            
-            # Recipients - Use same logic as installation notification
-            recipients = set()
-            
-            # 1. Servis yapılan firma maili
-            if self.service_followup.installation.customer and self.service_followup.installation.customer.email:
-                recipients.add(self.service_followup.installation.customer.email)
-            
-            # 2. ContactPerson - servis yapılan firmadaki iletişim kişileri
-            if hasattr(self.service_followup.installation.customer, 'contact_persons'):
-                for contact in self.service_followup.installation.customer.contact_persons.all():
-                    if contact.email:
-                        recipients.add(contact.email)
-            
-            # 3. Servis yapan user
-            if self.technician and self.technician.email:
-                recipients.add(self.technician.email)
-            
-            # 4. Servis yapan firmanın manager ve servis personeli
-            if self.technician.company:
-                for u in self.technician.company.customuser_set.filter(role__in=[
-                    'manager_main', 'salesmanager_main', 'service_main',
-                    'manager_distributor', 'salesmanager_distributor', 'service_distributor']):
-                    if u.email:
-                        recipients.add(u.email)
-                
-                # 5. Related manager
-                if self.technician.company.related_manager and self.technician.company.related_manager.email:
-                    recipients.add(self.technician.company.related_manager.email)
-            
-            if recipients:
-                email = EmailMultiAlternatives(
-                    subject,
-                    html_content,
-                    settings.DEFAULT_FROM_EMAIL,
-                    list(recipients)
-                )
-                email.attach_alternative(html_content, "text/html")
+            if notification['recipients']:
+                # PDF üretimi process havuzunda yapılır; aynı rapor daha önce
+                # üretildiyse cache'ten gelir
+                pdf_content = pdf_renderer.render(notification['pdf_html'])
                 
-                # PDF generation completely disabled for performance
-                pdf_buffer = None
-                # Note: PDF attachment temporarily disabled to improve response time
-                # Users will receive detailed HTML email instead
-                
-                # PDF attachment - only if PDF was generated successfully
-                if pdf_buffer:
-                    date_str = self.service_date.strftime('%d%m%Y') if self.service_date else 'unknown'
-                    filename = f"bakim_raporu_{self.service_followup.installation.inventory_item.serial_no}_{date_str}.pdf"
-                    email.attach(filename, pdf_buffer.read(), 'application/pdf')
-                
-                email.send()
-                print(f"✅ Maintenance notification email sent to: {list(recipients)}")
-                if pdf_buffer:
+                send_notification_email(notification, pdf_content)
+                print(f"✅ Maintenance notification email sent to: {list(notification['recipients'])}")
+                if pdf_content:
                     print("📎 PDF attachment included")
                 else:
                     print("📧 Email sent without PDF attachment")
@@ -1619,3 +1660,403 @@ class MaintenanceDocument(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.maintenance_record}"
+
+
+class NotificationOutbox(models.Model):
+    """
+    Gönderilmeyi bekleyen e-posta bildirimleri kuyruğu.
+    Kayıt akışı sadece satır ekler; SMTP ve PDF işleri
+    process_notification_outbox komutu tarafından yapılır.
+    """
+    KIND_CHOICES = [
+        ('installation', _('Installation Notification')),
+        ('maintenance', _('Maintenance Notification')),
+    ]
+    STATUS_CHOICES = [
+        ('pending', _('Pending')),
+        ('processing', _('Processing')),
+        ('sent', _('Sent')),
+        ('failed', _('Failed')),
+    ]
+
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        verbose_name=_("Notification Kind")
+    )
+    installation = models.ForeignKey(
+        Installation,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='notification_outbox',
+        verbose_name=_("Installation")
+    )
+    maintenance_record = models.ForeignKey(
+        MaintenanceRecord,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='notification_outbox',
+        verbose_name=_("Maintenance Record")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name=_("Status")
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Attempts")
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Next Attempt At")
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name=_("Last Error")
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Sent At")
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Notification Outbox Entry")
+        verbose_name_plural = _("Notification Outbox")
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+    @classmethod
+    def enqueue(cls, kind, installation=None, maintenance_record=None):
+        """Bildirimi kuyruğa ekle - sadece tek bir INSERT yapar"""
+        return cls.objects.create(
+            kind=kind,
+            installation=installation,
+            maintenance_record=maintenance_record,
+        )
+
+    def prepare(self):
+        """Bildirim içeriğini hazırla (subject, html, alıcılar, PDF HTML'i)"""
+        if self.kind == 'installation':
+            return self.installation.prepare_installation_notification()
+        elif self.kind == 'maintenance':
+            return self.maintenance_record.prepare_maintenance_notification()
+        raise ValueError(f"Unknown notification kind: {self.kind}")
+
+    def deliver(self, notification=None):
+        """Bildirimi gönder; hata durumunda exception fırlatır"""
+        if notification is None:
+            notification = self.prepare()
+        if not notification['recipients']:
+            return
+        pdf_content = pdf_renderer.render(notification['pdf_html'])
+        send_notification_email(notification, pdf_content)
+
+    def mark_sent(self):
+        self.status = 'sent'
+        self.sent_at = timezone.now()
+        self.last_error = ''
+        self.save(update_fields=['status', 'sent_at', 'last_error', 'updated_at'])
+
+    def mark_failed(self, error, max_attempts, base_delay):
+        """
+        Başarısız denemeyi kaydet. Deneme hakkı kaldıysa üstel geri çekilme
+        (base_delay * 2^attempts saniye) ile tekrar kuyruğa alır.
+        """
+        self.attempts += 1
+        self.last_error = str(error)
+        if self.attempts >= max_attempts:
+            self.status = 'failed'
+        else:
+            self.status = 'pending'
+            self.next_attempt_at = timezone.now() + timedelta(seconds=base_delay * (2 ** (self.attempts - 1)))
+        self.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at', 'updated_at'])
+
+
+class SentServiceNotification(models.Model):
+    """
+    Gönderilmiş servis hatırlatmaları defteri.
+    (servis takibi, bildirim penceresi, alıcı) başına tek satır tutulur;
+    send_service_due_notifications aynı gün tekrar çalıştığında bu satırlar
+    sayesinde hiçbir e-postayı ikinci kez göndermez.
+    """
+    service_followup = models.ForeignKey(
+        ServiceFollowUp,
+        on_delete=models.CASCADE,
+        related_name='sent_notifications',
+        verbose_name=_("Service Follow-Up")
+    )
+    window = models.IntegerField(
+        verbose_name=_("Notification Window"),
+        help_text=_("Days before the service date the reminder was sent for")
+    )
+    recipient = models.EmailField(
+        verbose_name=_("Recipient")
+    )
+    run_id = models.CharField(
+        max_length=32,
+        db_index=True,
+        verbose_name=_("Run ID"),
+        help_text=_("Command run that claimed this notification")
+    )
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Sent Service Notification")
+        verbose_name_plural = _("Sent Service Notifications")
+        ordering = ['-sent_at']
+        unique_together = ['service_followup', 'window', 'recipient']
+
+    def __str__(self):
+        return f"{self.service_followup_id} / {self.window} / {self.recipient}"
+
+
+class PdfArtifact(models.Model):
+    """
+    Üretilmiş PDF dosyaları. HTML içeriğinin SHA-256 özeti ile saklanır;
+    aynı içerik için PDF tekrar üretilmez.
+    """
+    content_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name=_("Content Hash")
+    )
+    file = models.FileField(
+        upload_to='pdf_artifacts/',
+        verbose_name=_("PDF File")
+    )
+    size = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("File Size (bytes)")
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("PDF Artifact")
+        verbose_name_plural = _("PDF Artifacts")
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.content_hash[:12]}.pdf"
+
+
+class InstallationStatus(models.Model):
+    """
+    Kurulum başına tek satırlık durum özeti: en erken garanti bitişi, sonraki
+    açık servis, son tamamlanan servis ve bakım sayıları.
+
+    Takip listeleri, harita, dashboard ve müşteri detayı follow-up'lar
+    üzerinde her istekte Min()/Count() hesaplamak yerine bu tabloyu okur.
+    WarrantyFollowUp, ServiceFollowUp ve MaintenanceRecord sinyalleri ile
+    güncellenir; ``rebuild_installation_status`` komutu baştan hesaplar.
+
+    Gecikmiş / yaklaşan servis durumu güne bağlı olduğu için saklanmaz;
+    indeksli next_service_date kolonu üzerinden hesaplanır (service_state).
+    """
+    installation = models.OneToOneField(
+        Installation,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='status',
+        verbose_name=_("Installation")
+    )
+    earliest_warranty_end = models.DateField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name=_("Earliest Warranty End")
+    )
+    latest_warranty_end = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name=_("Latest Warranty End")
+    )
+    critical_warranty = models.ForeignKey(
+        WarrantyFollowUp,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_("Critical Warranty")
+    )
+    next_service_date = models.DateField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name=_("Next Service Date")
+    )
+    critical_service = models.ForeignKey(
+        ServiceFollowUp,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_("Next Open Service")
+    )
+    last_completed_date = models.DateField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name=_("Last Completed Service Date")
+    )
+    last_completed_service = models.ForeignKey(
+        ServiceFollowUp,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_("Last Completed Service")
+    )
+    maintenance_total = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Total Maintenances")
+    )
+    maintenance_periodic = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Periodic Maintenances")
+    )
+    maintenance_breakdown = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Breakdown Maintenances")
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    STATUS_FIELDS = [
+        'earliest_warranty_end', 'latest_warranty_end', 'critical_warranty_id',
+        'next_service_date', 'critical_service_id',
+        'last_completed_date', 'last_completed_service_id',
+        'maintenance_total', 'maintenance_periodic', 'maintenance_breakdown',
+    ]
+
+    class Meta:
+        verbose_name = _("Installation Status")
+        verbose_name_plural = _("Installation Statuses")
+
+    def __str__(self):
+        return f"Status of installation #{self.installation_id}"
+
+    @property
+    def service_state(self):
+        """'overdue', 'due_soon' (7 gün), 'pending' veya None (açık servis yok)"""
+        if not self.next_service_date:
+            return None
+        days_until = (self.next_service_date - timezone.localdate()).days
+        if days_until < 0:
+            return 'overdue'
+        elif days_until <= 7:
+            return 'due_soon'
+        return 'pending'
+
+    @staticmethod
+    def _models(apps=None):
+        """
+        Hesaplamada kullanılan modeller. Migration'lar geçmiş (historical)
+        modelleri ``apps`` ile verir; verilmezse güncel kayıt kullanılır.
+        """
+        if apps is None:
+            from django.apps import apps
+        return [
+            apps.get_model('warranty_and_services', name)
+            for name in ('InstallationStatus', 'Installation', 'WarrantyFollowUp',
+                         'ServiceFollowUp', 'MaintenanceRecord')
+        ]
+
+    @classmethod
+    def annotated_installations(cls, queryset=None, apps=None):
+        """Durum değerleri annotate edilmiş Installation queryset'i (tek SQL)"""
+        from django.db.models import Count, OuterRef, Subquery
+        from django.db.models.functions import Coalesce
+
+        _, Installation, WarrantyFollowUp, ServiceFollowUp, MaintenanceRecord = cls._models(apps)
+        warranties = WarrantyFollowUp.objects.filter(installation=OuterRef('pk'))
+        open_services = ServiceFollowUp.objects.filter(installation=OuterRef('pk'), is_completed=False)
+        completed_services = ServiceFollowUp.objects.filter(installation=OuterRef('pk'), is_completed=True)
+        maintenances = MaintenanceRecord.objects.filter(
+            service_followup__installation=OuterRef('pk')
+        ).order_by().values('service_followup__installation')
+
+        def maintenance_count(**filters):
+            return Coalesce(Subquery(
+                maintenances.filter(**filters).annotate(count=Count('id')).values('count')
+            ), 0)
+
+        first_warranty = warranties.order_by('end_of_warranty_date', 'id')
+        first_service = open_services.order_by('next_service_date', 'id')
+        last_completed = completed_services.order_by('-completed_date', 'id')
+
+        if queryset is None:
+            queryset = Installation.objects.all()
+        return queryset.order_by().annotate(
+            status_earliest_warranty_end=Subquery(first_warranty.values('end_of_warranty_date')[:1]),
+            status_latest_warranty_end=Subquery(
+                warranties.order_by('-end_of_warranty_date').values('end_of_warranty_date')[:1]
+            ),
+            status_critical_warranty_id=Subquery(first_warranty.values('id')[:1]),
+            status_next_service_date=Subquery(first_service.values('next_service_date')[:1]),
+            status_critical_service_id=Subquery(first_service.values('id')[:1]),
+            status_last_completed_date=Subquery(last_completed.values('completed_date')[:1]),
+            status_last_completed_service_id=Subquery(last_completed.values('id')[:1]),
+            status_maintenance_total=maintenance_count(),
+            status_maintenance_periodic=maintenance_count(maintenance_type='periodic'),
+            status_maintenance_breakdown=maintenance_count(maintenance_type='breakdown'),
+        )
+
+    @classmethod
+    def from_annotated(cls, installation, model=None):
+        return (model or cls)(
+            installation_id=installation.pk,
+            **{field: getattr(installation, f'status_{field}') for field in cls.STATUS_FIELDS}
+        )
+
+    @classmethod
+    def refresh(cls, *installation_ids):
+        """Verilen kurulumların durum satırlarını yeniden hesapla"""
+        installation_ids = {pk for pk in installation_ids if pk}
+        if not installation_ids:
+            return 0
+        return cls.rebuild(Installation.objects.filter(pk__in=installation_ids))
+
+    @classmethod
+    def rebuild(cls, queryset=None, batch_size=500, apps=None):
+        """
+        Durum satırlarını hesapla ve toplu olarak yaz (upsert).
+        ``apps`` migration içinden geçmiş modellerle çalıştırmak içindir.
+        """
+        model = cls._models(apps)[0]
+        update_fields = [model._meta.get_field(field).name for field in cls.STATUS_FIELDS] + ['updated_at']
+        now = timezone.now()
+
+        count = 0
+        batch = []
+        installations = cls.annotated_installations(queryset, apps=apps).only('pk')
+        for installation in installations.iterator(chunk_size=batch_size):
+            status = cls.from_annotated(installation, model)
+            status.updated_at = now
+            batch.append(status)
+            if len(batch) >= batch_size:
+                count += cls._upsert(model, batch, update_fields)
+                batch = []
+        if batch:
+            count += cls._upsert(model, batch, update_fields)
+        return count
+
+    @staticmethod
+    def _upsert(model, statuses, update_fields):
+        model.objects.bulk_create(
+            statuses,
+            update_conflicts=True,
+            unique_fields=['installation'],
+            update_fields=update_fields,
+        )
+        return len(statuses)
@@ -0,0 +1,223 @@
+"""
+Keyset (cursor) sayfalama.
+
+``Paginator`` her sayfada ``OFFSET`` ve tam ``COUNT`` çalıştırır; derin
+sayfalarda veritabanı atlanan tüm satırları okumak zorunda kalır. Keyset
+sayfalama bir önceki sayfanın son satırının (tarih, id) değerinden devam
+eder: ``WHERE (tarih, id) > (:tarih, :id) ORDER BY tarih, id LIMIT n``.
+Böylece 100. sayfa da 1. sayfa kadar ucuzdur.
+
+Toplam sayı isteğe bağlı olarak tahmin edilir (PostgreSQL'de EXPLAIN
+satır tahmini, diğer motorlarda kısa süre cache'lenen COUNT).
+"""
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_PARAM = 'cursor'
+
+
+def encode_cursor(values, backwards=False):
+    payload = json.dumps({'v': values, 'b': backwards}, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields=None):
+    """
+    Geçersiz cursor ilk sayfa sayılır: (None, False).
+
+    ``fields`` verilirse (sıralama alanlarının model alanları) değerler
+    sayıca eşleşmeli ve her biri ``to_python`` ile dönüştürülebilmelidir;
+    böylece bozuk bir tarih sorguda ``ValidationError`` yerine ilk sayfa olur.
+    """
+    if not cursor:
+        return None, False
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, backwards = list(payload['v']), bool(payload['b'])
+        if fields is not None:
+            if len(values) != len(fields) or None in values:
+                return None, False
+            values = [field.to_python(value) for field, value in zip(fields, values)]
+        return values, backwards
+    except (ValueError, TypeError, KeyError, AttributeError, ValidationError):
+        return None, False
+
+
+class KeysetPage:
+    """
+    Template'lerde ``Page`` yerine kullanılabilen sayfa nesnesi.
+
+    ``number`` / ``page_range`` yoktur; gezinme ``next_cursor`` ve
+    ``previous_cursor`` ile yapılır.
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<KeysetPage ({len(self.object_list)} items)>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    """
+    (tarih, id) gibi benzersiz bir sıralama anahtarı üzerinde sayfalama.
+
+    ``ordering`` alanları queryset'te doğrudan bulunan alan/annotation
+    adlarıdır (``'-setup_date', '-id'``); son alan satırı tekil yapmalıdır.
+    Sıralama alanları NULL olmamalıdır.
+    """
+
+    def __init__(self, queryset, per_page, ordering, estimate_count=False):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = [
+            (name[1:], True) if name.startswith('-') else (name, False)
+            for name in ordering
+        ]
+        self.estimate_count = estimate_count
+        self._count = None
+
+    def order_by(self, backwards=False):
+        return [
+            f'-{name}' if descending != backwards else name
+            for name, descending in self.ordering
+        ]
+
+    def keyset_filter(self, values, backwards=False):
+        """(a, b) > (x, y)  ==>  a > x OR (a = x AND b > y)"""
+        condition = Q()
+        for index, (name, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending != backwards else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[index]})
+            for previous_index, (previous_name, _) in enumerate(self.ordering[:index]):
+                term &= Q(**{previous_name: values[previous_index]})
+            condition |= term
+        return condition
+
+    @cached_property
+    def fields(self):
+        """Sıralama alanlarının (alan ya da annotation) model alanı"""
+        query = self.queryset.query.chain()
+        return [query.resolve_ref(name).output_field for name, _ in self.ordering]
+
+    def key_of(self, obj):
+        return [getattr(obj, name) for name, _ in self.ordering]
+
+    def page(self, cursor=None):
+        values, backwards = decode_cursor(cursor, self.fields)
+
+        queryset = self.queryset.order_by(*self.order_by(backwards))
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(values, backwards))
+
+        # Bir fazla satır: sonraki sayfa var mı?
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        return KeysetPage(
+            rows,
+            self,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous and bool(rows),
+            next_cursor=encode_cursor(self.key_of(rows[-1])) if rows else None,
+            previous_cursor=encode_cursor(self.key_of(rows[0]), backwards=True) if rows else None,
+        )
+
+    @property
+    def count(self):
+        if self._count is None:
+            self._count = self.estimated_count() if self.estimate_count else self.queryset.count()
+        return self._count
+
+    @property
+    def count_is_estimate(self):
+        """``count`` planlayıcı tahmini mi (yalnızca PostgreSQL; diğerlerinde kesin COUNT)"""
+        return self.estimate_count and connections[self.queryset.db].vendor == 'postgresql'
+
+    def estimated_count(self):
+        """
+        PostgreSQL: planlayıcının satır tahmini (tablo taranmaz).
+        Diğer motorlar: COUNT sonucu filtre bazında kısa süre cache'lenir,
+        böylece sayfalar arasında tekrar hesaplanmaz.
+        """
+        queryset = self.queryset.order_by()
+        connection = connections[queryset.db]
+        sql, params = queryset.query.sql_with_params()
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+
+        key = 'keyset_count:' + hashlib.md5(
+            f'{sql}|{params!r}'.encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, getattr(settings, 'KEYSET_COUNT_CACHE_TIMEOUT', 60))
+        return count
+
+
+def keyset_enabled(request):
+    """?cursor= parametresi varsa veya KEYSET_PAGINATION açıksa keyset modu"""
+    return CURSOR_PARAM in request.GET or getattr(settings, 'KEYSET_PAGINATION', False)
+
+
+def paginate(request, queryset, per_page, ordering):
+    """
+    Görünümler için ortak giriş noktası: keyset modu açıksa ``KeysetPage``,
+    değilse klasik ``Paginator.get_page()`` sonucu döner.
+    """
+    if keyset_enabled(request):
+        paginator = KeysetPaginator(
+            queryset, per_page, ordering,
+            estimate_count=getattr(settings, 'KEYSET_PAGINATION_ESTIMATE_COUNT', True)
+        )
+        return paginator.page(request.GET.get(CURSOR_PARAM))
+    return Paginator(queryset.order_by(*ordering), per_page).get_page(request.GET.get('page'))
@@ -0,0 +1,363 @@
+"""
+PDF üretimi.
+
+HTML içerikten PDF üretimi ayrı bir process havuzunda yapılır ve sonuç,
+HTML içeriğinin SHA-256 özeti ile PdfArtifact olarak saklanır. Aynı rapor
+ikinci kez istendiğinde yeniden render edilmez.
+
+PDF motoru (weasyprint / xhtml2pdf) ilk render'da yüklenir (``pdf_engines``).
+
+PDF_RENDER_SERVICE_ADDRESS tanımlıysa render işleri, fontları ve stil
+dosyalarını önceden yüklemiş ``run_pdf_renderer`` servisine gönderilir.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from multiprocessing.connection import Client
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+
+class WeasyPrintBackend:
+    """WeasyPrint: fontlar ve stil dosyaları önceden yüklenebilir"""
+    name = 'weasyprint'
+
+    def __init__(self):
+        import weasyprint
+        try:
+            from weasyprint.text.fonts import FontConfiguration
+        except ImportError:
+            from weasyprint.fonts import FontConfiguration
+        self.weasyprint = weasyprint
+        self.FontConfiguration = FontConfiguration
+
+    def load(self, stylesheets):
+        font_config = self.FontConfiguration()
+        css = [
+            self.weasyprint.CSS(filename=str(path), font_config=font_config)
+            for path in stylesheets
+        ]
+        return {'font_config': font_config, 'stylesheets': css}
+
+    def write(self, html_content, pdf_buffer, base_url, state):
+        self.weasyprint.HTML(string=html_content, base_url=base_url).write_pdf(
+            pdf_buffer,
+            stylesheets=state['stylesheets'],
+            font_config=state['font_config'],
+        )
+
+
+class Xhtml2PdfBackend:
+    """xhtml2pdf (pisa): önceden yüklenecek bir şey yok"""
+    name = 'xhtml2pdf'
+
+    def __init__(self):
+        from xhtml2pdf import pisa
+        self.pisa = pisa
+
+    def load(self, stylesheets):
+        return {}
+
+    def write(self, html_content, pdf_buffer, base_url, state):
+        self.pisa.CreatePDF(html_content, dest=pdf_buffer)
+
+
+class PdfEngineRegistry:
+    """
+    PDF motoru kayıt defteri. Motor modülleri import sırasında değil, ilk
+    kullanımda yüklenir; migrate, management komutları ve web worker'ları
+    PDF üretmedikçe weasyprint/xhtml2pdf maliyetini ödemez.
+
+    Sıra settings.PDF_ENGINES ile değiştirilebilir (varsayılan: kayıt sırası).
+    """
+
+    def __init__(self):
+        self._backends = {}
+        self._backend = None
+        self._resolved = False
+        self._lock = threading.Lock()
+
+    def register(self, backend_class):
+        self._backends[backend_class.name] = backend_class
+        return backend_class
+
+    def get(self):
+        """Kullanılabilir ilk motoru döndür; hiçbiri yoksa None"""
+        if not self._resolved:
+            with self._lock:
+                if not self._resolved:
+                    self._backend = self._resolve()
+                    self._resolved = True
+        return self._backend
+
+    def _resolve(self):
+        for name in getattr(settings, 'PDF_ENGINES', list(self._backends)):
+            backend_class = self._backends.get(name)
+            if backend_class is None:
+                logger.warning(f'Unknown PDF engine: {name}')
+                continue
+            try:
+                return backend_class()
+            except (ImportError, OSError) as e:
+                # weasyprint, Pango gibi sistem kütüphaneleri yoksa OSError verir
+                logger.info(f'PDF engine {name} unavailable: {e}')
+        return None
+
+    @property
+    def available(self):
+        return self.get() is not None
+
+    @property
+    def name(self):
+        backend = self.get()
+        return backend.name if backend else None
+
+    def reset(self):
+        with self._lock:
+            self._backend = None
+            self._resolved = False
+
+
+pdf_engines = PdfEngineRegistry()
+pdf_engines.register(WeasyPrintBackend)
+pdf_engines.register(Xhtml2PdfBackend)
+
+
+def content_hash(html_content):
+    """HTML içeriğinin SHA-256 özeti"""
+    return hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+
+
+class PdfEngine:
+    """
+    PDF motoru. Font yapılandırması ve ortak stil dosyaları ilk kullanımda
+    bir kez yüklenir ve sonraki tüm belgelerde yeniden kullanılır.
+
+    Args:
+        stylesheets: Her belgeye uygulanacak CSS dosyaları
+            (varsayılan: settings.PDF_RENDER_STYLESHEETS)
+    """
+
+    def __init__(self, stylesheets=None):
+        if stylesheets is None:
+            stylesheets = getattr(settings, 'PDF_RENDER_STYLESHEETS', [])
+        self.stylesheets = list(stylesheets)
+        self.base_url = str(getattr(settings, 'BASE_DIR', '.'))
+        self.backend = None
+        self.state = None
+        self.rendered = 0
+
+    def load(self):
+        """Motoru çöz, font yapılandırmasını ve stil dosyalarını yükle"""
+        if self.state is not None:
+            return
+        self.backend = pdf_engines.get()
+        self.state = self.backend.load(self.stylesheets) if self.backend else {}
+
+    def warm_up(self):
+        """Yükle ve boş bir belge render et (Pango/HarfBuzz ilk çağrıda başlatılır)"""
+        self.load()
+        self.render('<html><body><p>warm-up</p></body></html>')
+        return self
+
+    def render(self, html_content):
+        """HTML içeriği PDF'e çevir; PDF motoru yoksa None"""
+        self.load()
+        if self.backend is None:
+            return None
+        pdf_buffer = BytesIO()
+        self.backend.write(html_content, pdf_buffer, self.base_url, self.state)
+        self.rendered += 1
+        return pdf_buffer.getvalue()
+
+
+_engine = None
+
+
+def get_engine():
+    """Bu process'e ait sıcak PDF motoru"""
+    global _engine
+    if _engine is None:
+        _engine = PdfEngine().warm_up()
+    return _engine
+
+
+def service_address(address=None):
+    """
+    Servis adresini (varsayılan: PDF_RENDER_SERVICE_ADDRESS) çöz.
+    'host:port' -> TCP, diğer değerler -> Unix socket yolu, boş -> None
+    """
+    address = address or getattr(settings, 'PDF_RENDER_SERVICE_ADDRESS', None)
+    if not address:
+        return None
+    host, sep, port = str(address).rpartition(':')
+    if sep and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return str(address)
+
+
+def service_authkey(address=None):
+    """
+    Servis bağlantısının authkey'i (PDF_RENDER_SERVICE_AUTHKEY).
+
+    Servis gelen istekleri unpickle ettiği için TCP adreslerinde anahtar
+    zorunludur. Unix socket'te anahtar verilmezse kimlik doğrulama yapılmaz;
+    erişim socket dosyasının izinleriyle (yalnızca sahibi) sınırlanır.
+    """
+    authkey = getattr(settings, 'PDF_RENDER_SERVICE_AUTHKEY', None)
+    if authkey:
+        return authkey.encode('utf-8') if isinstance(authkey, str) else authkey
+    if isinstance(address or service_address(), tuple):
+        raise ImproperlyConfigured(
+            'PDF_RENDER_SERVICE_AUTHKEY must be set when PDF_RENDER_SERVICE_ADDRESS is a TCP address'
+        )
+    return None
+
+
+def can_render():
+    """Bu process'te veya servis üzerinden PDF üretilebilir mi"""
+    return service_address() is not None or pdf_engines.available
+
+
+def render_remote(html_content, address=None):
+    """
+    PDF'i ``run_pdf_renderer`` servisine render ettir.
+
+    Protokol: istemci ('render', html) gönderir, servis ('ok', pdf_bytes)
+    veya ('error', mesaj) ile cevap verir.
+    """
+    address = address or service_address()
+    with Client(address, authkey=service_authkey(address)) as connection:
+        connection.send(('render', html_content))
+        status, payload = connection.recv()
+    if status != 'ok':
+        raise RuntimeError(f'PDF render service error: {payload}')
+    return payload
+
+
+def render_pdf_bytes(html_content):
+    """
+    HTML içeriği PDF'e çevir. Process havuzunda çalıştığı için modül
+    seviyesinde tanımlı olmalı (pickle edilebilir).
+
+    Servis tanımlıysa ona gönderilir; servise ulaşılamazsa bu process'in
+    kendi motoruyla render edilir.
+    """
+    address = service_address()
+    if address:
+        try:
+            return render_remote(html_content, address)
+        except (OSError, EOFError, ImproperlyConfigured) as e:
+            logger.warning(f'PDF render service unavailable ({e}), rendering locally')
+    return get_engine().render(html_content)
+
+
+class PdfRenderer:
+    """
+    Process havuzu + içerik özeti cache'i ile PDF üretici.
+
+    ``prefetch`` ile birden fazla HTML aynı anda havuza gönderilir;
+    ``render`` cache'e bakar, gerekirse havuzdaki işi bekler ve sonucu saklar.
+    """
+
+    def __init__(self, workers=None, timeout=None):
+        self.workers = workers or getattr(settings, 'PDF_RENDER_WORKERS', 2)
+        self.timeout = timeout or getattr(settings, 'PDF_RENDER_TIMEOUT', 120)
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _cached(self, digest):
+        from .models import PdfArtifact
+
+        artifact = PdfArtifact.objects.filter(content_hash=digest).first()
+        if artifact is None:
+            return None
+        try:
+            with artifact.file.open('rb') as pdf_file:
+                return pdf_file.read()
+        except (OSError, ValueError):
+            # Dosya kaybolmuşsa kaydı sil, yeniden üretilsin
+            artifact.delete()
+            return None
+
+    def _store(self, digest, pdf_content):
+        from .models import PdfArtifact
+
+        artifact, created = PdfArtifact.objects.get_or_create(
+            content_hash=digest,
+            defaults={'size': len(pdf_content)}
+        )
+        if created:
+            artifact.file.save(f'{digest}.pdf', ContentFile(pdf_content), save=True)
+
+    def _submit(self, digest, html_content):
+        with self._lock:
+            future = self._pending.get(digest)
+            if future is None:
+                future = self._get_executor().submit(render_pdf_bytes, html_content)
+                self._pending[digest] = future
+            return future
+
+    def prefetch(self, html_contents):
+        """Cache'te olmayan içerikleri arka planda render etmeye başla"""
+        if not can_render():
+            return
+        from .models import PdfArtifact
+
+        by_digest = {content_hash(html): html for html in html_contents if html}
+        existing = set(
+            PdfArtifact.objects.filter(content_hash__in=list(by_digest)).values_list('content_hash', flat=True)
+        )
+        for digest, html_content in by_digest.items():
+            if digest not in existing:
+                self._submit(digest, html_content)
+
+    def render(self, html_content):
+        """PDF içeriğini (bytes) döndür; PDF motoru yoksa veya hata olursa None"""
+        if not can_render() or not html_content:
+            return None
+
+        digest = content_hash(html_content)
+        pdf_content = self._cached(digest)
+        if pdf_content is not None:
+            return pdf_content
+
+        try:
+            pdf_content = self._submit(digest, html_content).result(timeout=self.timeout)
+        except BrokenProcessPool:
+            logger.error('PDF render pool crashed, recreating it')
+            self.shutdown()
+            return None
+        except Exception as e:
+            logger.error(f'PDF rendering failed: {e}')
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop(digest, None)
+
+        if pdf_content:
+            self._store(digest, pdf_content)
+        return pdf_content
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pending.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+pdf_renderer = PdfRenderer()
@@ -0,0 +1,105 @@
+"""
+Çalışma saati bazlı takip tarihlerinin yeniden hesaplanması.
+
+Garanti bitiş ve servis tarihleri kayıt sırasında müşterinin haftalık çalışma
+saatiyle bir kez hesaplanır. ``WorkingHours`` değiştiğinde bu tarihler
+eskir; burada etkilenen kurulumlar parça parça işlenir:
+
+* her parça için kurulumlar (çalışma saatleriyle), ``working_hours`` türündeki
+  garantiler, açık servisler ve son periyodik bakım tarihleri birer sorguyla
+  okunur,
+* tarihler bellekte mevcut ``calculate_*`` metodlarıyla hesaplanır,
+* sadece tarihi değişen satırlar (notlarıyla) ``bulk_update`` ile yazılır.
+
+Tamamlanan servisler geçmiş kaydıdır, değiştirilmez.
+"""
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .models import Installation, MaintenanceRecord, ServiceFollowUp, WarrantyFollowUp
+
+
+def last_maintenance_dates(installation_ids):
+    """
+    (kurulum, servis değeri) -> son periyodik bakım tarihi.
+
+    Bakım sonrası açılan servis, bakım tarihinden itibaren hesaplanır
+    (bkz. MaintenanceRecord.handle_periodic_maintenance_completion).
+    """
+    rows = MaintenanceRecord.objects.filter(
+        maintenance_type='periodic',
+        service_followup__installation_id__in=installation_ids,
+        service_followup__service_type='working_hours',
+        service_followup__is_completed=True,
+    ).order_by().values_list(
+        'service_followup__installation_id', 'service_followup__service_value'
+    ).annotate(last_service_date=Max('service_date'))
+    return {(installation_id, value): last_date for installation_id, value, last_date in rows}
+
+
+def recalculate_chunk(installation_ids, now=None):
+    """Bir grup kurulumun tarihlerini hesapla ve yaz: (garanti, servis) sayıları"""
+    now = now or timezone.now()
+    installations = Installation.objects.select_related('customer__working_hours').in_bulk(installation_ids)
+
+    warranties = []
+    for warranty in WarrantyFollowUp.objects.filter(
+        installation_id__in=installation_ids, warranty_type='working_hours'
+    ).order_by():
+        warranty.installation = installations[warranty.installation_id]
+        old_date = warranty.end_of_warranty_date
+        warranty.end_of_warranty_date = warranty.calculate_warranty_end_date()
+        if warranty.end_of_warranty_date != old_date:
+            warranty.updated_at = now
+            warranties.append(warranty)
+
+    base_dates = last_maintenance_dates(installation_ids)
+    services = []
+    for service in ServiceFollowUp.objects.filter(
+        installation_id__in=installation_ids, service_type='working_hours', is_completed=False
+    ).order_by():
+        service.installation = installations[service.installation_id]
+        old_date = service.next_service_date
+        service.next_service_date = service.calculate_next_service_date(
+            from_date=base_dates.get((service.installation_id, service.service_value))
+        )
+        if service.next_service_date != old_date:
+            service.updated_at = now
+            services.append(service)
+
+    WarrantyFollowUp.objects.bulk_update(warranties, ['end_of_warranty_date', 'calculation_notes', 'updated_at'])
+    ServiceFollowUp.objects.bulk_update(services, ['next_service_date', 'calculation_notes', 'updated_at'])
+
+    # bulk_update sinyal göndermez
+    changed_ids = {followup.installation_id for followup in warranties + services}
+    if changed_ids:
+        from .signals import refresh_installation_status
+        refresh_installation_status(*changed_ids)
+    return len(warranties), len(services)
+
+
+def recalculate_followup_dates(customer_ids=None, batch_size=500):
+    """
+    Verilen müşterilerin (None: tümü) çalışma saati bazlı garanti ve açık
+    servis tarihlerini yeniden hesapla. Güncellenen (garanti, servis) sayısını
+    döndürür.
+    """
+    installations = Installation.objects.filter(
+        Exists(WarrantyFollowUp.objects.filter(installation=OuterRef('pk'), warranty_type='working_hours'))
+        | Exists(ServiceFollowUp.objects.filter(
+            installation=OuterRef('pk'), service_type='working_hours', is_completed=False
+        ))
+    )
+    if customer_ids is not None:
+        installations = installations.filter(customer_id__in=customer_ids)
+    installation_ids = list(installations.order_by('pk').values_list('pk', flat=True))
+
+    now = timezone.now()
+    warranty_count = service_count = 0
+    for start in range(0, len(installation_ids), batch_size):
+        with transaction.atomic():
+            warranties, services = recalculate_chunk(installation_ids[start:start + batch_size], now)
+        warranty_count += warranties
+        service_count += services
+    return warranty_count, service_count
@@ -0,0 +1,135 @@
+"""
+Kurulum ve bakım bildirimlerinin alıcılarını çözen ortak bileşen.
+
+Alıcılar firma bazında cache'lenir:
+- Müşteri tarafı: firma e-postası + iletişim kişileri
+- Personel tarafı: firmanın yönetici/servis kullanıcıları + related manager
+
+Company, ContactPerson ve CustomUser değişikliklerinde ilgili kayıtlar
+signals.py üzerinden geçersiz kılınır.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+STAFF_ROLES = [
+    'manager_main', 'salesmanager_main', 'service_main',
+    'manager_distributor', 'salesmanager_distributor', 'service_distributor',
+]
+
+
+class RecipientResolver:
+    """Firma bazında cache'lenen alıcı listesi çözücü"""
+
+    customer_key = 'recipients:customer:{}'
+    staff_key = 'recipients:staff:{}'
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout or getattr(settings, 'RECIPIENT_CACHE_TIMEOUT', 3600)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _cached(self, key, loader):
+        recipients = cache.get(key)
+        if recipients is not None:
+            self._count(hit=True)
+            return set(recipients)
+        self._count(hit=False)
+        recipients = loader()
+        cache.set(key, sorted(recipients), self.timeout)
+        return set(recipients)
+
+    def customer_recipients(self, company_id):
+        """Müşteri firmanın e-postası ve iletişim kişileri"""
+        if not company_id:
+            return set()
+
+        def load():
+            from customer.models import Company, ContactPerson
+
+            recipients = set(
+                email for email in Company.objects.filter(pk=company_id).values_list('email', flat=True) if email
+            )
+            recipients.update(
+                email for email in ContactPerson.objects.filter(company_id=company_id).values_list('email', flat=True) if email
+            )
+            return recipients
+
+        return self._cached(self.customer_key.format(company_id), load)
+
+    def staff_recipients(self, company_id):
+        """İşlemi yapan firmanın yönetici ve servis personeli + related manager"""
+        if not company_id:
+            return set()
+
+        def load():
+            from customer.models import Company
+            from custom_user.models import CustomUser
+
+            recipients = set(
+                email for email in CustomUser.objects.filter(
+                    company_id=company_id, role__in=STAFF_ROLES
+                ).values_list('email', flat=True) if email
+            )
+            recipients.update(
+                email for email in Company.objects.filter(pk=company_id).values_list(
+                    'related_manager__email', flat=True
+                ) if email
+            )
+            return recipients
+
+        return self._cached(self.staff_key.format(company_id), load)
+
+    def resolve(self, customer_id, performer=None):
+        """
+        Bildirim alıcılarını döndür.
+
+        Args:
+            customer_id: Hizmet verilen müşteri firma ID'si
+            performer: İşlemi yapan kullanıcı (kurulumcu veya teknisyen)
+        """
+        recipients = self.customer_recipients(customer_id)
+        if performer is not None:
+            if performer.email:
+                recipients.add(performer.email)
+            recipients |= self.staff_recipients(performer.company_id)
+        return recipients
+
+    def for_installation(self, installation):
+        return self.resolve(installation.customer_id, installation.user)
+
+    def for_maintenance(self, maintenance_record):
+        installation = maintenance_record.service_followup.installation
+        return self.resolve(installation.customer_id, maintenance_record.technician)
+
+    def invalidate_customer(self, company_id):
+        cache.delete(self.customer_key.format(company_id))
+
+    def invalidate_staff(self, *company_ids):
+        cache.delete_many([self.staff_key.format(company_id) for company_id in company_ids if company_id])
+
+    def invalidate_company(self, company_id):
+        self.invalidate_customer(company_id)
+        self.invalidate_staff(company_id)
+
+    def stats(self):
+        """Cache isabet istatistikleri"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+recipient_resolver = RecipientResolver()
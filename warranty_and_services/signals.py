@@ -0,0 +1,147 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from customer.models import Company, ContactPerson, WorkingHours
+from .models import Installation, InstallationStatus, MaintenanceRecord, ServiceFollowUp, WarrantyFollowUp
+from .recalculation import recalculate_followup_dates
+from .recipients import recipient_resolver
+from .stats import invalidate_tracking_stats
+
+User = get_user_model()
+
+
+# Bildirim alıcıları cache'i
+
+@receiver([post_save, post_delete], sender=Company)
+def invalidate_company_recipients(sender, instance, **kwargs):
+    recipient_resolver.invalidate_company(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=ContactPerson)
+def invalidate_contact_person_recipients(sender, instance, **kwargs):
+    recipient_resolver.invalidate_customer(instance.company_id)
+
+
+@receiver([pre_save, pre_delete], sender=User)
+def remember_user_recipient_companies(sender, instance, **kwargs):
+    """
+    Değişiklikten önce etkilenen firmaları kaydet: kullanıcının önceki firması ve
+    related manager olduğu firmalar (silmede bu bağlantı SET_NULL ile kaybolur).
+    """
+    instance._recipient_company_ids = []
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        # Girişte yapılan last_login güncellemesi alıcıları etkilemez
+        return
+    if instance.pk:
+        instance._recipient_company_ids = list(
+            User.objects.filter(pk=instance.pk).values_list('company_id', flat=True)
+        ) + list(
+            Company.objects.filter(related_manager_id=instance.pk).values_list('id', flat=True)
+        )
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_recipients(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    recipient_resolver.invalidate_staff(
+        instance.company_id,
+        *getattr(instance, '_recipient_company_ids', [])
+    )
+
+
+# Kurulum durum özeti (InstallationStatus)
+
+# Bu alanlar değişmediyse durum satırı yeniden hesaplanmaz
+STATUS_SOURCE_FIELDS = {
+    WarrantyFollowUp: {'installation', 'end_of_warranty_date'},
+    ServiceFollowUp: {'installation', 'next_service_date', 'is_completed', 'completed_date'},
+    MaintenanceRecord: {'service_followup', 'maintenance_type'},
+}
+
+
+def refresh_installation_status(*installation_ids):
+    """
+    Transaction commit edildikten sonra durum satırlarını yeniden hesapla ve
+    takip listesi istatistiklerini geçersiz kıl
+    """
+    def refresh():
+        InstallationStatus.refresh(*installation_ids)
+        invalidate_tracking_stats()
+
+    transaction.on_commit(refresh)
+
+
+def affects_status(sender, kwargs):
+    update_fields = kwargs.get('update_fields')
+    return not update_fields or bool(set(update_fields) & STATUS_SOURCE_FIELDS[sender])
+
+
+@receiver(post_save, sender=Installation)
+def create_installation_status(sender, instance, created, **kwargs):
+    if created:
+        refresh_installation_status(instance.pk)
+    elif 'customer' in instance.get_dirty_fields():
+        # Kurulum başka bir müşteriye taşındı - scope istatistikleri değişir
+        transaction.on_commit(invalidate_tracking_stats)
+
+
+@receiver(post_delete, sender=Installation)
+def invalidate_stats_for_installation(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_tracking_stats)
+
+
+@receiver([post_save, post_delete], sender=WarrantyFollowUp)
+@receiver([post_save, post_delete], sender=ServiceFollowUp)
+def update_status_for_followup(sender, instance, **kwargs):
+    if not affects_status(sender, kwargs):
+        return
+    # Kayıt başka bir kuruluma taşındıysa eski kurulumu da güncelle
+    previous_installation_id = instance.get_dirty_fields().get('installation') if kwargs.get('created') is False else None
+    refresh_installation_status(instance.installation_id, previous_installation_id)
+
+
+@receiver([post_save, post_delete], sender=MaintenanceRecord)
+def update_status_for_maintenance(sender, instance, **kwargs):
+    if not affects_status(sender, kwargs):
+        return
+    installation_id = ServiceFollowUp.objects.filter(
+        pk=instance.service_followup_id
+    ).values_list('installation_id', flat=True).first()
+    refresh_installation_status(installation_id)
+
+
+# Çalışma saati bazlı takip tarihleri
+
+def schedule_followup_recalculation(customer_id):
+    """
+    Commit sonrası müşterinin takip tarihlerini yeniden hesapla.
+    FOLLOWUP_RECALCULATION_ON_SAVE kapalıysa recalculate_followup_dates
+    komutu (ör. gece) çalıştırılmalıdır.
+    """
+    if not getattr(settings, 'FOLLOWUP_RECALCULATION_ON_SAVE', True):
+        return
+    transaction.on_commit(lambda: recalculate_followup_dates([customer_id]))
+
+
+@receiver(pre_save, sender=WorkingHours)
+def remember_weekly_working_hours(sender, instance, **kwargs):
+    previous = WorkingHours.objects.filter(pk=instance.pk).first() if instance.pk else None
+    instance._previous_weekly_hours = previous.weekly_working_hours if previous else None
+
+
+@receiver(post_save, sender=WorkingHours)
+def recalculate_followups_for_working_hours(sender, instance, created, **kwargs):
+    if created or instance.weekly_working_hours != getattr(instance, '_previous_weekly_hours', None):
+        schedule_followup_recalculation(instance.customer_id)
+
+
+@receiver(post_delete, sender=WorkingHours)
+def recalculate_followups_for_deleted_working_hours(sender, instance, **kwargs):
+    # Varsayılan 40 saat/hafta ile yeniden hesaplanır
+    schedule_followup_recalculation(instance.customer_id)
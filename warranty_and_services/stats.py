@@ -0,0 +1,91 @@
+"""
+Garanti ve servis takip listelerinin istatistik kartları.
+
+Tüm kartlar tek bir ``aggregate()`` (filtreli Count'lar) ile hesaplanır ve
+kullanıcının erişebildiği firma kümesi (scope) bazında kısa süreli
+cache'lenir. Follow-up / bakım değişikliklerinde signals.py sürüm
+numarasını artırarak tüm kayıtları geçersiz kılar.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+VERSION_KEY = 'tracking_stats:version'
+
+
+def stats_version():
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+def invalidate_tracking_stats():
+    """Tüm scope'ların istatistiklerini geçersiz kıl"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def scope_key(user):
+    """
+    Kullanıcının erişebildiği firma kümesini temsil eden anahtar: küme yalnızca
+    firmaya ve hiyerarşiye bağlıdır, id listesi okunmaz
+    """
+    from customer.hierarchy import hierarchy_version
+
+    return f'{getattr(user, "company_id", None)}:{hierarchy_version()}'
+
+
+def cached_stats(kind, user, compute):
+    key = f'tracking_stats:{kind}:{stats_version()}:{scope_key(user)}:{timezone.localdate().isoformat()}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute()
+        cache.set(key, stats, getattr(settings, 'TRACKING_STATS_CACHE_TIMEOUT', 300))
+    return stats
+
+
+def warranty_stats(user, company_filter):
+    """Garanti takip kartları: total, active, expiring_soon, expired"""
+    from .models import Installation
+
+    def compute():
+        now = timezone.now()
+        thirty_days_later = now + timedelta(days=30)
+        return Installation.objects.filter(
+            company_filter,
+            status__earliest_warranty_end__isnull=False
+        ).aggregate(
+            total=Count('pk'),
+            active=Count('pk', filter=Q(status__earliest_warranty_end__gt=now)),
+            expiring_soon=Count('pk', filter=Q(
+                status__earliest_warranty_end__gt=now,
+                status__earliest_warranty_end__lte=thirty_days_later,
+            )),
+            expired=Count('pk', filter=Q(status__earliest_warranty_end__lte=now)),
+        )
+
+    return cached_stats('warranty', user, compute)
+
+
+def service_stats(user, company_filter):
+    """Servis takip kartları: total, pending, due_soon, overdue, completed"""
+    from .models import Installation
+
+    def compute():
+        now = timezone.now()
+        seven_days_later = now + timedelta(days=7)
+        return Installation.objects.filter(company_filter).aggregate(
+            total=Count('pk', filter=Q(status__next_service_date__isnull=False)),
+            pending=Count('pk', filter=Q(status__next_service_date__gt=now)),
+            due_soon=Count('pk', filter=Q(
+                status__next_service_date__gt=now,
+                status__next_service_date__lte=seven_days_later,
+            )),
+            overdue=Count('pk', filter=Q(status__next_service_date__lte=now)),
+            completed=Count('pk', filter=Q(status__last_completed_service__isnull=False)),
+        )
+
+    return cached_stats('service', user, compute)
@@ -1,3 +1,973 @@
-from django.test import TestCase
+import csv
+import os
+import re
+import socket
+import stat
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.scope import AccessScope
+from custom_user.permissions import get_company_queryset_for_user
+from customer.models import Company, ContactPerson, WorkingHours
+from item_master.models import InventoryItem, ItemMaster
+
+from .exports import SERVICE_EXPORT_HEADER, WARRANTY_EXPORT_HEADER, warranty_status
+from .mail_delivery import BatchMailer
+from .management.commands.run_pdf_renderer import Command as RunPdfRendererCommand
+from .management.commands.send_service_due_notifications import Command as ServiceDueCommand
+from .models import (
+    Installation, InstallationStatus, MaintenanceRecord, NotificationOutbox, SentServiceNotification,
+    ServiceFollowUp, WarrantyFollowUp,
+)
+from .pagination import KeysetPaginator, decode_cursor, encode_cursor
+from .pdf import service_authkey
+from .recalculation import recalculate_followup_dates
+from .recipients import RecipientResolver
+from .stats import service_stats, warranty_stats
+from .utils import (
+    get_user_accessible_companies, get_user_accessible_companies_filter, get_user_accessible_companies_subquery,
+)
+from .views import service_tracking_queryset, warranty_tracking_queryset
+
+
+class QueryPlanTests(TestCase):
+    """
+    Takip, dashboard ve bildirim kodundaki sık çalışan sorguların EXPLAIN
+    çıktısını kontrol eder: izlenen tablolar indeks üzerinden okunmalı,
+    tam tablo taramasına (full scan) dönmemeli.
+
+    Boş test veritabanında PostgreSQL planlayıcısı her zaman Seq Scan
+    seçeceği için ``enable_seqscan`` kapatılır; indeks kullanılabiliyorsa
+    plan indeksli olur, kullanılamıyorsa yine Seq Scan görünür.
+    """
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}', params)
+            elif connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            else:
+                self.skipTest(f'EXPLAIN check not implemented for {connection.vendor}')
+            rows = cursor.fetchall()
+        # SQLite: (id, parent, notused, detail); PostgreSQL: (line,)
+        return [str(row[-1]) for row in rows]
+
+    def full_scans(self, plan, table):
+        if connection.vendor == 'postgresql':
+            return [line for line in plan if f'Seq Scan on {table}' in line]
+        # SQLite: "SEARCH tablo USING INDEX ..." aralık okuması; "SCAN tablo"
+        # (USING INDEX ile de olsa) tablonun ya da indeksin tamamını okur
+        return [line for line in plan if re.match(rf'SCAN {table}\b', line)]
+
+    def assertNoFullScan(self, queryset, *models):
+        plan = self.explain(queryset)
+        for model in models:
+            table = model._meta.db_table
+            scans = self.full_scans(plan, table)
+            self.assertFalse(
+                scans,
+                f'{table} tam taranıyor:\n' + '\n'.join(plan)
+            )
+
+    # Dashboard
+
+    def test_dashboard_expiring_warranties(self):
+        now = timezone.now()
+        queryset = WarrantyFollowUp.objects.filter(
+            end_of_warranty_date__gt=now,
+            end_of_warranty_date__lte=now + timedelta(days=30)
+        ).order_by()
+        self.assertNoFullScan(queryset, WarrantyFollowUp)
+
+    def test_dashboard_overdue_services(self):
+        queryset = ServiceFollowUp.objects.filter(
+            is_completed=False,
+            next_service_date__lte=timezone.now()
+        ).order_by()
+        self.assertNoFullScan(queryset, ServiceFollowUp)
+
+    def test_dashboard_breakdown_analysis(self):
+        queryset = MaintenanceRecord.objects.filter(
+            maintenance_type='breakdown',
+            service_date__gte=timezone.now() - timedelta(days=90)
+        ).order_by()
+        self.assertNoFullScan(queryset, MaintenanceRecord)
+
+    # Bildirimler
+
+    def test_service_due_notification_candidates(self):
+        today = timezone.localdate()
+        windows = (1, 7, 30)
+        queryset = ServiceFollowUp.objects.filter(
+            next_service_date__in=[today + timedelta(days=days) for days in windows],
+            is_completed=False
+        ).order_by()
+        self.assertNoFullScan(queryset, ServiceFollowUp)
+
+    def test_service_due_notification_ledger(self):
+        queryset = SentServiceNotification.objects.filter(
+            service_followup_id__in=[1, 2, 3],
+            window__in=[1, 7, 30]
+        ).order_by()
+        self.assertNoFullScan(queryset, SentServiceNotification)
+
+    # Takip listeleri
+
+    def test_warranty_tracking_expiring_soon(self):
+        queryset = warranty_tracking_queryset(Q(), 'expiring_soon')
+        self.assertNoFullScan(queryset, InstallationStatus)
+
+    def test_service_tracking_overdue(self):
+        queryset, ordering = service_tracking_queryset(Q(), 'overdue')
+        self.assertNoFullScan(queryset.order_by(*ordering), InstallationStatus)
+
+    def test_installation_status_subqueries(self):
+        queryset = InstallationStatus.annotated_installations(
+            Installation.objects.filter(pk=1)
+        )
+        self.assertNoFullScan(queryset, WarrantyFollowUp, ServiceFollowUp, MaintenanceRecord)
+
+    # Envanter
+
+    def test_inventory_item_serial_lookup(self):
+        queryset = InventoryItem.objects.filter(serial_no='ABC-001', in_used=False).order_by()
+        self.assertNoFullScan(queryset, InventoryItem)
+
+
+class CompanyScopeQueryTests(TestCase):
+    """
+    Firma kapsamı filtresi IN listesi değil alt sorgudur: erişilen firma
+    sayısı artsa da SQL metni ve parametre sayısı değişmez.
+    """
+
+    def setUp(self):
+        self.distributor = Company.objects.create(name='Distributor', company_type='distributor')
+        self.user = get_user_model().objects.create_user(
+            username='scope', password='scope', company=self.distributor, role='manager_distributor'
+        )
+
+    def add_customers(self, count, parent=None):
+        parent = parent or self.distributor
+        start = Company.objects.count()
+        return [
+            Company.objects.create(name=f'Customer {start + index}', company_type='enduser', related_company=parent)
+            for index in range(count)
+        ]
+
+    def compiled(self, model_type):
+        # Her ölçümde yeni kullanıcı nesnesi: istek bazlı memo kullanılmaz
+        user = get_user_model().objects.get(pk=self.user.pk)
+        model = Installation if model_type == 'installation' else WarrantyFollowUp
+        return model.objects.filter(get_user_accessible_companies_filter(user, model_type)).query.sql_with_params()
+
+    def test_query_size_is_constant(self):
+        for model_type in ('installation', 'warranty'):
+            self.add_customers(1)
+            small_sql, small_params = self.compiled(model_type)
+            self.add_customers(200)
+            large_sql, large_params = self.compiled(model_type)
+            self.assertEqual(small_sql, large_sql)
+            self.assertEqual(len(small_params), len(large_params))
+
+    def test_filter_is_built_without_queries(self):
+        user = get_user_model().objects.get(pk=self.user.pk)
+        with CaptureQueriesContext(connection) as context:
+            get_user_accessible_companies_filter(user, 'installation')
+            get_user_accessible_companies_filter(user, 'service')
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_same_companies_as_id_list(self):
+        customers = self.add_customers(3)
+        # Alt firmanın alt firması (her derinlik)
+        nested = self.add_customers(2, parent=customers[0])
+        Company.objects.create(name='Other', company_type='enduser')
+
+        user = get_user_model().objects.get(pk=self.user.pk)
+        expected = {self.distributor.pk, *(company.pk for company in customers + nested)}
+        self.assertEqual(set(get_user_accessible_companies(user)), expected)
+        self.assertEqual(
+            set(Company.objects.filter(
+                id__in=get_user_accessible_companies_subquery(user)
+            ).values_list('pk', flat=True)),
+            expected
+        )
+
+    def test_user_without_company_sees_nothing(self):
+        user = get_user_model().objects.create_user(username='nocompany', password='x')
+        self.assertEqual(get_user_accessible_companies(user), [])
+        self.assertFalse(Installation.objects.filter(get_user_accessible_companies_filter(user)).exists())
+
+
+@override_settings(COMPANY_SCOPE_CACHE_TIMEOUT=60)
+class AccessScopeTests(TestCase):
+    """
+    Rol kuralı (firma listeleri) ve hiyerarşi kuralı (kayıtlar) tek scope
+    nesnesinden gelir; cache'lenen id listeleri sürüm artınca yenilenir.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.main = Company.objects.create(name='Main', company_type='main')
+        self.distributor = Company.objects.create(
+            name='Distributor', company_type='distributor', related_company=self.main
+        )
+        self.customer = Company.objects.create(
+            name='Customer', company_type='enduser', related_company=self.distributor
+        )
+        self.nested = Company.objects.create(
+            name='Nested', company_type='enduser', related_company=self.customer
+        )
+
+    def scope(self, user):
+        # Her seferinde yeni kullanıcı nesnesi: istek bazlı memo kullanılmaz
+        return AccessScope.for_user(get_user_model().objects.get(pk=user.pk))
+
+    def create_user(self, role, company=None):
+        return get_user_model().objects.create_user(username=role, password='x', role=role, company=company)
+
+    def test_role_rules(self):
+        manager = self.create_user('manager_main', self.main)
+        sales = self.create_user('salesmanager_main', self.main)
+        distributor = self.create_user('service_distributor', self.distributor)
+        Company.objects.filter(pk=self.distributor.pk).update(related_manager=sales)
+
+        everything = set(Company.objects.values_list('pk', flat=True))
+        self.assertEqual(set(self.scope(manager).companies().values_list('pk', flat=True)), everything)
+        self.assertIsNone(self.scope(manager).visible_company_ids)
+        # Yönetilen firma ve doğrudan alt firmaları
+        self.assertEqual(set(self.scope(sales).visible_company_ids), {self.distributor.pk, self.customer.pk})
+        self.assertEqual(
+            set(get_company_queryset_for_user(distributor).values_list('pk', flat=True)),
+            {self.distributor.pk, self.customer.pk}
+        )
+        self.assertEqual(AccessScope(AnonymousUser()).visible_company_ids, [])
+
+    def test_record_querysets_follow_hierarchy(self):
+        user = self.create_user('manager_distributor', self.distributor)
+        scope = self.scope(user)
+        with CaptureQueriesContext(connection) as context:
+            querysets = [scope.installations(), scope.followups('warranty'), scope.followups(), scope.maintenance()]
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual(
+            [queryset.model for queryset in querysets],
+            [Installation, WarrantyFollowUp, ServiceFollowUp, MaintenanceRecord]
+        )
+        self.assertEqual(set(scope.company_ids), {self.distributor.pk, self.customer.pk, self.nested.pk})
+
+    def test_cached_ids_are_invalidated(self):
+        sales = self.create_user('salesmanager_main', self.main)
+        distributor = self.create_user('manager_distributor', self.distributor)
+        self.assertEqual(self.scope(sales).visible_company_ids, [])
+        self.assertEqual(len(self.scope(distributor).company_ids), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.main.related_manager = sales
+            self.main.save()
+        self.assertEqual(set(self.scope(sales).visible_company_ids), {self.main.pk, self.distributor.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Company.objects.create(name='New', company_type='enduser', related_company=self.nested)
+        self.assertEqual(len(self.scope(distributor).company_ids), 4)
+
+        # Sürüm değişmediyse cache'den okunur
+        with CaptureQueriesContext(connection) as context:
+            self.scope(distributor).company_ids
+        self.assertEqual(
+            [query['sql'] for query in context.captured_queries if 'customer_companyancestry' in query['sql']], []
+        )
+
+
+class InstallationStatusTests(TestCase):
+    """
+    Durum tablosu migration'da geçmiş modellerle doldurulur; sinyallerden
+    bağımsız olarak mevcut kurulumların satırlarını oluşturmalıdır.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='status', password='x')
+        self.customer = Company.objects.create(name='Customer', company_type='enduser')
+        item = ItemMaster.objects.create(shortcode='ST', name='Status Item', slug='status-item')
+        self.installation = Installation.objects.create(
+            user=self.user,
+            customer=self.customer,
+            inventory_item=InventoryItem.objects.create(name=item, serial_no='ST-1'),
+        )
+        today = timezone.localdate()
+        self.service = ServiceFollowUp.objects.create(
+            installation=self.installation, service_type='time', service_value=3,
+            next_service_date=today + timedelta(days=10)
+        )
+        ServiceFollowUp.objects.create(
+            installation=self.installation, service_type='time', service_value=6,
+            next_service_date=today + timedelta(days=40)
+        )
+
+    def test_rebuild_with_historical_models(self):
+        InstallationStatus.objects.all().delete()
+        apps = MigrationLoader(connection).project_state(
+            ('warranty_and_services', '0019_installationstatus')
+        ).apps
+
+        self.assertEqual(InstallationStatus.rebuild(apps=apps), 1)
+        status = InstallationStatus.objects.get(installation=self.installation)
+        self.assertEqual(status.critical_service_id, self.service.pk)
+        self.assertEqual(status.next_service_date, self.service.next_service_date)
+
+
+class FlakyEmailBackend(EmailBackend):
+    """locmem backend'i; ``failing`` adreslerine giden mesajlar gönderilemez"""
+    failing = set()
+
+    def send_messages(self, messages):
+        if any(set(message.to) & self.failing for message in messages):
+            raise ConnectionError('recipient refused')
+        return super().send_messages(messages)
+
+
+class DroppingEmailBackend(EmailBackend):
+    """``failing`` adreslerine giden mesajları hata vermeden göndermez"""
+    failing = set()
+
+    def send_messages(self, messages):
+        return super().send_messages([message for message in messages if not set(message.to) & self.failing])
+
+
+class BatchMailerTests(TestCase):
+    """Bir mesajın hatası gönderilmiş mesajları başarısız saydırmaz"""
+
+    def setUp(self):
+        FlakyEmailBackend.failing = DroppingEmailBackend.failing = {'b@example.com'}
+        self.messages = [
+            mail.EmailMessage('Subject', 'Body', 'from@example.com', [address])
+            for address in ('a@example.com', 'b@example.com', 'c@example.com')
+        ]
+
+    def send(self, backend):
+        mailer = BatchMailer(batch_size=3, concurrency=1, backend=f'warranty_and_services.tests.{backend}')
+        return mailer.send(self.messages)
+
+    def test_error_fails_only_that_message(self):
+        report = self.send('FlakyEmailBackend')
+        self.assertEqual((report.sent, report.failed), (2, 1))
+        self.assertEqual(report.failed_messages, [self.messages[1]])
+        self.assertEqual([message.to for message in mail.outbox], [['a@example.com'], ['c@example.com']])
+
+    def test_unsent_message_without_error_is_failed(self):
+        report = self.send('DroppingEmailBackend')
+        self.assertEqual((report.sent, report.failed), (2, 1))
+        self.assertEqual(report.failed_messages, [self.messages[1]])
+
+    def test_worker_reuses_one_connection(self):
+        FlakyEmailBackend.failing = set()
+        mailer = BatchMailer(batch_size=2, concurrency=1, backend='warranty_and_services.tests.FlakyEmailBackend')
+        with mock.patch.object(FlakyEmailBackend, 'open', autospec=True, return_value=True) as open_connection:
+            report = mailer.send(self.messages * 2)
+        self.assertEqual((report.sent, len(report.batches)), (6, 3))
+        self.assertEqual(open_connection.call_count, 1)
+
+
+@override_settings(EMAIL_BACKEND='warranty_and_services.tests.FlakyEmailBackend')
+class ServiceDueNotificationTests(TestCase):
+    """
+    send_service_due_notifications: gönderilen hatırlatmalar deftere yazılır,
+    tekrar çalıştırma göndermez; gönderilemeyen ya da hazırlanamayan e-postalar
+    defterden silinip sonraki çalıştırmada alıcısına tekrar gönderilir.
+    """
+
+    def setUp(self):
+        FlakyEmailBackend.failing = set()
+        user = get_user_model().objects.create_user(username='notify', password='x')
+        self.customer = Company.objects.create(
+            name='Customer', company_type='enduser', email='customer@example.com'
+        )
+        ContactPerson.objects.create(company=self.customer, full_name='Contact', email='contact@example.com')
+        item = ItemMaster.objects.create(shortcode='SN', name='Notify Item', slug='notify-item')
+        self.installation = Installation.objects.create(
+            user=user,
+            customer=self.customer,
+            inventory_item=InventoryItem.objects.create(name=item, serial_no='SN-1'),
+        )
+        self.followup = ServiceFollowUp.objects.create(
+            installation=self.installation, service_type='time', service_value=6,
+            next_service_date=timezone.now().date() + timedelta(days=7)
+        )
+
+    def run_command(self, *args):
+        call_command('send_service_due_notifications', '--days', '7', '--concurrency', '1', *args, stdout=StringIO())
+
+    def ledger(self):
+        return set(SentServiceNotification.objects.values_list('recipient', flat=True))
+
+    def sent_to(self):
+        return sorted(address for message in mail.outbox for address in message.to)
+
+    def test_rerun_sends_nothing(self):
+        self.run_command()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(self.ledger(), {'customer@example.com', 'contact@example.com'})
+
+        self.run_command()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_digest_recipient_is_retried(self):
+        FlakyEmailBackend.failing = {'contact@example.com'}
+        self.run_command('--digest', '--batch-size', '1')
+        self.assertEqual(self.sent_to(), ['customer@example.com'])
+        self.assertEqual(self.ledger(), {'customer@example.com'})
+
+        # Diğer alıcının satırı kalsa da başarısız alıcı tekrar seçilir
+        FlakyEmailBackend.failing = set()
+        self.run_command('--digest', '--batch-size', '1')
+        self.assertEqual(self.sent_to(), ['contact@example.com', 'customer@example.com'])
+        self.assertEqual(self.ledger(), {'customer@example.com', 'contact@example.com'})
+
+    def test_unbuilt_notifications_are_released(self):
+        with mock.patch.object(ServiceDueCommand, 'build_service_notification', return_value=None):
+            self.run_command()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(self.ledger(), set())
+
+        self.run_command()
+        self.assertEqual(self.sent_to(), ['contact@example.com', 'customer@example.com'])
+
+    def test_unbuilt_digest_is_released(self):
+        with mock.patch('warranty_and_services.management.commands.send_service_due_notifications.render_to_string',
+                        side_effect=ValueError('template error')):
+            self.run_command('--digest')
+        self.assertEqual(self.ledger(), set())
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor ile ileri/geri gezinme; bozuk cursor ilk sayfa sayılır"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='keyset', password='x')
+        customer = Company.objects.create(name='Customer', company_type='enduser')
+        item = ItemMaster.objects.create(shortcode='KS', name='Keyset Item', slug='keyset-item')
+        today = timezone.localdate()
+        # Aynı tarihte iki kurulum: id ikinci anahtar
+        self.installations = [
+            Installation.objects.create(
+                user=user,
+                customer=customer,
+                inventory_item=InventoryItem.objects.create(name=item, serial_no=f'KS-{index}'),
+                setup_date=today - timedelta(days=days),
+            )
+            for index, days in enumerate((0, 1, 1, 2, 3))
+        ]
+        self.paginator = KeysetPaginator(Installation.objects.all(), 2, ('-setup_date', '-id'))
+        self.expected = sorted(self.installations, key=lambda obj: (obj.setup_date, obj.id), reverse=True)
+
+    def test_round_trip(self):
+        first = self.paginator.page()
+        second = self.paginator.page(first.next_cursor)
+        third = self.paginator.page(second.next_cursor)
+        self.assertEqual(list(first) + list(second) + list(third), self.expected)
+        self.assertFalse(third.has_next())
+        self.assertTrue(second.has_previous())
+
+        self.assertEqual(list(self.paginator.page(second.previous_cursor)), list(first))
+        self.assertEqual(list(self.paginator.page(third.previous_cursor)), list(second))
+
+    def test_exact_count_is_not_marked_as_estimate(self):
+        paginator = KeysetPaginator(Installation.objects.all(), 2, ('-setup_date', '-id'), estimate_count=True)
+        request = RequestFactory().get('/warranty-services/installations/')
+        html = render_to_string('partials/keyset_pagination.html', {'page_obj': paginator.page()}, request)
+
+        # SQLite'ta sayı kesin COUNT'tur (kısa süre cache'lenir)
+        self.assertFalse(paginator.count_is_estimate)
+        self.assertEqual(paginator.count, 5)
+        self.assertNotIn('~', html)
+        self.assertIn('<span class="font-medium">5</span>', html)
+
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertTrue(paginator.count_is_estimate)
+
+    def test_cursor_values_are_converted(self):
+        cursor = self.paginator.page().next_cursor
+        values, backwards = decode_cursor(cursor, self.paginator.fields)
+        self.assertEqual(values, self.paginator.key_of(self.expected[1]))
+        self.assertFalse(backwards)
+
+    def test_tampered_cursor_returns_first_page(self):
+        first = list(self.paginator.page())
+        for cursor in (
+            'not-a-cursor',
+            encode_cursor(['2025-02-30', 5]),
+            encode_cursor(['yesterday', 5]),
+            encode_cursor([str(timezone.localdate()), 'five']),
+            encode_cursor([str(timezone.localdate())]),
+            encode_cursor([None, 5]),
+            encode_cursor({'a': 1}),
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(list(self.paginator.page(cursor)), first)
+
+
+class PdfRenderServiceAuthTests(TestCase):
+    """Render servisi TCP'de açık bir anahtar ister; SECRET_KEY kullanılmaz"""
+
+    def test_tcp_address_requires_authkey(self):
+        with self.settings(PDF_RENDER_SERVICE_ADDRESS='0.0.0.0:8765'):
+            with self.assertRaises(ImproperlyConfigured):
+                service_authkey()
+            with self.settings(PDF_RENDER_SERVICE_AUTHKEY='render-key'):
+                self.assertEqual(service_authkey(), b'render-key')
+
+    def test_unix_socket_without_authkey(self):
+        self.assertIsNone(service_authkey('/run/gvs/pdf.sock'))
+
+    @skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix sockets not supported')
+    def test_unix_socket_is_private_when_bound(self):
+        with tempfile.TemporaryDirectory() as directory:
+            address = os.path.join(directory, 'pdf.sock')
+            with RunPdfRendererCommand().listen(address, None):
+                self.assertEqual(stat.S_IMODE(os.stat(address).st_mode), 0o600)
+
+
+class RecipientResolverTests(TestCase):
+    """
+    Alıcı listeleri firma bazında cache'lenir; firma, iletişim kişisi veya
+    kullanıcı değiştiğinde sinyallerle geçersiz kılınır ve sonraki çözüm
+    yeni değeri görür.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.resolver = RecipientResolver()
+        self.customer = Company.objects.create(name='Customer', company_type='enduser', email='info@customer.test')
+        self.contact = ContactPerson.objects.create(
+            company=self.customer, full_name='Contact', email='contact@customer.test'
+        )
+        self.main = Company.objects.create(name='Main', company_type='main')
+        self.technician = get_user_model().objects.create_user(
+            username='technician', password='x', email='tech@main.test', role='service_main', company=self.main
+        )
+        self.manager = get_user_model().objects.create_user(
+            username='manager', password='x', email='manager@main.test', role='manager_main', company=self.main
+        )
+
+    def resolve(self):
+        return self.resolver.resolve(self.customer.pk, self.technician)
+
+    def test_resolution_is_cached(self):
+        expected = {'info@customer.test', 'contact@customer.test', 'tech@main.test', 'manager@main.test'}
+        self.assertEqual(self.resolve(), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolve(), expected)
+        self.assertEqual(self.resolver.stats()['hits'], 2)
+
+    def test_contact_and_company_changes_invalidate(self):
+        self.resolve()
+        self.contact.email = 'new-contact@customer.test'
+        self.contact.save()
+        self.assertIn('new-contact@customer.test', self.resolve())
+        self.assertNotIn('contact@customer.test', self.resolve())
+
+        self.customer.email = 'office@customer.test'
+        self.customer.save()
+        self.assertIn('office@customer.test', self.resolve())
+
+        ContactPerson.objects.create(company=self.customer, full_name='Second', email='second@customer.test')
+        self.assertIn('second@customer.test', self.resolve())
+
+    def test_user_changes_invalidate_staff(self):
+        self.resolve()
+        self.manager.email = 'boss@main.test'
+        self.manager.save()
+        self.assertIn('boss@main.test', self.resolve())
+
+        # Başka firmaya taşınan kullanıcı önceki firmanın listesinden çıkar
+        self.manager.company = self.customer
+        self.manager.save()
+        self.assertNotIn('boss@main.test', self.resolve())
+
+    def test_login_does_not_invalidate(self):
+        self.resolve()
+        self.manager.last_login = timezone.now()
+        self.manager.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            self.resolve()
+
+
+class TrackingStatsTests(TestCase):
+    """
+    İstatistik kartları tek aggregate sorgusuyla hesaplanır, scope bazında
+    cache'lenir ve takip değişikliklerinde geçersiz kılınır.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='stats', password='x')
+        customer = Company.objects.create(name='Customer', company_type='enduser')
+        item = ItemMaster.objects.create(shortcode='TS', name='Stats Item', slug='stats-item')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.installation = Installation.objects.create(
+                user=self.user, customer=customer,
+                inventory_item=InventoryItem.objects.create(name=item, serial_no='TS-1'),
+            )
+
+    def test_single_aggregate_query(self):
+        with self.assertNumQueries(1):
+            stats = warranty_stats(self.user, Q())
+        self.assertEqual(stats, {'total': 1, 'active': 1, 'expiring_soon': 0, 'expired': 0})
+        with self.assertNumQueries(1):
+            stats = service_stats(self.user, Q())
+        self.assertEqual(stats['total'], 1)
+        self.assertEqual(stats['pending'], 1)
+
+    def test_cached_value_is_served(self):
+        warranty_stats(self.user, Q())
+        # update() sinyal göndermez: cache'teki değer dönmeye devam eder
+        InstallationStatus.objects.update(earliest_warranty_end=timezone.localdate() - timedelta(days=1))
+        with self.assertNumQueries(0):
+            stats = warranty_stats(self.user, Q())
+        self.assertEqual(stats['active'], 1)
+
+    def test_followup_change_invalidates(self):
+        self.assertEqual(service_stats(self.user, Q())['overdue'], 0)
+        followup = ServiceFollowUp.objects.filter(installation=self.installation).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            followup.next_service_date = timezone.localdate() - timedelta(days=1)
+            followup.save()
+        self.assertEqual(service_stats(self.user, Q())['overdue'], 1)
+
+
+class TrackingExportTests(TestCase):
+    """
+    Takip listesi dışa aktarımı: CSV ve XLSX akış halinde (StreamingHttpResponse)
+    döner; başlık ve satırlar listedeki kayıtlarla aynıdır.
+    """
+
+    def setUp(self):
+        main = Company.objects.create(name='Main', company_type='main')
+        distributor = Company.objects.create(name='Distributor', company_type='distributor', related_company=main)
+        customer = Company.objects.create(name='Customer', company_type='enduser', related_company=distributor)
+        user = get_user_model().objects.create_user(username='export', password='x', role='manager_main', company=main)
+        item = ItemMaster.objects.create(shortcode='EX', name='Export Item', slug='export-item')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.installation = Installation.objects.create(
+                user=user, customer=customer, setup_date=date(2026, 1, 15),
+                inventory_item=InventoryItem.objects.create(name=item, serial_no='EX-1'),
+            )
+        self.warranty = WarrantyFollowUp.objects.get(installation=self.installation)
+        self.client.force_login(user)
+
+    def export(self, name, file_format, **params):
+        response = self.client.get(
+            reverse(f'warranty_and_services:{name}'), {'format': file_format, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return response
+
+    def test_warranty_csv(self):
+        response = self.export('warranty_tracking_export', 'csv')
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertRegex(response['Content-Disposition'], r'^attachment; filename="warranty_tracking_\d{8}\.csv"$')
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeff'))
+        header, *rows = list(csv.reader(StringIO(content.lstrip('\ufeff'))))
+        self.assertEqual(header, [str(column) for column in WARRANTY_EXPORT_HEADER])
+        self.assertEqual(rows, [[
+            'Customer', 'Distributor', 'Export Item', 'EX-1',
+            self.warranty.get_warranty_type_display(), '6', '2026-01-15',
+            self.warranty.end_of_warranty_date.isoformat(), str(self.warranty.days_remaining),
+            str(warranty_status(self.warranty)),
+        ]])
+
+    def test_service_csv(self):
+        response = self.export('service_tracking_export', 'csv')
+
+        content = b''.join(response.streaming_content).decode('utf-8').lstrip('\ufeff')
+        header, *rows = list(csv.reader(StringIO(content)))
+        self.assertEqual(header, [str(column) for column in SERVICE_EXPORT_HEADER])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][:4], ['Customer', 'Distributor', 'Export Item', 'EX-1'])
+        self.assertEqual(rows[0][6:10], ['0', '0', '0', '2026-01-15'])
+
+    def test_warranty_xlsx(self):
+        from openpyxl import load_workbook
+
+        response = self.export('warranty_tracking_export', 'xlsx')
+
+        self.assertEqual(
+            response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        self.assertTrue(response['Content-Disposition'].endswith('.xlsx"'))
+        worksheet = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        header, row = list(worksheet.iter_rows(values_only=True))
+        self.assertEqual(worksheet.title, 'warranty_tracking')
+        self.assertEqual(list(header), [str(column) for column in WARRANTY_EXPORT_HEADER])
+        self.assertEqual(row[:4], ('Customer', 'Distributor', 'Export Item', 'EX-1'))
+        self.assertEqual(row[6].date(), date(2026, 1, 15))
+
+    def test_unsupported_format(self):
+        response = self.client.get(reverse('warranty_and_services:warranty_tracking_export'), {'format': 'pdf'})
+        self.assertEqual(response.status_code, 404)
+
+
+class FollowUpRecalculationTests(TestCase):
+    """
+    Çalışma saati değişince working_hours takiplerinin tarihleri kurulum
+    sayısından bağımsız sabit sayıda sorguyla yeniden hesaplanır.
+    """
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='recalc', password='x')
+        self.customer = Company.objects.create(name='Customer', company_type='enduser')
+        WorkingHours.objects.create(customer=self.customer, daily_working_hours=8)  # 40 saat/hafta
+        item = ItemMaster.objects.create(shortcode='RC', name='Recalc Item', slug='recalc-item')
+        self.installations = [
+            Installation.objects.create(
+                user=user, customer=self.customer, setup_date=date(2026, 1, 1),
+                inventory_item=InventoryItem.objects.create(name=item, serial_no=f'RC-{index}'),
+            )
+            for index in range(3)
+        ]
+        for installation in self.installations:
+            warranty = WarrantyFollowUp(installation=installation, warranty_type='working_hours', warranty_value=2000)
+            warranty.end_of_warranty_date = warranty.calculate_warranty_end_date()
+            warranty.save()
+
+    def dates(self, model, date_field, type_field):
+        return set(model.objects.filter(**{type_field: 'working_hours'}).values_list(date_field, flat=True))
+
+    def test_dates_follow_working_hours(self):
+        setup_date = date(2026, 1, 1)
+        self.assertEqual(self.dates(WarrantyFollowUp, 'end_of_warranty_date', 'warranty_type'), {
+            setup_date + timedelta(days=2000 / 40 * 7)
+        })
+        time_term = set(ServiceFollowUp.objects.filter(service_type='time_term').values_list('pk', 'next_service_date'))
+
+        # update() sinyal göndermez: tarihler eski haftalık saatle kalır
+        WorkingHours.objects.filter(customer=self.customer).update(daily_working_hours=16)  # 80 saat/hafta
+        # id listesi + parça başına: kurulumlar, garantiler, bakımlar, servisler,
+        # iki bulk_update ve atomic savepoint'i
+        with self.assertNumQueries(9):
+            self.assertEqual(recalculate_followup_dates([self.customer.pk]), (3, 3))
+
+        self.assertEqual(self.dates(WarrantyFollowUp, 'end_of_warranty_date', 'warranty_type'), {
+            setup_date + timedelta(days=2000 / 80 * 7)
+        })
+        self.assertEqual(self.dates(ServiceFollowUp, 'next_service_date', 'service_type'), {
+            setup_date + timedelta(days=1000 / 80 * 7)
+        })
+        self.assertIn('80', WarrantyFollowUp.objects.filter(warranty_type='working_hours').first().calculation_notes)
+        self.assertEqual(
+            set(ServiceFollowUp.objects.filter(service_type='time_term').values_list('pk', 'next_service_date')),
+            time_term
+        )
+
+        # Değişen tarih yoksa bulk_update yazmaz
+        with self.assertNumQueries(7):
+            self.assertEqual(recalculate_followup_dates([self.customer.pk]), (0, 0))
+
+
+class FollowUpCreationTests(TestCase):
+    """
+    Toplu takip oluşturma tekrar çalıştırıldığında kopya üretmez ve yalnızca
+    gerçekten eklenen, pk'sı dolu takipleri döndürür.
+    """
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='followups', password='x')
+        customer = Company.objects.create(name='Customer', company_type='enduser')
+        item = ItemMaster.objects.create(shortcode='FU', name='Followup Item', slug='followup-item')
+        self.installations = [
+            Installation.objects.create(
+                user=user, customer=customer,
+                inventory_item=InventoryItem.objects.create(name=item, serial_no=f'FU-{index}'),
+            )
+            for index in range(2)
+        ]
+
+    def counts(self):
+        return WarrantyFollowUp.objects.count(), ServiceFollowUp.objects.count()
+
+    def test_creation_is_idempotent(self):
+        # Kurulum kaydı varsayılan takipleri oluşturdu: 1 garanti + 2 servis
+        self.assertEqual(self.counts(), (2, 4))
+        WarrantyFollowUp.objects.all().delete()
+        ServiceFollowUp.objects.all().delete()
+
+        warranties = WarrantyFollowUp.bulk_create_warranty_followups(self.installations)
+        services = ServiceFollowUp.bulk_create_service_followups(self.installations)
+        self.assertEqual(len(warranties), 2)
+        self.assertEqual(len(services), 4)
+        self.assertTrue(all(followup.pk for followup in warranties + services))
+
+        Installation.create_followups_for(self.installations)
+        self.assertEqual(self.counts(), (2, 4))
+        self.assertEqual(WarrantyFollowUp.bulk_create_warranty_followups(self.installations), [])
+
+    def test_only_missing_followups_are_returned(self):
+        missing = WarrantyFollowUp.objects.get(installation=self.installations[0])
+        missing.delete()
+
+        created = WarrantyFollowUp.bulk_create_warranty_followups(self.installations)
+
+        self.assertEqual(
+            [(followup.installation_id, followup.warranty_type, followup.warranty_value) for followup in created],
+            [(self.installations[0].pk, 'time_term', 6)]
+        )
+        self.assertIsNotNone(created[0].pk)
+        self.assertEqual(self.counts(), (2, 4))
+
+
+class DirtyFieldsTests(TestCase):
+    """save() yalnızca değişen kolonları yazar; ertelenen alanlar kaybolmaz"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='dirty', password='x')
+        self.customer = Company.objects.create(name='Customer', company_type='enduser')
+        self.other = Company.objects.create(name='Other', company_type='enduser')
+        item = ItemMaster.objects.create(shortcode='DF', name='Dirty Item', slug='dirty-item')
+        self.installation = Installation.objects.create(
+            user=user,
+            customer=self.customer,
+            inventory_item=InventoryItem.objects.create(name=item, serial_no='DF-1'),
+            installation_notes='first',
+        )
+
+    def reload(self):
+        return Installation.objects.get(pk=self.installation.pk)
+
+    def test_unchanged_instance_is_not_written(self):
+        installation = self.reload()
+        with CaptureQueriesContext(connection) as context:
+            installation.save()
+        self.assertFalse([query for query in context.captured_queries if query['sql'].startswith('UPDATE')])
+
+    def test_only_changed_fields_are_written(self):
+        installation = self.reload()
+        installation.installation_notes = 'second'
+        self.assertEqual(installation.get_dirty_fields(), {'installation_notes': 'first'})
+        Installation.objects.filter(pk=installation.pk).update(location_address='elsewhere')
+        installation.save()
+        stored = self.reload()
+        self.assertEqual((stored.installation_notes, stored.location_address), ('second', 'elsewhere'))
+
+    def test_assigned_deferred_field_is_saved(self):
+        installation = Installation.objects.only('pk', 'installation_notes').get(pk=self.installation.pk)
+        installation.customer = self.other
+        self.assertEqual(installation.get_dirty_fields(), {'customer': self.customer.pk})
+        installation.save()
+        self.assertEqual(self.reload().customer_id, self.other.pk)
+
+        installation = Installation.objects.defer('installation_notes').get(pk=self.installation.pk)
+        installation.installation_notes = 'deferred'
+        installation.save()
+        self.assertEqual(self.reload().installation_notes, 'deferred')
+
+    def test_loading_deferred_field_keeps_other_changes(self):
+        installation = Installation.objects.only('pk', 'customer').get(pk=self.installation.pk)
+        installation.customer = self.other
+        # Ertelenen alanı okumak (refresh_from_db) değişikliği saklı değer yapmamalı
+        self.assertEqual(installation.installation_notes, 'first')
+        self.assertTrue(installation.has_changed('customer'))
+        installation.save()
+        self.assertEqual(self.reload().customer_id, self.other.pk)
+
+
+@override_settings(EMAIL_BACKEND='warranty_and_services.tests.FlakyEmailBackend')
+class NotificationOutboxTests(TestCase):
+    """
+    Kurulum bildirimi kuyruğa yazılır; başarısız gönderim üstel geri çekilme
+    ile tekrar denenir, deneme hakkı bitince 'failed' olur.
+    """
+
+    def setUp(self):
+        FlakyEmailBackend.failing = set()
+        user = get_user_model().objects.create_user(username='outbox', password='x')
+        customer = Company.objects.create(name='Customer', company_type='enduser', email='customer@example.com')
+        item = ItemMaster.objects.create(shortcode='OB', name='Outbox Item', slug='outbox-item')
+        self.installation = Installation.objects.create(
+            user=user,
+            customer=customer,
+            inventory_item=InventoryItem.objects.create(name=item, serial_no='OB-1'),
+        )
+        self.entry = NotificationOutbox.objects.get(installation=self.installation)
+
+    def run_command(self):
+        call_command(
+            'process_notification_outbox', '--max-attempts', '3', '--retry-delay', '60', stdout=StringIO()
+        )
+        self.entry.refresh_from_db()
+
+    def test_enqueued_entry_is_sent(self):
+        self.assertEqual(self.entry.kind, 'installation')
+        self.run_command()
+        self.assertEqual(self.entry.status, 'sent')
+        self.assertIn('customer@example.com', mail.outbox[0].to)
+
+    def test_failed_delivery_backs_off_and_gives_up(self):
+        FlakyEmailBackend.failing = {'customer@example.com'}
+        started = timezone.now()
+        self.run_command()
+        self.assertEqual((self.entry.status, self.entry.attempts), ('pending', 1))
+        self.assertIn('recipient refused', self.entry.last_error)
+        self.assertGreaterEqual(self.entry.next_attempt_at, started + timedelta(seconds=60))
+
+        # Bekleme süresi dolmadan tekrar denenmez
+        self.run_command()
+        self.assertEqual(self.entry.attempts, 1)
+
+        NotificationOutbox.objects.filter(pk=self.entry.pk).update(next_attempt_at=timezone.now())
+        started = timezone.now()
+        self.run_command()
+        self.assertEqual((self.entry.status, self.entry.attempts), ('pending', 2))
+        self.assertGreaterEqual(self.entry.next_attempt_at, started + timedelta(seconds=120))
+
+        NotificationOutbox.objects.filter(pk=self.entry.pk).update(next_attempt_at=timezone.now())
+        self.run_command()
+        self.assertEqual((self.entry.status, self.entry.attempts), ('failed', 3))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_stale_processing_entry_is_requeued(self):
+        # Çöken worker: 'processing' durumunda kalmış kayıt
+        NotificationOutbox.objects.filter(pk=self.entry.pk).update(
+            status='processing', updated_at=timezone.now() - timedelta(hours=1)
+        )
+        self.run_command()
+        self.assertEqual(self.entry.status, 'sent')
+
+    def test_repeatedly_stale_entry_gives_up(self):
+        for attempt in range(1, 4):
+            # Kayıt her seferinde worker'ı çökertir
+            NotificationOutbox.objects.filter(pk=self.entry.pk).update(
+                status='processing', updated_at=timezone.now() - timedelta(hours=1)
+            )
+            with mock.patch.object(NotificationOutbox, 'prepare', side_effect=SystemExit):
+                try:
+                    self.run_command()
+                except SystemExit:
+                    pass
+            self.entry.refresh_from_db()
+            self.assertEqual(self.entry.attempts, attempt)
+        # Üçüncü bayat kayıt deneme hakkını bitirdi; işlenmeden 'failed' olur
+        self.assertEqual(self.entry.status, 'failed')
+        self.assertIn('Worker stopped', self.entry.last_error)
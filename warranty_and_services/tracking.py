@@ -0,0 +1,115 @@
+"""
+Değişen alan (dirty field) takibi.
+
+Model veritabanından yüklenirken alan değerlerinin bir kopyası saklanır.
+Böylece kaydetmeden önce eski satırı tekrar okumaya gerek kalmaz ve
+``save()`` yalnızca değişen kolonları yazar.
+"""
+
+
+class DirtyFieldsMixin:
+    """
+    Yüklenen değerleri saklayan model mixin'i.
+
+    - ``get_dirty_fields()``: {alan adı: yüklendiğindeki değer}
+    - ``has_changed(name)``: alan yüklendikten sonra değişti mi
+    - ``loaded_value(name)``: alanın yüklendiğindeki değeri
+
+    Mevcut bir kayıt ``update_fields`` verilmeden kaydedilirse sadece değişen
+    alanlar (ve auto_now alanları) yazılır; hiçbir alan değişmediyse
+    veritabanına gidilmez.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._take_snapshot()
+        return instance
+
+    def _take_snapshot(self, attnames=None):
+        deferred = self.get_deferred_fields()
+        snapshot = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred and (attnames is None or field.attname in attnames)
+        }
+        if attnames is None or not self.has_snapshot():
+            self._loaded_values = snapshot
+        else:
+            self._loaded_values.update(snapshot)
+
+    def _complete_snapshot(self):
+        """
+        ``only()`` / ``defer()`` ile ertelenip sonradan atanan alanların
+        saklı değeri yoktur; eski değerleri tek sorguyla okunur.
+        """
+        deferred = self.get_deferred_fields()
+        missing = [
+            field.attname for field in self._meta.concrete_fields
+            if field.attname not in self._loaded_values and field.attname not in deferred
+        ]
+        if not missing or self.pk is None:
+            return
+        old_values = type(self)._base_manager.using(self._state.db).filter(pk=self.pk).values(*missing).first()
+        if old_values is not None:
+            self._loaded_values.update(old_values)
+
+    def has_snapshot(self):
+        return hasattr(self, '_loaded_values')
+
+    def loaded_value(self, name):
+        field = self._meta.get_field(name)
+        return self._loaded_values.get(field.attname)
+
+    def get_dirty_fields(self):
+        """Yüklendikten sonra değişen alanlar: {alan adı: eski değer}"""
+        if not self.has_snapshot():
+            return {}
+        self._complete_snapshot()
+        dirty = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in self._loaded_values:
+                old_value = self._loaded_values[field.attname]
+                if getattr(self, field.attname) != old_value:
+                    dirty[field.name] = old_value
+        return dirty
+
+    def has_changed(self, name):
+        return name in self.get_dirty_fields()
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        # Ertelenen alan okunduğunda yalnızca o alan saklanır; diğer alanlardaki
+        # kaydedilmemiş değişiklikler kaybolmaz
+        self._take_snapshot(
+            None if fields is None else {self._meta.get_field(name).attname for name in fields}
+        )
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and self.has_snapshot()
+            and kwargs.get('update_fields') is None
+            and not args
+            and not kwargs.get('force_insert')
+        ):
+            dirty = self.get_dirty_fields()
+            if self._meta.pk.name in dirty:
+                # PK değişti - tam kayıt
+                dirty = None
+            if dirty is not None:
+                auto_now = [
+                    field.name for field in self._meta.concrete_fields
+                    if getattr(field, 'auto_now', False)
+                ]
+                # Boş liste: Django hiçbir şey yazmaz
+                kwargs['update_fields'] = list(dirty) + auto_now if dirty else []
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or not self.has_snapshot():
+            self._take_snapshot()
+        else:
+            # Sadece yazılan alanların saklı değeri güncellenir
+            for name in update_fields:
+                attname = self._meta.get_field(name).attname
+                self._loaded_values[attname] = getattr(self, attname)
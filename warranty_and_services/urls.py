@@ -39,10 +39,12 @@ urlpatterns = [
     
     # Warranty tracking
     path('warranty-tracking/', views.warranty_tracking_list, name='warranty_tracking_list'),
+    path('warranty-tracking/export/', views.warranty_tracking_export, name='warranty_tracking_export'),
     path('warranty/<int:warranty_id>/', views.warranty_detail, name='warranty_detail'),
     
     # Service tracking
     path('service-tracking/', views.service_tracking_list, name='service_tracking_list'),
+    path('service-tracking/export/', views.service_tracking_export, name='service_tracking_export'),
     path('service/<int:service_id>/', views.service_detail, name='service_detail'),
     path('item/<int:installation_id>/service-history/', views.item_service_history, name='item_service_history'),
     
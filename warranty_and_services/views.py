@@ -2,54 +2,48 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView
-from django.db.models import Q, Count, Case, When, IntegerField
+from django.db.models import Q, F, Count, Case, When, IntegerField, Value, DateField
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 import json
-from datetime import datetime, timedelta
-from .models import Installation, WarrantyFollowUp, ServiceFollowUp, InstallationImage, InstallationDocument, MaintenanceRecord
+from datetime import date, datetime, timedelta
+from .models import Installation, WarrantyFollowUp, ServiceFollowUp, InstallationImage, InstallationDocument, NotificationOutbox
 from .utils import get_user_accessible_companies_filter
+from .stats import warranty_stats, service_stats
+from .pagination import paginate, keyset_enabled
+from .exports import (
+    export_response, WARRANTY_EXPORT_HEADER, SERVICE_EXPORT_HEADER,
+    warranty_export_rows, service_export_rows
+)
+from core.search import search_filter, search_ranked
 
 
-@login_required
-def warranty_tracking_list(request):
+def warranty_tracking_queryset(company_filter, filter_type='all', search_query=''):
     """
-    Warranty takip listesi - her ürün için en yakın garanti bitiş tarihini gösterir
+    Garanti takip listesi ve dışa aktarımı için ortak queryset: erişim kapsamı,
+    arama ve tarih filtreleri uygulanmış, (earliest_warranty_date, id) sıralı
     """
-    # Filtreler
-    filter_type = request.GET.get('filter', 'all')
-    search_query = request.GET.get('search', '')
-    
-    # Base queryset - user'ın erişebileceği şirketlere göre filtrele
-    company_filter = get_user_accessible_companies_filter(request.user, 'installation')
-    
-    # Her installation için en yakın garanti bitiş tarihini bul
-    from django.db.models import Min, Max
-    
+    # En yakın garanti bitiş tarihi ve en kritik garanti kaydı InstallationStatus
+    # tablosundan okunur (follow-up'lar üzerinde Min() hesaplanmaz)
     installations_with_warranty = Installation.objects.select_related(
-        'customer',
+        'customer__related_company',
         'inventory_item__name',
-        'user'
-    ).prefetch_related(
-        'warranty_followups'
+        'user',
+        'status__critical_warranty'
     ).filter(company_filter).annotate(
-        earliest_warranty_date=Min('warranty_followups__end_of_warranty_date'),
-        latest_warranty_date=Max('warranty_followups__end_of_warranty_date')
+        earliest_warranty_date=F('status__earliest_warranty_end'),
+        latest_warranty_date=F('status__latest_warranty_end')
     ).exclude(
         earliest_warranty_date__isnull=True
-    ).order_by('earliest_warranty_date')
+    ).order_by('earliest_warranty_date', 'id')
     
-    # Arama filtresi
+    # Arama filtresi (core.search indeksi: müşteri, ürün adı, seri no)
     if search_query:
-        installations_with_warranty = installations_with_warranty.filter(
-            Q(customer__name__icontains=search_query) |
-            Q(inventory_item__name__name__icontains=search_query) |
-            Q(inventory_item__serial_no__icontains=search_query)
-        )
+        installations_with_warranty = search_filter(installations_with_warranty, search_query)
     
     # Tarih filtreleri
     now = timezone.now()
@@ -65,45 +59,31 @@ def warranty_tracking_list(request):
     elif filter_type == 'expired':
         installations_with_warranty = installations_with_warranty.filter(earliest_warranty_date__lte=now)
     
-    # Her installation için en kritik garanti kaydını ekle
-    installations = []
-    for installation in installations_with_warranty:
-        # En yakın tarihi olan garanti kaydını bul
-        critical_warranty = installation.warranty_followups.filter(
-            end_of_warranty_date=installation.earliest_warranty_date
-        ).first()
-        
-        # Installation objesine geçici attribute ekle
-        installation.critical_warranty = critical_warranty
-        installations.append(installation)
+    return installations_with_warranty
+
+
+@login_required
+def warranty_tracking_list(request):
+    """
+    Warranty takip listesi - her ürün için en yakın garanti bitiş tarihini gösterir
+    """
+    # Filtreler
+    filter_type = request.GET.get('filter', 'all')
+    search_query = request.GET.get('search', '')
     
-    # Pagination
-    paginator = Paginator(installations, 20)  # 20 items per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Base queryset - user'ın erişebileceği şirketlere göre filtrele
+    company_filter = get_user_accessible_companies_filter(request.user, 'installation')
+    installations_with_warranty = warranty_tracking_queryset(company_filter, filter_type, search_query)
     
-    # İstatistikler
-    stats_queryset = Installation.objects.filter(company_filter).annotate(
-        earliest_warranty_date=Min('warranty_followups__end_of_warranty_date')
-    ).exclude(earliest_warranty_date__isnull=True)
+    # Pagination - LIMIT/OFFSET ile veritabanında yapılır
+    page_obj = paginate(request, installations_with_warranty, 20, ('earliest_warranty_date', 'id'))
     
-    total_items = stats_queryset.count()
-    thirty_days_later = now + timedelta(days=30)
+    for installation in page_obj:
+        # Installation objesine geçici attribute ekle
+        installation.critical_warranty = installation.status.critical_warranty
     
-    # Durumları say
-    active_count = stats_queryset.filter(earliest_warranty_date__gt=now).count()
-    expiring_soon_count = stats_queryset.filter(
-        earliest_warranty_date__gt=now,
-        earliest_warranty_date__lte=thirty_days_later
-    ).count()
-    expired_count = stats_queryset.filter(earliest_warranty_date__lte=now).count()
-    
-    stats = {
-        'total': total_items,
-        'active': active_count,
-        'expiring_soon': expiring_soon_count,
-        'expired': expired_count,
-    }
+    # İstatistikler - tek aggregate sorgusu, erişim kapsamı bazında cache'li
+    stats = warranty_stats(request.user, company_filter)
     
     context = {
         'installations': page_obj,  # Artık warranties yerine installations
@@ -117,6 +97,84 @@ def warranty_tracking_list(request):
     return render(request, 'warranty_and_services/warranty_tracking_list.html', context)
 
 
+@login_required
+def warranty_tracking_export(request):
+    """
+    Garanti takip listesini CSV / XLSX olarak akış halinde indir
+    (listedeki filtreler ve erişim kapsamı aynen uygulanır)
+    """
+    company_filter = get_user_accessible_companies_filter(request.user, 'installation')
+    queryset = warranty_tracking_queryset(
+        company_filter,
+        request.GET.get('filter', 'all'),
+        request.GET.get('search', '')
+    )
+    return export_response(
+        request.GET.get('format', 'csv'),
+        'warranty_tracking',
+        WARRANTY_EXPORT_HEADER,
+        warranty_export_rows(queryset)
+    )
+
+
+def service_tracking_queryset(company_filter, filter_type='all', search_query=''):
+    """
+    Servis takip listesi ve dışa aktarımı için ortak queryset.
+    (queryset, sıralama) döner; tamamlananlar en son tamamlanan önce sıralanır.
+    """
+    # En yakın servis tarihi, kritik servis kaydı ve bakım sayıları
+    # InstallationStatus tablosundan okunur
+    now = timezone.now()
+    if filter_type == 'completed':
+        # Tamamlanan servisler - en son tamamlanan servis kritik kayıttır
+        installations_with_service = Installation.objects.select_related(
+            'customer__related_company',
+            'inventory_item__name',
+            'user',
+            'status__last_completed_service'
+        ).filter(
+            company_filter,
+            status__last_completed_service__isnull=False
+        ).annotate(
+            # Tarihsiz kayıtlar en sona (keyset anahtarı NULL olamaz)
+            last_completed_date=Coalesce(
+                F('status__last_completed_date'), Value(date.min), output_field=DateField()
+            )
+        )
+        ordering = ('-last_completed_date', 'id')
+    else:
+        installations_with_service = Installation.objects.select_related(
+            'customer__related_company',
+            'inventory_item__name',
+            'user',
+            'status__critical_service'
+        ).filter(company_filter).annotate(
+            next_service_date=F('status__next_service_date')
+        ).exclude(
+            next_service_date__isnull=True
+        )
+        ordering = ('next_service_date', 'id')
+        
+        # Durum filtreleri
+        if filter_type == 'pending':
+            installations_with_service = installations_with_service.filter(next_service_date__gt=now)
+        elif filter_type == 'due_soon':
+            # 7 gün içinde yapılması gereken
+            seven_days = now + timedelta(days=7)
+            installations_with_service = installations_with_service.filter(
+                next_service_date__gt=now,
+                next_service_date__lte=seven_days
+            )
+        elif filter_type == 'overdue':
+            installations_with_service = installations_with_service.filter(next_service_date__lte=now)
+    
+    # Arama filtresi (core.search indeksi: müşteri, ürün adı, seri no)
+    if search_query:
+        installations_with_service = search_filter(installations_with_service, search_query)
+    
+    return installations_with_service.order_by(*ordering), ordering
+
+
 @login_required
 def service_tracking_list(request):
     """
@@ -128,132 +186,26 @@ def service_tracking_list(request):
     
     # Base queryset - user'ın erişebileceği şirketlere göre filtrele
     company_filter = get_user_accessible_companies_filter(request.user, 'installation')
+    installations_with_service, ordering = service_tracking_queryset(company_filter, filter_type, search_query)
     
-    # Her installation için en yakın servis tarihini bul (sadece tamamlanmamış servisler)
-    from django.db.models import Min, Q
-    
-    installations_with_service = Installation.objects.select_related(
-        'customer',
-        'inventory_item__name',
-        'user'
-    ).prefetch_related(
-        'service_followups'
-    ).filter(company_filter).annotate(
-        next_service_date=Min('service_followups__next_service_date', 
-                            filter=Q(service_followups__is_completed=False))
-    ).exclude(
-        next_service_date__isnull=True
-    ).order_by('next_service_date')
-    
-    # Arama filtresi
-    if search_query:
-        installations_with_service = installations_with_service.filter(
-            Q(customer__name__icontains=search_query) |
-            Q(inventory_item__name__name__icontains=search_query) |
-            Q(inventory_item__serial_no__icontains=search_query)
-        )
+    # Pagination - LIMIT/OFFSET ile veritabanında yapılır
+    page_obj = paginate(request, installations_with_service, 20, ordering)
     
-    # Durum filtreleri
-    now = timezone.now()
-    if filter_type == 'pending':
-        installations_with_service = installations_with_service.filter(next_service_date__gt=now)
-    elif filter_type == 'due_soon':
-        # 7 gün içinde yapılması gereken
-        seven_days = now + timedelta(days=7)
-        installations_with_service = installations_with_service.filter(
-            next_service_date__gt=now,
-            next_service_date__lte=seven_days
-        )
-    elif filter_type == 'overdue':
-        installations_with_service = installations_with_service.filter(next_service_date__lte=now)
-    elif filter_type == 'completed':
-        # Tamamlanan servisler için ayrı queryset
-        installations_with_service = Installation.objects.select_related(
-            'customer',
-            'inventory_item__name',
-            'user'
-        ).prefetch_related(
-            'service_followups'
-        ).filter(
-            company_filter,
-            service_followups__is_completed=True
-        ).distinct().order_by('-service_followups__completed_date')
-        
-        if search_query:
-            installations_with_service = installations_with_service.filter(
-                Q(customer__name__icontains=search_query) |
-                Q(inventory_item__name__name__icontains=search_query) |
-                Q(inventory_item__serial_no__icontains=search_query)
-            )
-    
-    # Her installation için en kritik servis kaydını ve maintenance istatistiklerini ekle
-    installations = []
-    for installation in installations_with_service:
+    for installation in page_obj:
+        status = installation.status
+        # Installation objesine geçici attribute'ler ekle
         if filter_type == 'completed':
-            # En son tamamlanan servis kaydını bul
-            critical_service = installation.service_followups.filter(
-                is_completed=True
-            ).order_by('-completed_date').first()
+            installation.critical_service = status.last_completed_service
         else:
-            # En yakın tarihi olan tamamlanmamış servis kaydını bul
-            critical_service = installation.service_followups.filter(
-                is_completed=False
-            ).order_by('next_service_date').first()
-        
-        # Maintenance istatistiklerini hesapla (service history sayfasındaki mantıkla aynı)
-        # MaintenanceRecord'u olan servislerin istatistikleri
-        all_maintenance_records = MaintenanceRecord.objects.filter(
-            service_followup__installation=installation
-        )
-        
-        total_maintenances = all_maintenance_records.count()
-        periodic_count = all_maintenance_records.filter(maintenance_type='periodic').count()
-        breakdown_count = all_maintenance_records.filter(maintenance_type='breakdown').count()
-        
-        # Installation objesine geçici attribute'ler ekle
-        installation.critical_service = critical_service
+            installation.critical_service = status.critical_service
         installation.maintenance_stats = {
-            'total': total_maintenances,
-            'periodic': periodic_count,
-            'breakdown': breakdown_count
+            'total': status.maintenance_total,
+            'periodic': status.maintenance_periodic,
+            'breakdown': status.maintenance_breakdown
         }
-        installations.append(installation)
     
-    # Pagination
-    paginator = Paginator(installations, 20)  # 20 items per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # İstatistikler
-    stats_queryset = Installation.objects.filter(company_filter).annotate(
-        next_service_date=Min('service_followups__next_service_date', 
-                            filter=Q(service_followups__is_completed=False))
-    ).exclude(next_service_date__isnull=True)
-    
-    total_items = stats_queryset.count()
-    seven_days_later = now + timedelta(days=7)
-    
-    # Durumları say
-    pending_count = stats_queryset.filter(next_service_date__gt=now).count()
-    due_soon_count = stats_queryset.filter(
-        next_service_date__gt=now,
-        next_service_date__lte=seven_days_later
-    ).count()
-    overdue_count = stats_queryset.filter(next_service_date__lte=now).count()
-    
-    # Tamamlanan servisleri say
-    completed_count = Installation.objects.filter(
-        company_filter,
-        service_followups__is_completed=True
-    ).distinct().count()
-    
-    stats = {
-        'total': total_items,
-        'pending': pending_count,
-        'due_soon': due_soon_count,
-        'overdue': overdue_count,
-        'completed': completed_count,
-    }
+    # İstatistikler - tek aggregate sorgusu, erişim kapsamı bazında cache'li
+    stats = service_stats(request.user, company_filter)
     
     context = {
         'installations': page_obj,  # Artık services yerine installations
@@ -267,6 +219,27 @@ def service_tracking_list(request):
     return render(request, 'warranty_and_services/service_tracking_list.html', context)
 
 
+@login_required
+def service_tracking_export(request):
+    """
+    Servis takip listesini CSV / XLSX olarak akış halinde indir
+    (listedeki filtreler ve erişim kapsamı aynen uygulanır)
+    """
+    filter_type = request.GET.get('filter', 'all')
+    company_filter = get_user_accessible_companies_filter(request.user, 'installation')
+    queryset, ordering = service_tracking_queryset(
+        company_filter,
+        filter_type,
+        request.GET.get('search', '')
+    )
+    return export_response(
+        request.GET.get('format', 'csv'),
+        'service_tracking',
+        SERVICE_EXPORT_HEADER,
+        service_export_rows(queryset, completed=filter_type == 'completed')
+    )
+
+
 @login_required
 def warranty_detail(request, warranty_id):
     """
@@ -337,42 +310,40 @@ class InstallationListView(LoginRequiredMixin, ListView):
     paginate_by = 20
     
     def get_queryset(self):
-        from django.db.models import Min
         from django.utils import timezone
         
         # Queryset'i oluştur - user'ın erişebileceği şirketlere göre filtrele
+        # (garanti / servis tarihleri InstallationStatus tablosundan)
         company_filter = get_user_accessible_companies_filter(self.request.user, 'installation')
         queryset = Installation.objects.select_related(
             'customer',
             'inventory_item__name'
-        ).prefetch_related(
-            'warranty_followups',
-            'service_followups'
         ).annotate(
-            next_warranty_end=Min('warranty_followups__end_of_warranty_date'),
-            next_service_date=Min('service_followups__next_service_date')
-        ).filter(company_filter).order_by('-setup_date')
+            next_warranty_end=F('status__earliest_warranty_end'),
+            next_service_date=F('status__next_service_date')
+        ).filter(company_filter).order_by('-setup_date', '-id')
         
         # Filtre parametresi kontrolü
         filter_type = self.request.GET.get('filter')
         if filter_type == 'active_warranty':
             # Sadece garanti süresi devam eden kurulumlar
             now = timezone.now()
-            queryset = queryset.filter(
-                warranty_followups__end_of_warranty_date__gt=now
-            ).distinct()
+            queryset = queryset.filter(status__latest_warranty_end__gt=now)
         
         # Arama filtresi
         search_query = self.request.GET.get('search')
         if search_query:
-            queryset = queryset.filter(
-                Q(customer__name__icontains=search_query) |
-                Q(inventory_item__name__name__icontains=search_query) |
-                Q(inventory_item__serial_no__icontains=search_query)
-            )
+            queryset = search_filter(queryset, search_query)
         
         return queryset
     
+    def paginate_queryset(self, queryset, page_size):
+        # Keyset modunda OFFSET/COUNT yerine (setup_date, id) cursor'ı
+        if not keyset_enabled(self.request):
+            return super().paginate_queryset(queryset, page_size)
+        page = paginate(self.request, queryset, page_size, ('-setup_date', '-id'))
+        return (page.paginator, page, page.object_list, page.has_other_pages())
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search_query'] = self.request.GET.get('search', '')
@@ -766,17 +737,11 @@ def api_customer_search(request):
             })
         
         # Get user's accessible companies using utility function
-        from .utils import get_user_accessible_companies
-        accessible_company_ids = get_user_accessible_companies(user)
-        
-        if not accessible_company_ids:
-            return JsonResponse({
-                'success': False,
-                'message': 'Kullanıcının erişebileceği firma bulunamadı'
-            })
+        # (firma ve tüm alt firmaları; kendi firması her zaman dahildir)
+        from .utils import get_user_accessible_companies_subquery
+        accessible_company_ids = get_user_accessible_companies_subquery(user)
         
         print(f"User company: {user_company.name if user_company else 'None'}")
-        print(f"Searching in company hierarchy: {accessible_company_ids}")
         
         # Search customers within the accessible companies
         customers = Company.objects.filter(
@@ -1582,12 +1547,12 @@ def api_maintenance_search(request):
         # Kurulumu yapılmış itemları ara (in_used=True olan)
         from item_master.models import InventoryItem
         
-        installed_items = InventoryItem.objects.filter(
-            in_used=True  # Sadece kurulumu yapılmış itemlar
-        ).filter(
-            Q(serial_no__icontains=search_term) |
-            Q(name__name__icontains=search_term) |
-            Q(name__shortcode__icontains=search_term)
+        # Seri no / ürün adı / kısa kod, en ilgili sonuç önce
+        installed_items = search_ranked(
+            InventoryItem.objects.filter(
+                in_used=True  # Sadece kurulumu yapılmış itemlar
+            ),
+            search_term
         ).select_related('name').prefetch_related('installation_set__customer')
         
         if not installed_items.exists():
@@ -1937,12 +1902,12 @@ def api_maintenance_submit(request):
                     
                 service_followup.save()
         
-        # Send notification email
+        # Queue notification email (delivered by process_notification_outbox)
         try:
-            maintenance_record.send_maintenance_notification()
-            print(f"✅ Email notification sent successfully for maintenance ID: {maintenance_record.id}")
+            NotificationOutbox.enqueue('maintenance', maintenance_record=maintenance_record)
+            print(f"✅ Email notification queued for maintenance ID: {maintenance_record.id}")
         except Exception as e:
-            print(f"❌ Email notification failed: {e}")
+            print(f"❌ Email notification could not be queued: {e}")
             import traceback
             traceback.print_exc()
         
@@ -2098,33 +2063,25 @@ def installation_map_view(request):
         installations = Installation.objects.filter(
             location_latitude__isnull=False,
             location_longitude__isnull=False
-        ).filter(company_filter).select_related('customer', 'inventory_item', 'inventory_item__name')
-        
-        print(f"Found {installations.count()} installations with coordinates for user: {request.user}")
+        ).filter(company_filter).select_related(
+            'customer__related_company', 'inventory_item', 'inventory_item__name', 'status'
+        )
         
         markers = []
         for installation in installations:
-            print(f"Processing installation: {installation.id} - {installation.inventory_item}")
-            
-            # Get next service date
+            # Get next service date (InstallationStatus'tan - kurulum başına sorgu yok)
             next_service = "Belirtilmemiş"
-            services = installation.service_followups.filter(is_completed=False).order_by('next_service_date')
-            if services.exists():
-                next_service = services.first().next_service_date.strftime('%d.%m.%Y') if services.first().next_service_date else 'Tarih yok'
+            status = getattr(installation, 'status', None)
+            if status and status.critical_service_id:
+                next_service = status.next_service_date.strftime('%d.%m.%Y') if status.next_service_date else 'Tarih yok'
             
             # Determine marker color based on service status
             color = '#10B981'  # Green default
-            if services.exists():
-                service = services.first()
-                next_service_date = service.next_service_date
-                # Ensure both are date objects for subtraction
-                if hasattr(next_service_date, 'date'):
-                    next_service_date = next_service_date.date()
-                days_until = (next_service_date - timezone.now().date()).days
-                if days_until < 0:
-                    color = '#EF4444'  # Red - overdue
-                elif days_until <= 7:
-                    color = '#F59E0B'  # Yellow - due soon
+            service_state = status.service_state if status else None
+            if service_state == 'overdue':
+                color = '#EF4444'  # Red - overdue
+            elif service_state == 'due_soon':
+                color = '#F59E0B'  # Yellow - due soon
             
             markers.append({
                 'lat': float(installation.location_latitude),